@@ -8,8 +8,16 @@ import argparse
 import requests
 import json
 import sys
+import time
+import uuid
 from datetime import datetime
 
+# Statuts à partir desquels une tâche n'évoluera plus
+TERMINAL_STATUSES = ("completed", "failed")
+
+# Nouvelles tentatives d'une soumission après une coupure réseau
+SUBMIT_ATTEMPTS = 3
+
 class BICLI:
     """Interface CLI pour BI-COMPUTE"""
     
@@ -45,8 +53,34 @@ class BICLI:
             print(f"❌ Erreur: {e}")
             return False
     
-    def submit(self, command, name=None, task_type="shell"):
-        """Soumettre une nouvelle tâche"""
+    def post_idempotent(self, path, idempotency_key=None, **kwargs):
+        """POST rejoué avec la même clé d'idempotence en cas de coupure
+        
+        Si la réponse s'est perdue après l'insertion, le coordinateur
+        reconnaît la clé et renvoie la soumission d'origine au lieu d'en
+        créer une seconde. Sans clé d'en-tête, le corps doit porter ses
+        propres clés (lots).
+        """
+        headers = dict(kwargs.pop("headers", {}))
+        if idempotency_key:
+            headers["Idempotency-Key"] = idempotency_key
+        for attempt in range(1, SUBMIT_ATTEMPTS + 1):
+            try:
+                return self.session.post(f"{self.url}{path}", headers=headers, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt == SUBMIT_ATTEMPTS:
+                    raise
+                print(f"⚠️ Nouvelle tentative {attempt}/{SUBMIT_ATTEMPTS - 1} "
+                      f"(clé {idempotency_key}): {e}", file=sys.stderr)
+                time.sleep(attempt)
+    
+    def submit(self, command, name=None, task_type="shell", priority=0, queue=None,
+               requirements=None, max_retries=None, cacheable=False, idempotency_key=None):
+        """Soumettre une nouvelle tâche
+        
+        Sans clé explicite, une clé d'idempotence aléatoire est générée pour
+        que les nouvelles tentatives ne créent jamais de doublon.
+        """
         if not name:
             name = f"CLI Task {datetime.now().strftime('%H:%M:%S')}"
         
@@ -87,22 +121,37 @@ class BICLI:
         payload = {
             "name": name,
             "type": task_type,
-            "command": command_obj
+            "command": command_obj,
+            "priority": priority,
+            "queue": queue,
+            "requirements": requirements,
+            "max_retries": max_retries,
+            "cacheable": cacheable
         }
         
         try:
-            response = self.session.post(
-                f"{self.url}/api/tasks",
+            response = self.post_idempotent(
+                "/api/tasks",
+                idempotency_key or str(uuid.uuid4()),
                 json=payload,
                 timeout=10
             )
             
-            if response.status_code == 201:
+            if response.status_code == 200 and response.json().get("replayed"):
+                data = response.json()
+                print(f"🔂 Tâche déjà soumise avec cette clé")
+                print(f"   ID: {data.get('task_id')}")
+                print(f"   Status: {data.get('status')}")
+                return True
+            elif response.status_code == 201:
                 data = response.json()
                 print(f"✅ Tâche soumise avec succès")
                 print(f"   ID: {data.get('task_id')}")
                 print(f"   Nom: {data.get('name')}")
+                print(f"   File: {data.get('queue')} (priorité {data.get('priority')})")
                 print(f"   Status: {data.get('status')}")
+                if data.get('cached'):
+                    print("   ⚡ Résultat servi par le cache")
                 return True
             else:
                 print(f"❌ HTTP {response.status_code}: {response.text}")
@@ -112,6 +161,80 @@ class BICLI:
             print(f"❌ Erreur: {e}")
             return False
     
+    def submit_batch(self, commands, name=None, task_type="shell", chunk_size=5000,
+                     priority=0, queue=None, requirements=None, max_retries=None,
+                     cacheable=False, idempotency_key=None):
+        """Soumettre un grand nombre de tâches en lots NDJSON
+        
+        `commands` est un itérable de commandes (lu au fil de l'eau): seules
+        `chunk_size` tâches sont en mémoire à la fois, et chaque lot est
+        inséré par le coordinateur en une seule transaction.
+        
+        Chaque tâche reçoit la clé `<clé du lot>-<index>`: relancer la même
+        commande avec --idempotency-key reprend un lot interrompu sans
+        dupliquer les tâches déjà insérées.
+        """
+        base_name = name or f"CLI Batch {datetime.now().strftime('%H:%M:%S')}"
+        batch_key = idempotency_key or str(uuid.uuid4())
+        submitted = 0
+        cached = 0
+        replayed = 0
+        chunk = []
+        
+        def flush():
+            body = "\n".join(json.dumps(task) for task in chunk) + "\n"
+            response = self.post_idempotent(
+                "/api/tasks/batch",
+                data=body.encode("utf-8"),
+                headers={"Content-Type": "application/x-ndjson"},
+                timeout=60
+            )
+            if response.status_code != 201:
+                raise RuntimeError(f"HTTP {response.status_code}: {response.text}")
+            return response.json()
+        
+        try:
+            for index, command in enumerate(commands):
+                chunk.append({
+                    "name": f"{base_name} #{index}",
+                    "type": task_type,
+                    "command": {"type": task_type, "command": command},
+                    "priority": priority,
+                    "queue": queue,
+                    "requirements": requirements,
+                    "max_retries": max_retries,
+                    "cacheable": cacheable,
+                    "idempotency_key": f"{batch_key}-{index}"
+                })
+                
+                if len(chunk) >= chunk_size:
+                    data = flush()
+                    submitted += data.get("count", 0)
+                    cached += data.get("cached", 0)
+                    replayed += data.get("replayed", 0)
+                    print(f"   📦 {submitted} tâches soumises "
+                          f"(IDs {data['task_ids'][0]}-{data['task_ids'][-1]})")
+                    chunk = []
+            
+            if chunk:
+                data = flush()
+                submitted += data.get("count", 0)
+                cached += data.get("cached", 0)
+                replayed += data.get("replayed", 0)
+                print(f"   📦 {submitted} tâches soumises "
+                      f"(IDs {data['task_ids'][0]}-{data['task_ids'][-1]})")
+            
+            print(f"✅ Lot soumis avec succès: {submitted} tâches")
+            if replayed:
+                print(f"   🔂 {replayed} tâche(s) déjà soumise(s) (clé {batch_key})")
+            if cached:
+                print(f"   ⚡ {cached} résultat(s) servi(s) par le cache")
+            return True
+            
+        except Exception as e:
+            print(f"❌ Erreur après {submitted} tâches soumises: {e}")
+            return False
+    
     def stats(self):
         """Afficher les statistiques du réseau"""
         try:
@@ -176,24 +299,38 @@ class BICLI:
                 print(f"Status: {task.get('status', 'N/A')}")
                 print(f"Créée: {task.get('created_at', 'N/A')}")
                 
+                if task.get('assigned_worker'):
+                    print(f"Worker: {task.get('assigned_worker')}")
+                
+                if task.get('attempts'):
+                    print(f"Réessais: {task.get('attempts')}")
+                if task.get('retry_after') and task.get('status') == 'pending':
+                    print(f"Prochain essai: {task.get('retry_after')}")
+                
                 if task.get('completed_at'):
                     print(f"Terminée: {task.get('completed_at')}")
                 
-                if task.get('result_output'):
-                    print(f"\n📤 OUTPUT:")
-                    output = task.get('result_output', '')
-                    if len(output) > 500:
-                        print(output[:500] + "...")
-                    else:
-                        print(output)
-                
-                if task.get('result_error'):
-                    print(f"\n❌ ERREUR:")
-                    error = task.get('result_error', '')
-                    if len(error) > 500:
-                        print(error[:500] + "...")
-                    else:
-                        print(error)
+                # La sortie n'est téléchargée que pour une tâche terminée
+                if task.get('status') in TERMINAL_STATUSES:
+                    result = self.session.get(
+                        f"{self.url}/api/tasks/{task_id}/result", timeout=10
+                    ).json()
+                    
+                    if result.get('output'):
+                        print(f"\n📤 OUTPUT:")
+                        output = result.get('output', '')
+                        if len(output) > 500:
+                            print(output[:500] + "...")
+                        else:
+                            print(output)
+                    
+                    if result.get('error'):
+                        print(f"\n❌ ERREUR:")
+                        error = result.get('error', '')
+                        if len(error) > 500:
+                            print(error[:500] + "...")
+                        else:
+                            print(error)
                 
                 return True
             elif response.status_code == 404:
@@ -207,34 +344,152 @@ class BICLI:
             print(f"❌ Erreur: {e}")
             return False
     
-    def workers(self):
-        """Lister tous les workers"""
+    def wait(self, task_ids, timeout=None, poll_wait=25):
+        """Attendre la fin de plusieurs tâches (long-polling sur leur statut)
+        
+        Seules les tâches encore en cours sont interrogées; l'ETag évite de
+        renvoyer des statuts inchangés. Code de sortie: 0 si tout a réussi,
+        1 si au moins une tâche a échoué, 2 en cas de délai dépassé.
+        """
+        pending = list(dict.fromkeys(task_ids))
+        total = len(pending)
+        finished = {}
+        etag = None
+        deadline = time.monotonic() + timeout if timeout else None
+        
+        print(f"⏳ Attente de {total} tâche(s)...")
         try:
-            response = self.session.get(f"{self.url}/api/workers", timeout=5)
-            if response.status_code == 200:
+            while pending:
+                if deadline and time.monotonic() >= deadline:
+                    print(f"⏰ Délai dépassé: {len(pending)} tâche(s) non terminée(s)")
+                    return 2
+                
+                wait = poll_wait
+                if deadline:
+                    wait = max(0, min(poll_wait, deadline - time.monotonic()))
+                
+                headers = {"If-None-Match": etag} if etag else {}
+                response = self.session.post(
+                    f"{self.url}/api/tasks/status",
+                    json={"ids": pending[:10000], "wait": wait},
+                    headers=headers, timeout=wait + 15
+                )
+                if response.status_code == 304:
+                    continue
+                if response.status_code != 200:
+                    print(f"❌ HTTP {response.status_code}: {response.text}")
+                    return 1
+                
                 data = response.json()
-                workers = data.get("workers", [])
+                etag = response.headers.get("ETag")
                 
-                print(f"👷 WORKERS ({len(workers)} total)")
-                print("=" * 60)
+                for task_id in data.get("missing", []):
+                    print(f"❓ #{task_id}: tâche inconnue")
+                    finished[task_id] = "missing"
                 
-                for worker in workers:
-                    name = worker.get('name', 'Unknown')
-                    platform = worker.get('platform', 'Unknown')
-                    last_seen = worker.get('last_seen', 'Never')
-                    completed = worker.get('tasks_completed', 0)
-                    active = "✅" if worker.get('is_active') else "❌"
+                for task in data.get("tasks", []):
+                    if task["status"] in TERMINAL_STATUSES:
+                        icon = "✅" if task["status"] == "completed" else "❌"
+                        print(f"{icon} #{task['id']}: {task['name']} ({task['status']})")
+                        finished[task["id"]] = task["status"]
+                
+                remaining = [task_id for task_id in pending if task_id not in finished]
+                if len(remaining) != len(pending):
+                    # La liste a changé: l'ETag précédent ne s'applique plus
+                    pending, etag = remaining, None
+                    print(f"   📊 {len(finished)}/{total} terminée(s)")
                     
-                    print(f"{active} {name}")
-                    print(f"   Platform: {platform}")
-                    print(f"   Tâches complétées: {completed}")
-                    print(f"   Dernière activité: {last_seen}")
-                    print()
+        except KeyboardInterrupt:
+            return 2
+        
+        failed = sum(1 for status in finished.values() if status != "completed")
+        print(f"🏁 Terminé: {total - failed} réussie(s), {failed} en échec")
+        return 1 if failed else 0
+    
+    def tail(self, task_id, stream="stdout"):
+        """Suivre en direct la sortie d'une tâche (long-polling)"""
+        position = 0
+        try:
+            while True:
+                response = self.session.get(
+                    f"{self.url}/api/tasks/{task_id}/output",
+                    params={"stream": stream, "position": position, "wait": 25},
+                    timeout=40
+                )
                 
-                return True
-            else:
-                print(f"❌ HTTP {response.status_code}: {response.text}")
-                return False
+                if response.status_code == 404:
+                    print(f"❌ Tâche #{task_id} non trouvée")
+                    return False
+                if response.status_code != 200:
+                    print(f"❌ HTTP {response.status_code}: {response.text}")
+                    return False
+                
+                data = response.json()
+                if data.get("data"):
+                    sys.stdout.write(data["data"])
+                    sys.stdout.flush()
+                position = data.get("next_position", position)
+                
+                if data.get("complete"):
+                    print(f"\n{'✅' if data.get('status') == 'completed' else '❌'} "
+                          f"Tâche #{task_id}: {data.get('status')}")
+                    return data.get("status") == "completed"
+                
+        except KeyboardInterrupt:
+            return True
+        except Exception as e:
+            print(f"❌ Erreur: {e}")
+            return False
+    
+    def fetch_list(self, path, key, limit, **filters):
+        """Parcourir une liste paginée par curseur jusqu'à `limit` éléments
+        
+        Renvoie (éléments, reste_des_résultats) où le booléen indique
+        qu'au moins une page supplémentaire existe côté serveur.
+        """
+        items = []
+        params = {k: v for k, v in filters.items() if v is not None}
+        while True:
+            params["limit"] = min(limit - len(items), 1000)
+            response = self.session.get(f"{self.url}{path}", params=params, timeout=10)
+            response.raise_for_status()
+            data = response.json()
+            items.extend(data.get(key, []))
+            
+            cursor = data.get("next_cursor")
+            if not cursor or len(items) >= limit:
+                return items, bool(cursor)
+            params["cursor"] = cursor
+    
+    def workers(self, limit=50, active=False):
+        """Lister les workers (les plus récemment vus d'abord)"""
+        try:
+            workers, more = self.fetch_list(
+                "/api/workers", "workers", limit,
+                fields="name,platform,last_seen,tasks_completed,is_active",
+                active="1" if active else None
+            )
+            
+            print(f"👷 WORKERS ({len(workers)}{'+' if more else ''})")
+            print("=" * 60)
+            
+            for worker in workers:
+                name = worker.get('name', 'Unknown')
+                platform = worker.get('platform', 'Unknown')
+                last_seen = worker.get('last_seen', 'Never')
+                completed = worker.get('tasks_completed', 0)
+                active_icon = "✅" if worker.get('is_active') else "❌"
+                
+                print(f"{active_icon} {name}")
+                print(f"   Platform: {platform}")
+                print(f"   Tâches complétées: {completed}")
+                print(f"   Dernière activité: {last_seen}")
+                print()
+            
+            if more:
+                print("... autres workers disponibles (--limit pour en voir plus)")
+            
+            return True
                 
         except Exception as e:
             print(f"❌ Erreur: {e}")
@@ -282,57 +537,254 @@ class BICLI:
             print(f"❌ Action inconnue: {action}")
             return False
     
-    def tasks(self):
-        """Lister toutes les tâches"""
+    def tasks(self, limit=10, status=None, worker=None):
+        """Lister les tâches (les plus récentes d'abord)"""
         try:
-            response = self.session.get(f"{self.url}/api/tasks/all", timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                tasks = data.get("tasks", [])
+            tasks, more = self.fetch_list(
+                "/api/tasks/all", "tasks", limit,
+                fields="id,name,status,created_at,assigned_worker,execution_time,attempts",
+                status=status, worker=worker
+            )
+            
+            print(f"📋 TÂCHES ({len(tasks)}{'+' if more else ''})")
+            print("=" * 70)
+            
+            for task in tasks:
+                task_id = task.get('id', '?')
+                name = task.get('name', 'Unknown')
+                status = task.get('status', 'unknown')
+                created = task.get('created_at', 'N/A')
                 
-                print(f"📋 TÂCHES ({len(tasks)} total)")
-                print("=" * 70)
+                # Symboles de statut
+                if status == 'completed':
+                    status_icon = '✅'
+                elif status == 'pending':
+                    status_icon = '⏳'
+                elif status == 'running':
+                    status_icon = '🔄'
+                elif status == 'failed':
+                    status_icon = '❌'
+                elif status == 'blocked':
+                    status_icon = '🔗'
+                else:
+                    status_icon = '❓'
                 
-                for task in tasks[:10]:  # Limiter à 10 pour l'affichage
-                    task_id = task.get('id', '?')
-                    name = task.get('name', 'Unknown')
-                    status = task.get('status', 'unknown')
-                    created = task.get('created_at', 'N/A')
-                    
-                    # Symboles de statut
-                    if status == 'completed':
-                        status_icon = '✅'
-                    elif status == 'pending':
-                        status_icon = '⏳'
-                    elif status == 'failed':
-                        status_icon = '❌'
-                    else:
-                        status_icon = '❓'
-                    
-                    print(f"{status_icon} #{task_id}: {name}")
-                    print(f"   Status: {status}")
-                    print(f"   Créée: {created}")
-                    
-                    if task.get('assigned_worker'):
-                        print(f"   Worker: {task.get('assigned_worker')}")
-                    
-                    if task.get('execution_time'):
-                        print(f"   Temps: {task.get('execution_time')}s")
-                    
-                    print()
+                print(f"{status_icon} #{task_id}: {name}")
+                print(f"   Status: {status}")
+                print(f"   Créée: {created}")
                 
-                if len(tasks) > 10:
-                    print(f"... et {len(tasks) - 10} autres tâches")
+                if task.get('assigned_worker'):
+                    print(f"   Worker: {task.get('assigned_worker')}")
                 
+                if task.get('execution_time'):
+                    print(f"   Temps: {task.get('execution_time')}s")
+                
+                if task.get('attempts'):
+                    print(f"   Réessais: {task.get('attempts')}")
+                
+                print()
+            
+            if more:
+                print("... autres tâches disponibles (--limit pour en voir plus)")
+            
+            return True
+                
+        except Exception as e:
+            print(f"❌ Erreur: {e}")
+            return False
+
+    def export(self, path, status=None, since=None, until=None, name_prefix=None,
+               include="output,error"):
+        """Exporter les tâches en NDJSON vers un fichier ('-' = stdout)
+        
+        Les lignes sont écrites au fil de leur réception: ni le client ni le
+        coordinateur ne gardent l'export complet en mémoire.
+        """
+        params = {
+            "status": status, "since": since, "until": until,
+            "name_prefix": name_prefix, "include": include
+        }
+        params = {k: v for k, v in params.items() if v is not None}
+        
+        out = sys.stdout if path == "-" else open(path, "w", encoding="utf-8")
+        count = 0
+        try:
+            with self.session.get(f"{self.url}/api/tasks/export", params=params,
+                                  stream=True, timeout=(5, 300)) as response:
+                if response.status_code != 200:
+                    print(f"❌ HTTP {response.status_code}: {response.text}", file=sys.stderr)
+                    return False
+                
+                for line in response.iter_lines(decode_unicode=False):
+                    if line:
+                        out.write(line.decode("utf-8") + "\n")
+                        count += 1
+            
+            print(f"✅ {count} tâche(s) exportée(s) vers {path}", file=sys.stderr)
+            return True
+            
+        except Exception as e:
+            print(f"❌ Erreur après {count} tâche(s): {e}", file=sys.stderr)
+            return False
+        finally:
+            if out is not sys.stdout:
+                out.close()
+
+    def job_submit(self, path, idempotency_key=None):
+        """Soumettre un job décrit en JSON ({"name": ..., "tasks": [...]})
+        
+        Chaque tâche peut porter une clé ("key") et dépendre ("depends_on")
+        des clés des tâches précédentes: le coordinateur distribue chaque
+        étape dès que ses parents sont terminés.
+        """
+        try:
+            with (sys.stdin if path == "-" else open(path, encoding="utf-8")) as f:
+                spec = json.load(f)
+            
+            response = self.post_idempotent(
+                "/api/jobs", idempotency_key or str(uuid.uuid4()), json=spec, timeout=60
+            )
+            if response.status_code == 200 and response.json().get("replayed"):
+                data = response.json()
+                print(f"🔂 Job déjà soumis avec cette clé: {data['name']} (ID: {data['job_id']})")
+                print(f"   Tâches: {data['count']}")
                 return True
-            else:
+            if response.status_code != 201:
                 print(f"❌ HTTP {response.status_code}: {response.text}")
                 return False
-                
+            
+            data = response.json()
+            print(f"✅ Job soumis: {data['name']} (ID: {data['job_id']})")
+            print(f"   Tâches: {data['count']}")
+            for key, task_id in data.get("keys", {}).items():
+                print(f"   {key}: #{task_id}")
+            return True
+            
+        except (OSError, ValueError) as e:
+            print(f"❌ Spécification de job invalide: {e}")
+            return False
+        except Exception as e:
+            print(f"❌ Erreur: {e}")
+            return False
+    
+    def job_status(self, job_id):
+        """Afficher la progression d'un job"""
+        try:
+            response = self.session.get(f"{self.url}/api/jobs/{job_id}", timeout=5)
+            if response.status_code == 404:
+                print(f"❌ Job #{job_id} non trouvé")
+                return False
+            if response.status_code != 200:
+                print(f"❌ HTTP {response.status_code}: {response.text}")
+                return False
+            
+            job = response.json()
+            print(f"🧩 JOB #{job_id}: {job['name']}")
+            print("=" * 30)
+            print(f"État: {job['state']} ({job['progress'] * 100:.1f}%)")
+            print(f"Tâches: {job['total']}")
+            for status in ("completed", "running", "pending", "blocked", "failed"):
+                if job[status]:
+                    print(f"   {status}: {job[status]}")
+            return True
+            
+        except Exception as e:
+            print(f"❌ Erreur: {e}")
+            return False
+    
+    def resubmit(self, task_ids=None, queue=None, name_prefix=None, max_retries=None):
+        """Relancer des tâches échouées (par ID, ou toutes celles des filtres)"""
+        payload = {"max_retries": max_retries}
+        if task_ids:
+            payload["task_ids"] = task_ids
+        else:
+            payload.update(queue=queue, name_prefix=name_prefix)
+        
+        try:
+            response = self.session.post(f"{self.url}/api/tasks/resubmit", json=payload, timeout=60)
+            if response.status_code != 200:
+                print(f"❌ HTTP {response.status_code}: {response.text}")
+                return False
+            
+            print(f"🔁 {response.json().get('count', 0)} tâche(s) échouée(s) relancée(s)")
+            return True
+            
         except Exception as e:
             print(f"❌ Erreur: {e}")
             return False
 
+    def estimate(self, count, task_type="shell", deadline=None, estimated_seconds=None):
+        """Estimer la durée d'un job et les workers nécessaires"""
+        try:
+            params = {"type": task_type, "count": count}
+            if deadline is not None:
+                params["deadline"] = deadline
+            if estimated_seconds is not None:
+                params["estimated_seconds"] = estimated_seconds
+            
+            response = self.session.get(f"{self.url}/api/estimate", params=params, timeout=10)
+            if response.status_code != 200:
+                print(f"❌ HTTP {response.status_code}: {response.text}")
+                return False
+            
+            plan = response.json()
+            print(f"⏱️  ESTIMATION: {count} tâches {task_type}")
+            print("=" * 50)
+            print(f"Durée par tâche (parc): {plan['estimated_seconds_per_task']}s")
+            print(f"Workers actifs: {plan['active_workers']}")
+            if plan['estimated_duration'] is None:
+                print("❌ Aucun worker actif")
+                return False
+            
+            print(f"Workers nécessaires: {plan['workers_needed']}")
+            print(f"Durée estimée: {plan['estimated_duration']}s")
+            if deadline is not None:
+                print("✅ Échéance tenable" if plan['feasible'] else "❌ Échéance non tenable")
+            
+            for worker in plan['workers']:
+                print(f"   👷 {worker['name']}: vitesse x{worker['speed']}, "
+                      f"{worker['tasks_per_second']} tâches/s")
+            
+            return plan['feasible']
+            
+        except Exception as e:
+            print(f"❌ Erreur: {e}")
+            return False
+
+def parse_task_ids(specs):
+    """Développer des identifiants de tâches: 12, 5-40 ou 1,2,3"""
+    task_ids = []
+    for spec in specs:
+        for part in spec.split(","):
+            if not part.strip():
+                continue
+            if "-" in part:
+                start, stop = part.split("-", 1)
+                task_ids.extend(range(int(start), int(stop) + 1))
+            else:
+                task_ids.append(int(part))
+    return task_ids
+
+def read_commands(path):
+    """Lire une commande par ligne depuis un fichier ('-' pour stdin)"""
+    stream = sys.stdin if path == "-" else open(path, "r")
+    try:
+        for line in stream:
+            line = line.rstrip("\n")
+            if line.strip() and not line.lstrip().startswith("#"):
+                yield line
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+def expand_template(template, spec):
+    """Générer les commandes d'un modèle {i} sur une plage START:STOP[:STEP]"""
+    bounds = [int(part) for part in spec.split(":")]
+    if len(bounds) == 1:
+        bounds = [0, bounds[0]]
+    for i in range(*bounds):
+        yield template.replace("{i}", str(i))
+
 def main():
     """Point d'entrée principal"""
     parser = argparse.ArgumentParser(
@@ -344,7 +796,10 @@ Exemples:
   %(prog)s --url https://bi-compute.railway.app stats
   %(prog)s submit "echo Hello World" --name "Test Task"
   %(prog)s submit @script.py --type python
+  %(prog)s submit --batch commands.txt --name "Sweep"
+  %(prog)s submit "python3 sim.py --seed {i}" --range 0:50000
   %(prog)s status 123
+  %(prog)s tail 123
   %(prog)s workers
   %(prog)s demo start
   %(prog)s demo reset
@@ -387,8 +842,10 @@ Exemples:
         help="Soumettre une nouvelle tâche"
     )
     submit_parser.add_argument(
-        "command",
-        help="Commande à exécuter ou fichier (préfixé avec @)"
+        "task_command",
+        metavar="command",
+        help="Commande à exécuter, fichier (préfixé avec @), "
+             "fichier de commandes (--batch) ou modèle avec {i} (--range)"
     )
     submit_parser.add_argument(
         "--name",
@@ -400,6 +857,60 @@ Exemples:
         default="shell",
         help="Type de tâche (défaut: shell)"
     )
+    submit_parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Soumettre une tâche par ligne du fichier donné ('-' pour stdin)"
+    )
+    submit_parser.add_argument(
+        "--range",
+        metavar="START:STOP[:STEP]",
+        help="Soumettre une tâche par valeur de {i} dans la commande modèle"
+    )
+    submit_parser.add_argument(
+        "--priority",
+        type=int,
+        default=0,
+        help="Priorité dans la file (plus grand = plus tôt, défaut: 0)"
+    )
+    submit_parser.add_argument(
+        "--queue",
+        help="File d'attente (ex: nom du soumetteur) pour le partage équitable"
+    )
+    submit_parser.add_argument(
+        "--cpu",
+        type=int,
+        help="Cœurs requis par tâche"
+    )
+    submit_parser.add_argument(
+        "--memory-mb",
+        type=int,
+        help="Mémoire requise par tâche (Mo)"
+    )
+    submit_parser.add_argument(
+        "--platform",
+        help="Plateforme requise (ex: linux, android, aarch64)"
+    )
+    submit_parser.add_argument(
+        "--max-retries",
+        type=int,
+        help="Réessais automatiques en cas d'échec (défaut: celui du coordinateur)"
+    )
+    submit_parser.add_argument(
+        "--cacheable",
+        action="store_true",
+        help="Tâche déterministe: réutiliser le résultat d'une commande identique"
+    )
+    submit_parser.add_argument(
+        "--idempotency-key",
+        help="Clé d'idempotence (défaut: aléatoire); la réutiliser ne crée pas de doublon"
+    )
+    submit_parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=5000,
+        help="Nombre de tâches par requête en mode lot (défaut: 5000)"
+    )
     
     # Status
     status_parser = subparsers.add_parser(
@@ -412,16 +923,177 @@ Exemples:
         help="ID de la tâche"
     )
     
+    # Tail
+    tail_parser = subparsers.add_parser(
+        "tail",
+        help="Suivre en direct la sortie d'une tâche"
+    )
+    tail_parser.add_argument(
+        "task_id",
+        type=int,
+        help="ID de la tâche"
+    )
+    tail_parser.add_argument(
+        "--stream",
+        choices=["stdout", "stderr"],
+        default="stdout",
+        help="Flux à suivre (défaut: stdout)"
+    )
+    
+    # Wait
+    wait_parser = subparsers.add_parser(
+        "wait",
+        help="Attendre la fin de plusieurs tâches"
+    )
+    wait_parser.add_argument(
+        "task_ids",
+        nargs="+",
+        help="IDs des tâches (ex: 12 15-40 50,51)"
+    )
+    wait_parser.add_argument(
+        "--timeout",
+        type=float,
+        help="Délai maximal d'attente en secondes"
+    )
+    
+    # Estimate
+    estimate_parser = subparsers.add_parser(
+        "estimate",
+        help="Estimer la durée d'un job et les workers nécessaires"
+    )
+    estimate_parser.add_argument(
+        "count",
+        type=int,
+        help="Nombre de tâches du job"
+    )
+    estimate_parser.add_argument(
+        "--type",
+        choices=["shell", "python"],
+        default="shell",
+        help="Type de tâche (défaut: shell)"
+    )
+    estimate_parser.add_argument(
+        "--deadline",
+        type=float,
+        help="Échéance en secondes"
+    )
+    estimate_parser.add_argument(
+        "--estimated-seconds",
+        type=float,
+        help="Durée d'une tâche (si le type n'a pas d'historique)"
+    )
+    
     # Workers
-    subparsers.add_parser(
+    workers_parser = subparsers.add_parser(
         "workers",
-        help="Lister tous les workers"
+        help="Lister les workers"
+    )
+    workers_parser.add_argument(
+        "--limit",
+        type=int,
+        default=50,
+        help="Nombre maximum de workers affichés (défaut: 50)"
+    )
+    workers_parser.add_argument(
+        "--active",
+        action="store_true",
+        help="Uniquement les workers vus récemment"
     )
     
     # Tasks
-    subparsers.add_parser(
+    tasks_parser = subparsers.add_parser(
         "tasks",
-        help="Lister toutes les tâches"
+        help="Lister les tâches"
+    )
+    tasks_parser.add_argument(
+        "--limit",
+        type=int,
+        default=10,
+        help="Nombre maximum de tâches affichées (défaut: 10)"
+    )
+    tasks_parser.add_argument(
+        "--status",
+        choices=["pending", "blocked", "running", "completed", "failed"],
+        help="Filtrer par statut"
+    )
+    tasks_parser.add_argument(
+        "--worker",
+        help="Filtrer par worker assigné (id)"
+    )
+    
+    # Job
+    job_parser = subparsers.add_parser(
+        "job",
+        help="Soumettre un job (tâches avec dépendances) ou suivre sa progression"
+    )
+    job_parser.add_argument(
+        "action",
+        choices=["submit", "status"],
+        help="Action à effectuer"
+    )
+    job_parser.add_argument(
+        "target",
+        help="Fichier JSON du job ('-' pour stdin) pour submit, ID du job pour status"
+    )
+    job_parser.add_argument(
+        "--idempotency-key",
+        help="Clé d'idempotence du job (défaut: aléatoire)"
+    )
+    
+    # Resubmit
+    resubmit_parser = subparsers.add_parser(
+        "resubmit",
+        help="Relancer des tâches échouées (file des lettres mortes)"
+    )
+    resubmit_parser.add_argument(
+        "task_ids",
+        nargs="*",
+        help="IDs des tâches (ex: 12 15-40 7,8); sans ID, toutes les tâches échouées"
+    )
+    resubmit_parser.add_argument(
+        "--queue",
+        help="Seulement les tâches de cette file"
+    )
+    resubmit_parser.add_argument(
+        "--prefix",
+        help="Seulement les tâches dont le nom commence par ce préfixe"
+    )
+    resubmit_parser.add_argument(
+        "--max-retries",
+        type=int,
+        help="Nouveau nombre de réessais automatiques"
+    )
+    
+    # Export
+    export_parser = subparsers.add_parser(
+        "export",
+        help="Exporter les tâches et leurs résultats en NDJSON"
+    )
+    export_parser.add_argument(
+        "output",
+        help="Fichier de sortie ('-' pour stdout)"
+    )
+    export_parser.add_argument(
+        "--status",
+        choices=["pending", "running", "completed", "failed"],
+        help="Filtrer par statut"
+    )
+    export_parser.add_argument(
+        "--since",
+        help="Tâches créées à partir de cette date (ISO 8601)"
+    )
+    export_parser.add_argument(
+        "--until",
+        help="Tâches créées avant cette date (ISO 8601)"
+    )
+    export_parser.add_argument(
+        "--prefix",
+        help="Préfixe du nom des tâches"
+    )
+    export_parser.add_argument(
+        "--no-output",
+        action="store_true",
+        help="Ne pas inclure stdout/stderr (métadonnées seules)"
     )
     
     # Demo
@@ -451,13 +1123,48 @@ Exemples:
     elif args.command == "stats":
         cli.stats()
     elif args.command == "submit":
-        cli.submit(args.command, args.name, args.type)
+        requirements = {
+            key: value for key, value in (
+                ("cpu_cores", args.cpu),
+                ("memory_mb", args.memory_mb),
+                ("platform", args.platform)
+            ) if value is not None
+        }
+        if args.batch:
+            cli.submit_batch(read_commands(args.task_command), args.name,
+                             args.type, args.chunk_size, args.priority, args.queue,
+                             requirements, args.max_retries, args.cacheable,
+                             args.idempotency_key)
+        elif args.range:
+            cli.submit_batch(expand_template(args.task_command, args.range),
+                             args.name, args.type, args.chunk_size, args.priority, args.queue,
+                             requirements, args.max_retries, args.cacheable,
+                             args.idempotency_key)
+        else:
+            cli.submit(args.task_command, args.name, args.type, args.priority, args.queue,
+                       requirements, args.max_retries, args.cacheable, args.idempotency_key)
     elif args.command == "status":
         cli.status(args.task_id)
+    elif args.command == "tail":
+        cli.tail(args.task_id, args.stream)
+    elif args.command == "wait":
+        sys.exit(cli.wait(parse_task_ids(args.task_ids), args.timeout))
+    elif args.command == "estimate":
+        cli.estimate(args.count, args.type, args.deadline, args.estimated_seconds)
     elif args.command == "workers":
-        cli.workers()
+        cli.workers(args.limit, args.active)
     elif args.command == "tasks":
-        cli.tasks()
+        cli.tasks(args.limit, args.status, args.worker)
+    elif args.command == "job":
+        if args.action == "submit":
+            cli.job_submit(args.target, args.idempotency_key)
+        else:
+            cli.job_status(int(args.target))
+    elif args.command == "resubmit":
+        cli.resubmit(parse_task_ids(args.task_ids), args.queue, args.prefix, args.max_retries)
+    elif args.command == "export":
+        cli.export(args.output, args.status, args.since, args.until, args.prefix,
+                   "" if args.no_output else "output,error")
     elif args.command == "demo":
         cli.demo(args.action)
     else:
@@ -4,15 +4,24 @@ BI-COMPUTE COORDINATOR + DASHBOARD
 Version hackathon - BesmaInfo © 2025
 """
 
-from flask import Flask, request, jsonify, render_template, flash, redirect, url_for
+from flask import Flask, Response, request, jsonify, render_template, flash, redirect, url_for, g
 from datetime import datetime, timedelta
 import sqlite3
 import os
 import sys
 import json
+import time
+import zlib
+import queue
+import base64
+import heapq
+import hashlib
 import logging
+import atexit
+import threading
 import random
 import string
+from concurrent.futures import Future
 from flask_cors import CORS
 
 # ==================== CONFIGURATION ====================
@@ -38,6 +47,101 @@ else:
 # S'assurer que le dossier existe
 os.makedirs(DATA_DIR, exist_ok=True)
 
+# Baux (leases) des tâches réclamées par les workers
+TASK_LEASE_SECONDS = int(os.environ.get("TASK_LEASE_SECONDS", 120))
+MAX_CLAIM_BATCH = int(os.environ.get("MAX_CLAIM_BATCH", 10))
+
+# Statistiques de durée d'exécution par worker et par type de tâche
+RUNTIME_EWMA_ALPHA = float(os.environ.get("RUNTIME_EWMA_ALPHA", 0.2))
+RUNTIME_WINDOW = int(os.environ.get("RUNTIME_WINDOW", 50))
+
+# Appariement vitesse / durée: parmi les SPEED_MATCH_WINDOW premières tâches
+# d'une file, un worker plus rapide que le parc d'au moins SPEED_MATCH_MARGIN
+# prend la plus longue, un worker plus lent la plus courte (les autres
+# suivent l'ordre de la file). Une tâche en attente depuis plus de
+# SPEED_MATCH_MAX_WAIT_SECONDS est servie en premier, quel que soit le worker
+SPEED_MATCH_WINDOW = int(os.environ.get("SPEED_MATCH_WINDOW", 8))
+SPEED_MATCH_MARGIN = float(os.environ.get("SPEED_MATCH_MARGIN", 0.25))
+SPEED_MATCH_MAX_WAIT_SECONDS = float(os.environ.get("SPEED_MATCH_MAX_WAIT_SECONDS", 60))
+
+# Exécution spéculative des tâches « traînardes »: une tâche qui tourne depuis
+# plus de STRAGGLER_FACTOR fois la durée de ses pairs (médiane des tâches
+# terminées de son job dès STRAGGLER_MIN_PEERS, sinon durée attendue) est
+# dupliquée sur un worker rapide inactif; au plus SPECULATION_BUDGET des
+# tâches en cours ont un doublon (0 désactive la spéculation)
+SPECULATION_BUDGET = float(os.environ.get("SPECULATION_BUDGET", 0.1))
+STRAGGLER_FACTOR = float(os.environ.get("STRAGGLER_FACTOR", 2.0))
+STRAGGLER_MIN_SECONDS = float(os.environ.get("STRAGGLER_MIN_SECONDS", 10))
+SPECULATION_MIN_SPEED = float(os.environ.get("SPECULATION_MIN_SPEED", 1.0))
+STRAGGLER_MIN_PEERS = int(os.environ.get("STRAGGLER_MIN_PEERS", 3))
+
+# Réessais automatiques des tâches échouées: attente exponentielle (base
+# RETRY_BACKOFF_SECONDS, plafond RETRY_BACKOFF_MAX_SECONDS, avec gigue),
+# puis le worker qui a échoué laisse la tâche aux autres pendant
+# RETRY_OTHER_WORKER_SECONDS. Une tâche à court de réessais reste 'failed'
+# (file des lettres mortes, relançable via /api/tasks/resubmit)
+DEFAULT_MAX_RETRIES = int(os.environ.get("DEFAULT_MAX_RETRIES", 2))
+RETRY_BACKOFF_SECONDS = float(os.environ.get("RETRY_BACKOFF_SECONDS", 5))
+RETRY_BACKOFF_MAX_SECONDS = float(os.environ.get("RETRY_BACKOFF_MAX_SECONDS", 600))
+RETRY_OTHER_WORKER_SECONDS = float(os.environ.get("RETRY_OTHER_WORKER_SECONDS", 60))
+
+# Cache des résultats des tâches "cacheable" (clé: sha256 de {type, command,
+# env} normalisés): durée de vie et nombre maximal d'entrées (LRU)
+RESULT_CACHE_TTL_SECONDS = float(os.environ.get("RESULT_CACHE_TTL_SECONDS", 86400))
+RESULT_CACHE_MAX_ENTRIES = int(os.environ.get("RESULT_CACHE_MAX_ENTRIES", 10000))
+
+# Durée maximale d'attente d'un long-poll sur /api/tasks/claim (secondes)
+MAX_LONG_POLL_SECONDS = float(os.environ.get("MAX_LONG_POLL_SECONDS", 30))
+
+# Sortie des tâches diffusée par morceaux (/api/tasks/<id>/output)
+MAX_TASK_OUTPUT_CHARS = int(os.environ.get("MAX_TASK_OUTPUT_CHARS", 1000000))
+MAX_OUTPUT_RESPONSE_CHARS = int(os.environ.get("MAX_OUTPUT_RESPONSE_CHARS", 65536))
+
+# Magasin de résultats: compression zlib au-delà de cette taille (octets)
+BLOB_COMPRESS_MIN_BYTES = int(os.environ.get("BLOB_COMPRESS_MIN_BYTES", 256))
+
+# File d'attente des tâches soumises sans champ "queue"
+DEFAULT_QUEUE = os.environ.get("DEFAULT_QUEUE", "default")
+
+# Nombre maximal de tâches suivies par une requête de statut
+MAX_STATUS_IDS = int(os.environ.get("MAX_STATUS_IDS", 10000))
+
+# Pagination des listes (/api/tasks/all, /api/workers)
+DEFAULT_PAGE_SIZE = int(os.environ.get("DEFAULT_PAGE_SIZE", 100))
+MAX_PAGE_SIZE = int(os.environ.get("MAX_PAGE_SIZE", 1000))
+
+# Export NDJSON: taille des blocs envoyés au client (octets)
+EXPORT_CHUNK_BYTES = int(os.environ.get("EXPORT_CHUNK_BYTES", 65536))
+
+# Taille maximale d'un lot de soumission (/api/tasks/batch)
+MAX_TASK_BATCH = int(os.environ.get("MAX_TASK_BATCH", 50000))
+
+# Réglages SQLite (pool de connexions + WAL)
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 8))  # 0 = pas de pool
+DB_JOURNAL_MODE = os.environ.get("DB_JOURNAL_MODE", "WAL")
+DB_SYNCHRONOUS = os.environ.get("DB_SYNCHRONOUS", "NORMAL")
+DB_CACHE_SIZE_KB = int(os.environ.get("DB_CACHE_SIZE_KB", 8192))
+DB_BUSY_TIMEOUT_MS = int(os.environ.get("DB_BUSY_TIMEOUT_MS", 5000))
+
+# Liveness des workers (table en mémoire): un worker qui envoie des
+# heartbeats est déclaré mort après HEARTBEAT_TIMEOUT_SECONDS de silence et
+# ses tâches sont remises en attente; les autres (anciens clients) sont
+# actifs pendant ACTIVE_WINDOW_SECONDS après leur dernière requête
+HEARTBEAT_INTERVAL_SECONDS = float(os.environ.get("HEARTBEAT_INTERVAL_SECONDS", 10))
+HEARTBEAT_TIMEOUT_SECONDS = float(os.environ.get("HEARTBEAT_TIMEOUT_SECONDS", 30))
+ACTIVE_WINDOW_SECONDS = float(os.environ.get("ACTIVE_WINDOW_SECONDS", 120))
+REAPER_INTERVAL_SECONDS = float(os.environ.get("REAPER_INTERVAL_SECONDS", 5))
+
+# Moteur de dispatch: "sqlite" (chaque claim est une transaction en base) ou
+# "memory" (files en mémoire, claims écrits en différé par lots, résultats
+# validés par commit groupé). Le mode mémoire suppose un seul processus.
+DISPATCH_ENGINE = os.environ.get("DISPATCH_ENGINE", "sqlite").lower()
+if DISPATCH_ENGINE not in ("sqlite", "memory"):
+    raise ValueError(f"DISPATCH_ENGINE invalide: {DISPATCH_ENGINE} (sqlite ou memory)")
+ENGINE_FLUSH_INTERVAL_SECONDS = float(os.environ.get("ENGINE_FLUSH_INTERVAL_SECONDS", 0.05))
+ENGINE_LEASE_CHECK_SECONDS = float(os.environ.get("ENGINE_LEASE_CHECK_SECONDS", 1))
+ENGINE_SCAN_LIMIT = int(os.environ.get("ENGINE_SCAN_LIMIT", 1000))
+
 # Configuration du logging
 logging.basicConfig(
     level=logging.INFO,
@@ -54,9 +158,12 @@ logger = logging.getLogger(__name__)
 def init_db():
     """Initialiser la base de données avec les tables"""
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = sqlite3.connect(DB_FILE, timeout=DB_BUSY_TIMEOUT_MS / 1000)
         c = conn.cursor()
         
+        # Le mode de journal est persistant: il suffit de le fixer une fois
+        c.execute(f"PRAGMA journal_mode={DB_JOURNAL_MODE}")
+        
         # Table workers
         c.execute('''
             CREATE TABLE IF NOT EXISTS workers (
@@ -82,9 +189,29 @@ def init_db():
                 status TEXT DEFAULT 'pending',
                 created_at TEXT DEFAULT CURRENT_TIMESTAMP,
                 completed_at TEXT,
-                result_output TEXT,
-                result_error TEXT,
-                assigned_worker TEXT
+                output_blob TEXT,
+                error_blob TEXT,
+                assigned_worker TEXT,
+                lease_expires_at TEXT,
+                priority INTEGER NOT NULL DEFAULT 0,
+                queue TEXT NOT NULL DEFAULT 'default',
+                req_cpu_cores INTEGER NOT NULL DEFAULT 1,
+                req_memory_mb INTEGER NOT NULL DEFAULT 0,
+                req_platform TEXT,
+                estimated_seconds REAL,
+                execution_time REAL,
+                started_at TEXT,
+                speculative_worker TEXT,
+                speculated_at TEXT,
+                max_retries INTEGER NOT NULL DEFAULT 0,
+                retry_backoff REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                retry_after TEXT,
+                last_worker TEXT,
+                job_id INTEGER,
+                unmet_deps INTEGER NOT NULL DEFAULT 0,
+                cache_key TEXT,
+                idempotency_key TEXT
             )
         ''')
         
@@ -100,6 +227,10 @@ def init_db():
             )
         ''')
         
+        # Migrations de schéma (colonnes, index)
+        migrate_db(c)
+        install_engine_triggers(c, DISPATCH_ENGINE == "memory")
+        
         conn.commit()
         conn.close()
         
@@ -112,8 +243,602 @@ def init_db():
         logger.error(f"❌ Erreur initialisation DB: {e}")
         raise
 
-def add_demo_data():
-    """Ajouter des données de démonstration"""
+def ensure_column(c, table, column, definition):
+    """Ajouter une colonne si elle n'existe pas encore (migration légère)"""
+    c.execute(f"PRAGMA table_info({table})")
+    if column not in [row[1] for row in c.fetchall()]:
+        c.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        logger.info(f"🔧 Migration: colonne {table}.{column} ajoutée")
+
+# Migrations de schéma, appliquées dans l'ordre et suivies via PRAGMA user_version.
+# Chaque étape est une liste de requêtes SQL ou de fonctions prenant un curseur.
+# Ne jamais modifier une étape publiée: ajouter une nouvelle étape à la fin.
+SCHEMA_MIGRATIONS = [
+    # v1: bail des tâches réclamées
+    [
+        lambda c: ensure_column(c, "tasks", "lease_expires_at", "TEXT"),
+    ],
+    # v2: index des chemins d'accès chauds
+    [
+        # Dispatch: WHERE status = 'pending' ORDER BY created_at
+        """CREATE INDEX IF NOT EXISTS idx_tasks_pending
+           ON tasks(created_at) WHERE status = 'pending'""",
+        # Récupération des baux expirés
+        """CREATE INDEX IF NOT EXISTS idx_tasks_running_lease
+           ON tasks(lease_expires_at) WHERE status = 'running'""",
+        # Comptages par statut
+        "CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status)",
+        # Dashboard et listes: ORDER BY created_at DESC LIMIT n
+        "CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks(created_at)",
+        # Workers actifs (index couvrant pour les statistiques)
+        """CREATE INDEX IF NOT EXISTS idx_workers_active_last_seen
+           ON workers(last_seen, cpu_cores, memory_mb) WHERE is_active = 1""",
+        # Enregistrement: WHERE name = ? AND is_active = 1
+        """CREATE INDEX IF NOT EXISTS idx_workers_active_name
+           ON workers(name) WHERE is_active = 1""",
+        # Liste des workers: ORDER BY last_seen DESC
+        "CREATE INDEX IF NOT EXISTS idx_workers_last_seen ON workers(last_seen)",
+    ],
+    # v3: compteurs de tâches par statut, maintenus par triggers dans la
+    # même transaction que l'insertion / le changement de statut
+    [
+        """CREATE TABLE IF NOT EXISTS task_counters (
+               status TEXT PRIMARY KEY,
+               count INTEGER NOT NULL DEFAULT 0
+           )""",
+        """CREATE TRIGGER IF NOT EXISTS trg_task_counters_insert
+           AFTER INSERT ON tasks
+           BEGIN
+               INSERT INTO task_counters (status, count) VALUES (NEW.status, 1)
+               ON CONFLICT(status) DO UPDATE SET count = count + 1;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_task_counters_update
+           AFTER UPDATE OF status ON tasks
+           WHEN OLD.status IS NOT NEW.status
+           BEGIN
+               UPDATE task_counters SET count = count - 1 WHERE status = OLD.status;
+               INSERT INTO task_counters (status, count) VALUES (NEW.status, 1)
+               ON CONFLICT(status) DO UPDATE SET count = count + 1;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_task_counters_delete
+           AFTER DELETE ON tasks
+           BEGIN
+               UPDATE task_counters SET count = count - 1 WHERE status = OLD.status;
+           END""",
+        "DELETE FROM task_counters",
+        """INSERT INTO task_counters (status, count)
+           SELECT status, COUNT(*) FROM tasks GROUP BY status""",
+    ],
+    # v4: sortie diffusée des tâches en cours, par morceaux positionnés
+    [
+        """CREATE TABLE IF NOT EXISTS task_output (
+               task_id INTEGER NOT NULL,
+               stream TEXT NOT NULL,
+               position INTEGER NOT NULL,
+               data TEXT NOT NULL,
+               PRIMARY KEY (task_id, stream, position)
+           ) WITHOUT ROWID""",
+    ],
+    # v5: résultats sortis de la table tasks vers un magasin compressé,
+    # adressé par contenu (les tâches ne gardent que le hash)
+    [
+        """CREATE TABLE IF NOT EXISTS result_blobs (
+               hash TEXT PRIMARY KEY,
+               encoding TEXT NOT NULL,
+               size INTEGER NOT NULL,
+               data BLOB NOT NULL
+           )""",
+        lambda c: ensure_column(c, "tasks", "output_blob", "TEXT"),
+        lambda c: ensure_column(c, "tasks", "error_blob", "TEXT"),
+        lambda c: migrate_results_to_blobs(c),
+    ],
+    # v6: listes paginées filtrées par statut ou par worker
+    [
+        """CREATE INDEX IF NOT EXISTS idx_tasks_status_created
+           ON tasks(status, created_at)""",
+        """CREATE INDEX IF NOT EXISTS idx_tasks_worker_created
+           ON tasks(assigned_worker, created_at)""",
+        # Couverts par idx_tasks_status_created (même ordre, mêmes filtres)
+        "DROP INDEX IF EXISTS idx_tasks_status",
+        "DROP INDEX IF EXISTS idx_tasks_pending",
+    ],
+    # v7: priorités et files d'attente (partage équitable pondéré)
+    [
+        lambda c: ensure_column(c, "tasks", "priority", "INTEGER NOT NULL DEFAULT 0"),
+        lambda c: ensure_column(c, "tasks", "queue", "TEXT NOT NULL DEFAULT 'default'"),
+        # Prochaine tâche d'une file: priorité décroissante puis FIFO
+        """CREATE INDEX IF NOT EXISTS idx_tasks_queue_dispatch
+           ON tasks(queue, priority DESC, created_at, id) WHERE status = 'pending'""",
+        # service = tâches servies / poids: la file active la moins servie passe
+        """CREATE TABLE IF NOT EXISTS queues (
+               name TEXT PRIMARY KEY,
+               weight REAL NOT NULL DEFAULT 1,
+               pending INTEGER NOT NULL DEFAULT 0,
+               service REAL NOT NULL DEFAULT 0
+           )""",
+        """CREATE INDEX IF NOT EXISTS idx_queues_active
+           ON queues(service) WHERE pending > 0""",
+        # Une file qui (re)devient active repart du service minimal des files
+        # actives: pas de crédit accumulé pendant son inactivité
+        """CREATE TRIGGER IF NOT EXISTS trg_queues_insert
+           AFTER INSERT ON tasks WHEN NEW.status = 'pending'
+           BEGIN
+               INSERT INTO queues (name, pending, service)
+               VALUES (NEW.queue, 1, COALESCE((SELECT MIN(service) FROM queues WHERE pending > 0), 0))
+               ON CONFLICT(name) DO UPDATE SET
+                   service = CASE WHEN pending > 0 THEN service ELSE MAX(service, excluded.service) END,
+                   pending = pending + 1;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_queues_update
+           AFTER UPDATE OF status, queue ON tasks
+           WHEN (OLD.status = 'pending') IS NOT (NEW.status = 'pending') OR OLD.queue IS NOT NEW.queue
+           BEGIN
+               UPDATE queues SET pending = pending - 1
+               WHERE name = OLD.queue AND OLD.status = 'pending';
+               INSERT INTO queues (name, pending, service)
+               SELECT NEW.queue, 1, COALESCE((SELECT MIN(service) FROM queues WHERE pending > 0), 0)
+               WHERE NEW.status = 'pending'
+               ON CONFLICT(name) DO UPDATE SET
+                   service = CASE WHEN pending > 0 THEN service ELSE MAX(service, excluded.service) END,
+                   pending = pending + 1;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_queues_delete
+           AFTER DELETE ON tasks WHEN OLD.status = 'pending'
+           BEGIN
+               UPDATE queues SET pending = pending - 1 WHERE name = OLD.queue;
+           END""",
+        """INSERT INTO queues (name, pending)
+           SELECT queue, COUNT(*) FROM tasks WHERE status = 'pending' GROUP BY queue
+           ON CONFLICT(name) DO UPDATE SET pending = excluded.pending""",
+    ],
+    # v8: besoins en ressources des tâches (cœurs, mémoire, plateforme)
+    [
+        lambda c: ensure_column(c, "tasks", "req_cpu_cores", "INTEGER NOT NULL DEFAULT 1"),
+        lambda c: ensure_column(c, "tasks", "req_memory_mb", "INTEGER NOT NULL DEFAULT 0"),
+        lambda c: ensure_column(c, "tasks", "req_platform", "TEXT"),
+        # Les besoins font partie de l'index: les tâches trop lourdes pour le
+        # worker sont écartées sans lire la table
+        "DROP INDEX IF EXISTS idx_tasks_queue_dispatch",
+        """CREATE INDEX IF NOT EXISTS idx_tasks_queue_dispatch
+           ON tasks(queue, priority DESC, created_at, id,
+                    req_cpu_cores, req_memory_mb, req_platform)
+           WHERE status = 'pending'""",
+    ],
+    # v9: historique des durées d'exécution (par worker et par type; le
+    # worker 0 représente l'ensemble du parc) et durée estimée des tâches
+    [
+        lambda c: ensure_column(c, "tasks", "estimated_seconds", "REAL"),
+        lambda c: ensure_column(c, "tasks", "execution_time", "REAL"),
+        """CREATE TABLE IF NOT EXISTS worker_runtime_stats (
+               worker_id INTEGER NOT NULL,
+               task_type TEXT NOT NULL,
+               samples INTEGER NOT NULL DEFAULT 0,
+               ewma REAL NOT NULL,
+               p95 REAL NOT NULL,
+               recent TEXT NOT NULL DEFAULT '[]',
+               PRIMARY KEY (worker_id, task_type)
+           ) WITHOUT ROWID""",
+        "DROP INDEX IF EXISTS idx_tasks_queue_dispatch",
+        """CREATE INDEX IF NOT EXISTS idx_tasks_queue_dispatch
+           ON tasks(queue, priority DESC, created_at, id,
+                    req_cpu_cores, req_memory_mb, req_platform, estimated_seconds)
+           WHERE status = 'pending'""",
+    ],
+    # v10: exécution spéculative (début d'exécution, worker du doublon)
+    [
+        lambda c: ensure_column(c, "tasks", "started_at", "TEXT"),
+        lambda c: ensure_column(c, "tasks", "speculative_worker", "TEXT"),
+        lambda c: ensure_column(c, "tasks", "speculated_at", "TEXT"),
+        # Recherche des traînardes: tâches en cours les plus anciennes
+        """CREATE INDEX IF NOT EXISTS idx_tasks_running_started
+           ON tasks(started_at) WHERE status = 'running'""",
+    ],
+    # v11: réessais (nombre maximal, attente, worker du dernier échec)
+    [
+        lambda c: ensure_column(c, "tasks", "max_retries", "INTEGER NOT NULL DEFAULT 0"),
+        lambda c: ensure_column(c, "tasks", "retry_backoff", "REAL"),
+        lambda c: ensure_column(c, "tasks", "attempts", "INTEGER NOT NULL DEFAULT 0"),
+        lambda c: ensure_column(c, "tasks", "retry_after", "TEXT"),
+        lambda c: ensure_column(c, "tasks", "last_worker", "TEXT"),
+        "DROP INDEX IF EXISTS idx_tasks_queue_dispatch",
+        """CREATE INDEX IF NOT EXISTS idx_tasks_queue_dispatch
+           ON tasks(queue, priority DESC, created_at, id,
+                    req_cpu_cores, req_memory_mb, req_platform, estimated_seconds,
+                    retry_after, last_worker)
+           WHERE status = 'pending'""",
+    ],
+    # v12: jobs et dépendances entre tâches. Une tâche dont des parents ne
+    # sont pas terminés attend en statut 'blocked' (unmet_deps > 0); la
+    # complétion d'un parent décrémente ses enfants et libère ceux qui
+    # n'attendent plus rien. Les compteurs des jobs suivent les statuts,
+    # le tout par triggers dans la transaction du changement de statut
+    [
+        lambda c: ensure_column(c, "tasks", "job_id", "INTEGER"),
+        lambda c: ensure_column(c, "tasks", "unmet_deps", "INTEGER NOT NULL DEFAULT 0"),
+        """CREATE TABLE IF NOT EXISTS jobs (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               name TEXT NOT NULL,
+               created_at TEXT NOT NULL,
+               total INTEGER NOT NULL DEFAULT 0,
+               blocked INTEGER NOT NULL DEFAULT 0,
+               pending INTEGER NOT NULL DEFAULT 0,
+               running INTEGER NOT NULL DEFAULT 0,
+               completed INTEGER NOT NULL DEFAULT 0,
+               failed INTEGER NOT NULL DEFAULT 0
+           )""",
+        "CREATE INDEX IF NOT EXISTS idx_jobs_created_at ON jobs(created_at)",
+        # Enfants d'une tâche: WHERE depends_on = ?
+        """CREATE TABLE IF NOT EXISTS task_dependencies (
+               depends_on INTEGER NOT NULL,
+               task_id INTEGER NOT NULL,
+               PRIMARY KEY (depends_on, task_id)
+           ) WITHOUT ROWID""",
+        """CREATE INDEX IF NOT EXISTS idx_tasks_job_created
+           ON tasks(job_id, created_at) WHERE job_id IS NOT NULL""",
+        """CREATE TRIGGER IF NOT EXISTS trg_tasks_release_children
+           AFTER UPDATE OF status ON tasks
+           WHEN NEW.status = 'completed' AND OLD.status IS NOT 'completed'
+           BEGIN
+               UPDATE tasks SET
+                   unmet_deps = unmet_deps - 1,
+                   status = CASE WHEN unmet_deps = 1 AND status = 'blocked'
+                                 THEN 'pending' ELSE status END
+               WHERE id IN (SELECT task_id FROM task_dependencies WHERE depends_on = NEW.id);
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_jobs_insert
+           AFTER INSERT ON tasks WHEN NEW.job_id IS NOT NULL
+           BEGIN
+               UPDATE jobs SET
+               total = total + 1,
+               blocked = blocked + (NEW.status = 'blocked'),
+               pending = pending + (NEW.status = 'pending'),
+               running = running + (NEW.status = 'running'),
+               completed = completed + (NEW.status = 'completed'),
+               failed = failed + (NEW.status = 'failed')
+               WHERE id = NEW.job_id;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_jobs_update
+           AFTER UPDATE OF status ON tasks
+           WHEN NEW.job_id IS NOT NULL AND OLD.status IS NOT NEW.status
+           BEGIN
+               UPDATE jobs SET
+               total = total - 1,
+               blocked = blocked - (OLD.status = 'blocked'),
+               pending = pending - (OLD.status = 'pending'),
+               running = running - (OLD.status = 'running'),
+               completed = completed - (OLD.status = 'completed'),
+               failed = failed - (OLD.status = 'failed')
+               WHERE id = OLD.job_id;
+               UPDATE jobs SET
+               total = total + 1,
+               blocked = blocked + (NEW.status = 'blocked'),
+               pending = pending + (NEW.status = 'pending'),
+               running = running + (NEW.status = 'running'),
+               completed = completed + (NEW.status = 'completed'),
+               failed = failed + (NEW.status = 'failed')
+               WHERE id = NEW.job_id;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_jobs_delete
+           AFTER DELETE ON tasks WHEN OLD.job_id IS NOT NULL
+           BEGIN
+               UPDATE jobs SET
+               total = total - 1,
+               blocked = blocked - (OLD.status = 'blocked'),
+               pending = pending - (OLD.status = 'pending'),
+               running = running - (OLD.status = 'running'),
+               completed = completed - (OLD.status = 'completed'),
+               failed = failed - (OLD.status = 'failed')
+               WHERE id = OLD.job_id;
+           END""",
+    ],
+    # v13: mémoïsation des résultats des tâches déterministes. Le cache
+    # référence les blobs du magasin de résultats (adressé par contenu)
+    [
+        lambda c: ensure_column(c, "tasks", "cache_key", "TEXT"),
+        """CREATE TABLE IF NOT EXISTS result_cache (
+               key TEXT PRIMARY KEY,
+               output_blob TEXT,
+               error_blob TEXT,
+               execution_time REAL,
+               created_at TEXT NOT NULL,
+               last_used_at TEXT NOT NULL
+           ) WITHOUT ROWID""",
+        # Éviction LRU et expiration
+        "CREATE INDEX IF NOT EXISTS idx_result_cache_last_used ON result_cache(last_used_at)",
+        "CREATE INDEX IF NOT EXISTS idx_result_cache_created ON result_cache(created_at)",
+        # Tâche identique déjà en cours (regroupement des doublons)
+        """CREATE INDEX IF NOT EXISTS idx_tasks_cache_key
+           ON tasks(cache_key, id)
+           WHERE cache_key IS NOT NULL AND status IN ('pending', 'running')""",
+    ],
+    # v14: clés d'idempotence des soumissions (tâches et jobs): un envoi
+    # rejoué par le client renvoie l'original au lieu d'un doublon
+    [
+        lambda c: ensure_column(c, "tasks", "idempotency_key", "TEXT"),
+        lambda c: ensure_column(c, "jobs", "idempotency_key", "TEXT"),
+        """CREATE UNIQUE INDEX IF NOT EXISTS idx_tasks_idempotency_key
+           ON tasks(idempotency_key) WHERE idempotency_key IS NOT NULL""",
+        """CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_idempotency_key
+           ON jobs(idempotency_key) WHERE idempotency_key IS NOT NULL""",
+    ],
+    # v15: boîte de réception du moteur de dispatch en mémoire: transitions
+    # de statut relevées par des triggers (voir install_engine_triggers)
+    [
+        """CREATE TABLE IF NOT EXISTS dispatch_inbox (
+               seq INTEGER PRIMARY KEY AUTOINCREMENT,
+               task_id INTEGER NOT NULL
+           )""",
+    ],
+    # v16: durée relative (mesurée / attendue) des tâches de chaque worker,
+    # base de sa vitesse; estimated_seconds ne reçoit plus l'EWMA du parc
+    [
+        lambda c: ensure_column(c, "worker_runtime_stats", "relative", "REAL"),
+    ],
+    # v17: durées des tâches terminées d'un job, triées (médiane des pairs
+    # pour la détection des traînardes)
+    [
+        """CREATE INDEX IF NOT EXISTS idx_tasks_job_runtime
+           ON tasks(job_id, execution_time)
+           WHERE status = 'completed' AND job_id IS NOT NULL AND execution_time IS NOT NULL""",
+    ],
+]
+
+def store_blob(c, text):
+    """Ranger un texte dans le magasin de résultats; renvoie son hash (ou None)
+    
+    Les blobs sont adressés par contenu (sha256): deux sorties identiques
+    ne sont stockées qu'une fois. Au-delà de BLOB_COMPRESS_MIN_BYTES, ils
+    sont compressés avec zlib.
+    """
+    if not text:
+        return None
+    
+    raw = text.encode("utf-8")
+    digest = hashlib.sha256(raw).hexdigest()
+    
+    data, encoding = raw, "raw"
+    if len(raw) >= BLOB_COMPRESS_MIN_BYTES:
+        compressed = zlib.compress(raw, 6)
+        if len(compressed) < len(raw):
+            data, encoding = compressed, "zlib"
+    
+    c.execute(
+        "INSERT OR IGNORE INTO result_blobs (hash, encoding, size, data) VALUES (?, ?, ?, ?)",
+        (digest, encoding, len(raw), data)
+    )
+    return digest
+
+def load_blob(c, digest):
+    """Relire un texte du magasin de résultats ('' si absent)"""
+    if not digest:
+        return ""
+    
+    c.execute("SELECT encoding, data FROM result_blobs WHERE hash = ?", (digest,))
+    row = c.fetchone()
+    if row is None:
+        return ""
+    
+    data = zlib.decompress(row[1]) if row[0] == "zlib" else row[1]
+    return bytes(data).decode("utf-8", errors="replace")
+
+def migrate_results_to_blobs(c):
+    """Déplacer les anciennes colonnes result_output/result_error vers result_blobs"""
+    c.execute("PRAGMA table_info(tasks)")
+    if "result_output" not in [row[1] for row in c.fetchall()]:
+        return
+    
+    last_id = 0
+    while True:
+        c.execute(
+            """SELECT id, result_output, result_error FROM tasks
+               WHERE id > ? AND (result_output IS NOT NULL OR result_error IS NOT NULL)
+               ORDER BY id LIMIT 500""",
+            (last_id,)
+        )
+        rows = c.fetchall()
+        if not rows:
+            break
+        for task_id, output, error in rows:
+            c.execute(
+                """UPDATE tasks SET output_blob = ?, error_blob = ?,
+                   result_output = NULL, result_error = NULL WHERE id = ?""",
+                (store_blob(c, output), store_blob(c, error), task_id)
+            )
+            last_id = task_id
+
+def migrate_db(c):
+    """Appliquer les migrations de schéma manquantes"""
+    c.execute("PRAGMA user_version")
+    version = c.fetchone()[0]
+    
+    # Chaque étape est appliquée dans sa propre transaction (avec user_version)
+    for target, steps in enumerate(SCHEMA_MIGRATIONS[version:], start=version + 1):
+        c.execute("BEGIN")
+        try:
+            for step in steps:
+                if callable(step):
+                    step(c)
+                else:
+                    c.execute(step)
+            c.execute(f"PRAGMA user_version = {target}")
+            c.connection.commit()
+        except Exception:
+            c.connection.rollback()
+            raise
+        logger.info(f"🔧 Migration de schéma v{target} appliquée")
+    
+    c.execute("PRAGMA optimize")
+
+# Triggers du moteur en mémoire: toute tâche qui entre en attente ou quitte
+# l'attente ou l'exécution (création, dépendances, réessai, bail expiré,
+# suppression...) est signalée dans dispatch_inbox, quel que soit le code
+# qui l'a modifiée. Le passage à 'running' vient du moteur lui-même.
+ENGINE_TRIGGERS = {
+    "trg_inbox_insert": """
+        CREATE TRIGGER IF NOT EXISTS trg_inbox_insert AFTER INSERT ON tasks
+        WHEN NEW.status = 'pending'
+        BEGIN
+            INSERT INTO dispatch_inbox (task_id) VALUES (NEW.id);
+        END""",
+    "trg_inbox_update": """
+        CREATE TRIGGER IF NOT EXISTS trg_inbox_update AFTER UPDATE OF status ON tasks
+        WHEN NEW.status IS NOT OLD.status AND NEW.status <> 'running'
+             AND (NEW.status = 'pending' OR OLD.status IN ('pending', 'running'))
+        BEGIN
+            INSERT INTO dispatch_inbox (task_id) VALUES (NEW.id);
+        END""",
+    "trg_inbox_delete": """
+        CREATE TRIGGER IF NOT EXISTS trg_inbox_delete AFTER DELETE ON tasks
+        WHEN OLD.status IN ('pending', 'running')
+        BEGIN
+            INSERT INTO dispatch_inbox (task_id) VALUES (OLD.id);
+        END""",
+}
+
+def install_engine_triggers(c, enabled):
+    """Créer (mode mémoire) ou supprimer (mode sqlite) les triggers du moteur
+    
+    Le mode est une option de démarrage, pas une migration: sans moteur en
+    mémoire, la boîte de réception n'est ni alimentée ni lue.
+    """
+    for name, sql in ENGINE_TRIGGERS.items():
+        c.execute(sql if enabled else f"DROP TRIGGER IF EXISTS {name}")
+    if not enabled:
+        c.execute("DELETE FROM dispatch_inbox")
+
+# Colonnes lues pour remettre une tâche à un worker
+DISPATCH_COLUMNS = """id, name, type, command, created_at, priority, queue,
+    req_cpu_cores, req_memory_mb, req_platform, estimated_seconds"""
+
+# Prochaines tâches d'une file, après la position (priority, created_at, id)
+# donnée, qui tiennent dans la capacité restante du worker (la première, et
+# les suivantes pour l'appariement vitesse / durée). Une tâche en réessai
+# attend retry_after, puis évite le worker de son dernier échec jusqu'à
+# retry_after + RETRY_OTHER_WORKER_SECONDS
+NEXT_FITTING_TASK_SQL = f"""
+    SELECT {DISPATCH_COLUMNS} FROM tasks
+    WHERE status = 'pending' AND queue = ?
+      AND (priority < ? OR (priority = ? AND (created_at, id) > (?, ?)))
+      AND req_cpu_cores <= ? AND req_memory_mb <= ?
+      AND (req_platform IS NULL OR ? IS NULL OR instr(?, req_platform) > 0)
+      AND (retry_after IS NULL
+           OR (retry_after <= ? AND (last_worker IS NOT ? OR retry_after <= ?)))
+    ORDER BY priority DESC, created_at, id
+    LIMIT ?
+"""
+
+# Position de départ d'une file (avant sa première tâche)
+QUEUE_START = (2 ** 62, "", 0)
+
+# Tâches en cours sans doublon, les plus anciennes d'abord, exécutables par
+# le worker candidat à la spéculation
+STRAGGLER_CANDIDATES_SQL = f"""
+    SELECT {DISPATCH_COLUMNS}, started_at, assigned_worker, job_id FROM tasks
+    WHERE status = 'running' AND started_at IS NOT NULL
+      AND speculative_worker IS NULL AND assigned_worker IS NOT ?
+      AND req_cpu_cores <= ? AND req_memory_mb <= ?
+      AND (req_platform IS NULL OR ? IS NULL OR instr(?, req_platform) > 0)
+    ORDER BY started_at
+    LIMIT 100
+"""
+
+# Durées des tâches terminées d'un job: nombre, puis médiane (OFFSET n / 2)
+JOB_PEER_COUNT_SQL = """
+    SELECT COUNT(*) FROM tasks
+    WHERE job_id = ? AND status = 'completed' AND execution_time IS NOT NULL
+"""
+JOB_PEER_MEDIAN_SQL = """
+    SELECT execution_time FROM tasks
+    WHERE job_id = ? AND status = 'completed' AND execution_time IS NOT NULL
+    ORDER BY execution_time
+    LIMIT 1 OFFSET ?
+"""
+
+# Requêtes chaudes et l'index que chacune doit utiliser: leur plan d'exécution
+# ne doit jamais redevenir un SCAN complet (vérifié par scripts/check_query_plans.py)
+HOT_QUERIES = {
+    "active_queues": (
+        """SELECT name, weight, pending, service FROM queues
+           WHERE pending > 0 ORDER BY service""",
+        (), "idx_queues_active"
+    ),
+    "dispatch_pending": (
+        NEXT_FITTING_TASK_SQL,
+        ("default", 2 ** 62, 2 ** 62, "", 0, 4, 2048, "linux-x86_64", "linux-x86_64",
+         "", "1", "", SPEED_MATCH_WINDOW),
+        "idx_tasks_queue_dispatch"
+    ),
+    "straggler_candidates": (
+        STRAGGLER_CANDIDATES_SQL,
+        ("1", 4, 2048, "linux-x86_64", "linux-x86_64"), "idx_tasks_running_started"
+    ),
+    "job_peer_count": (JOB_PEER_COUNT_SQL, (1,), "idx_tasks_job_runtime"),
+    "job_peer_median": (JOB_PEER_MEDIAN_SQL, (1, 0), "idx_tasks_job_runtime"),
+    "cache_leader": (
+        """SELECT id FROM tasks
+           WHERE cache_key = ? AND status IN ('pending', 'running') AND id < ?
+           ORDER BY id LIMIT 1""",
+        ("", 0), "idx_tasks_cache_key"
+    ),
+    "requeue_expired_leases": (
+        """UPDATE tasks SET status = 'pending', assigned_worker = NULL, lease_expires_at = NULL
+           WHERE status = 'running' AND lease_expires_at < ?""",
+        ("",), "idx_tasks_running_lease"
+    ),
+    "recent_tasks": (
+        """SELECT id, name, status, created_at, assigned_worker FROM tasks
+           ORDER BY created_at DESC LIMIT 10""",
+        (), "idx_tasks_created_at"
+    ),
+    "list_tasks_by_status": (
+        """SELECT id, name, status, created_at FROM tasks
+           WHERE status = ? AND (created_at, id) < (?, ?)
+           ORDER BY created_at DESC, id DESC LIMIT ?""",
+        ("completed", "", 0, 100), "idx_tasks_status_created"
+    ),
+    "list_tasks_by_worker": (
+        """SELECT id, name, status, created_at FROM tasks
+           WHERE assigned_worker = ? AND (created_at, id) < (?, ?)
+           ORDER BY created_at DESC, id DESC LIMIT ?""",
+        ("1", "", 0, 100), "idx_tasks_worker_created"
+    ),
+    "active_workers": (
+        """SELECT COUNT(*), SUM(cpu_cores), SUM(memory_mb) FROM workers
+           WHERE last_seen > ? AND is_active = 1""",
+        ("",), "idx_workers_active_last_seen"
+    ),
+    "recent_workers": (
+        """SELECT name, platform, last_seen, tasks_completed FROM workers
+           WHERE is_active = 1 ORDER BY last_seen DESC LIMIT 10""",
+        (), "idx_workers_active_last_seen"
+    ),
+    "worker_by_name": (
+        "SELECT id FROM workers WHERE name = ? AND is_active = 1",
+        ("",), "idx_workers_active_name"
+    ),
+}
+
+def explain_hot_queries(conn):
+    """Renvoyer les requêtes chaudes dont le plan n'utilise pas l'index attendu"""
+    regressions = {}
+    for name, (sql, params, index) in HOT_QUERIES.items():
+        plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+        uses_index = any(f"INDEX {index}" in detail for detail in plan)
+        full_scan = any(
+            (detail.startswith("SCAN") and "USING" not in detail)
+            or "TEMP B-TREE" in detail
+            for detail in plan
+        )
+        if full_scan or not uses_index:
+            regressions[name] = plan
+    return regressions
+
+def add_demo_data(conn=None):
+    """Ajouter des données de démonstration
+    
+    Si une connexion est fournie, les insertions rejoignent sa transaction
+    (le commit reste à la charge de l'appelant).
+    """
     demo_tasks = [
         {
             "name": "🧮 Calcul de π (Monte Carlo)",
@@ -149,8 +874,10 @@ def add_demo_data():
         }
     ]
     
+    own_connection = conn is None
     try:
-        conn = sqlite3.connect(DB_FILE)
+        if own_connection:
+            conn = sqlite3.connect(DB_FILE, timeout=DB_BUSY_TIMEOUT_MS / 1000)
         c = conn.cursor()
         
         # Vérifier si on a déjà des tâches
@@ -173,10 +900,12 @@ def add_demo_data():
                 ("Hackathon 2024", "Démo BI-Compute pour le hackathon", 0, len(demo_tasks))
             )
             
-            conn.commit()
+            if own_connection:
+                conn.commit()
             logger.info(f"✅ {len(demo_tasks)} tâches de démo ajoutées")
         
-        conn.close()
+        if own_connection:
+            conn.close()
         
     except Exception as e:
         logger.error(f"❌ Erreur ajout données démo: {e}")
@@ -186,382 +915,3299 @@ init_db()
 
 # ==================== FONCTIONS UTILITAIRES ====================
 
+class PooledConnection:
+    """Connexion empruntée au pool: close() la rend au lieu de la fermer
+    
+    Chaque emprunt a son propre objet, de sorte qu'un second close()
+    (route puis teardown) ne touche pas une connexion déjà réempruntée.
+    """
+    
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+    
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise sqlite3.ProgrammingError("Connexion déjà rendue au pool")
+        return getattr(self._conn, name)
+    
+    def close(self):
+        """Rendre la connexion au pool (transaction en cours annulée)"""
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        if conn.in_transaction:
+            conn.rollback()
+        self._pool.release(conn)
+
+class ConnectionPool:
+    """Pool de connexions SQLite persistantes, partagé entre les threads
+    
+    Le serveur Flask (threaded=True) crée un thread par requête: un simple
+    threading.local ne survivrait pas à la requête. Chaque requête emprunte
+    donc une connexion au pool et la rend à la fin (voir teardown_db).
+    """
+    
+    def __init__(self, db_file, size):
+        self.db_file = db_file
+        self.size = size
+        self._idle = queue.LifoQueue()
+    
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.db_file,
+            timeout=DB_BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout = {DB_BUSY_TIMEOUT_MS}")
+        conn.execute(f"PRAGMA synchronous = {DB_SYNCHRONOUS}")
+        conn.execute(f"PRAGMA cache_size = -{DB_CACHE_SIZE_KB}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
+    
+    def acquire(self):
+        """Emprunter une connexion (nouvelle si le pool est vide)"""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        return PooledConnection(self, conn)
+    
+    def release(self, conn):
+        """Rendre une connexion; au-delà de la taille du pool, la fermer"""
+        if self._idle.qsize() < self.size:
+            self._idle.put(conn)
+        else:
+            conn.close()
+    
+    def close_all(self):
+        """Fermer toutes les connexions inactives"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+db_pool = ConnectionPool(DB_FILE, DB_POOL_SIZE)
+
 def get_db_connection():
-    """Obtenir une connexion à la base de données"""
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row
+    """Obtenir une connexion à la base de données (empruntée au pool)"""
+    conn = db_pool.acquire()
+    
+    # Suivre la connexion pour la rendre même si la route oublie close()
+    try:
+        g.setdefault("db_connections", []).append(conn)
+    except RuntimeError:
+        pass  # Hors contexte Flask
+    
     return conn
 
-def get_worker_stats():
-    """Obtenir les statistiques des workers"""
-    conn = get_db_connection()
-    c = conn.cursor()
+@app.teardown_appcontext
+def teardown_db(exception):
+    """Rendre au pool les connexions empruntées pendant la requête"""
+    for conn in g.pop("db_connections", []):
+        conn.close()
+
+class TaskSignal:
+    """Signal « nouvelles tâches disponibles » pour le long-polling
     
-    # Workers actifs (dernières 2 minutes)
-    active_timeout = datetime.now() - timedelta(minutes=2)
-    c.execute("""
-        SELECT COUNT(*) as active_workers,
-               SUM(cpu_cores) as total_cpu,
-               SUM(memory_mb) as total_memory
-        FROM workers 
-        WHERE last_seen > ? AND is_active = 1
-    """, (active_timeout.isoformat(),))
-    
-    stats = c.fetchone()
-    conn.close()
+    Un numéro de version évite de perdre un signal émis entre la
+    tentative de claim d'un worker et sa mise en attente. Les écouteurs
+    (serveur asyncio) sont appelés à chaque signal, depuis le thread qui
+    l'émet.
+    """
     
-    return {
-        "active_workers": stats["active_workers"] or 0,
-        "total_cpu": stats["total_cpu"] or 0,
-        "total_memory": stats["total_memory"] or 0
-    }
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._version = 0
+        self._listeners = []
+    
+    def version(self):
+        with self._condition:
+            return self._version
+    
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+    
+    def notify(self):
+        """Réveiller tous les workers en attente"""
+        with self._condition:
+            self._version += 1
+            self._condition.notify_all()
+        for callback in self._listeners:
+            callback()
+    
+    def wait(self, version, timeout):
+        """Attendre un signal postérieur à `version` (au plus `timeout` s)"""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._version != version, timeout)
 
-def get_task_stats():
-    """Obtenir les statistiques des tâches"""
-    conn = get_db_connection()
-    c = conn.cursor()
+task_signal = TaskSignal()
+
+# Signal « nouvelle sortie » pour le suivi en direct des tâches
+output_signal = TaskSignal()
+status_signal = TaskSignal()
+
+class Counters:
+    """Compteurs en mémoire, partagés entre les threads du serveur"""
     
-    c.execute("SELECT COUNT(*) FROM tasks")
-    total_tasks = c.fetchone()[0]
+    def __init__(self, *names):
+        self._lock = threading.Lock()
+        self._values = dict.fromkeys(names, 0)
+    
+    def increment(self, name, amount=1):
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + amount
+    
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
+
+# Exécution spéculative: doublons lancés, gagnés par le doublon, résultats ignorés
+speculation_stats = Counters("launched", "speculative_wins", "ignored_results")
+
+# Mémoïsation: tâches servies par le cache, regroupées avec une tâche
+# identique en cours, envoyées à la flotte; entrées expirées ou évincées
+cache_stats = Counters("hits", "coalesced", "misses", "evictions")
+
+# Champs exposés par les listes (jamais les sorties); projection via ?fields=
+TASK_LIST_FIELDS = (
+    "id", "name", "type", "command", "status", "priority", "queue",
+    "req_cpu_cores", "req_memory_mb", "req_platform", "estimated_seconds",
+    "created_at", "completed_at", "execution_time", "assigned_worker",
+    "lease_expires_at", "max_retries", "attempts", "retry_after", "last_worker",
+    "job_id", "unmet_deps", "output_blob", "error_blob"
+)
+WORKER_LIST_FIELDS = (
+    "id", "name", "cpu_cores", "memory_mb", "platform", "last_seen",
+    "registered_at", "tasks_completed", "is_active"
+)
+
+# estimated_seconds n'est que la durée déclarée par le client (sinon NULL:
+# la durée attendue est alors l'EWMA du parc pour le type, voir expected_seconds)
+# Une tâche avec des dépendances non terminées (?16 > 0) est créée 'blocked';
+# une clé d'idempotence déjà connue n'insère rien (rowcount = 0)
+INSERT_TASK_SQL = """INSERT INTO tasks (name, type, command, priority, queue,
+                         req_cpu_cores, req_memory_mb, req_platform, estimated_seconds,
+                         max_retries, retry_backoff, cache_key, idempotency_key,
+                         created_at, job_id, unmet_deps, status)
+                     VALUES (?1, ?2, ?3, ?4, ?5, ?6, ?7, ?8, ?9, ?10, ?11, ?12, ?13, ?14, ?15, ?16,
+                             CASE WHEN ?16 > 0 THEN 'blocked' ELSE 'pending' END)
+                     ON CONFLICT (idempotency_key) WHERE idempotency_key IS NOT NULL
+                     DO NOTHING"""
+
+NDJSON_MIMETYPES = ("application/x-ndjson", "application/jsonl", "application/json-seq")
+
+def result_cache_key(task_type, command, env=None):
+    """Clé de cache d'une tâche: sha256 de {type, command, env} normalisés
     
-    c.execute("SELECT COUNT(*) FROM tasks WHERE status = 'completed'")
-    completed_tasks = c.fetchone()[0]
+    La commande peut être l'objet JSON {"type", "command", "env"} envoyé
+    aux workers (sous forme de texte); clés triées et espaces de bord
+    retirés, deux soumissions équivalentes donnent la même clé.
+    """
+    spec = command
+    if isinstance(command, str):
+        try:
+            spec = json.loads(command)
+        except ValueError:
+            spec = command
+    if isinstance(spec, dict):
+        task_type = spec.get("type", task_type)
+        env = spec.get("env", env)
+        spec = spec.get("command", "")
+    if isinstance(spec, str):
+        spec = spec.strip()
+    if env is not None and not isinstance(env, dict):
+        raise ValueError("env doit être un objet JSON")
     
-    c.execute("SELECT COUNT(*) FROM tasks WHERE status = 'pending'")
-    pending_tasks = c.fetchone()[0]
+    normalized = json.dumps({"type": task_type, "command": spec, "env": env or {}},
+                            sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+def parse_idempotency_key(key):
+    """Valider une clé d'idempotence fournie par le client (optionnelle)"""
+    if key is None:
+        return None
+    if not isinstance(key, str) or not key or len(key) > 255:
+        raise ValueError("idempotency_key doit être une chaîne de 1 à 255 caractères")
+    return key
+
+def match_batch_ids(c, first_id, keys):
+    """IDs des tâches d'un lot, dans l'ordre du lot, rejouées comprises
     
-    c.execute("SELECT COUNT(*) FROM tasks WHERE status = 'failed'")
-    failed_tasks = c.fetchone()[0]
+    `keys` donne la clé d'idempotence de chaque tâche (ou None). Les
+    nouvelles lignes (id >= first_id, sous le verrou d'écriture) suivent
+    l'ordre du lot; une clé déjà vue renvoie l'ID de sa première tâche.
+    """
+    c.execute("SELECT id, idempotency_key FROM tasks WHERE id >= ? ORDER BY id", (first_id,))
+    inserted = c.fetchall()
     
-    conn.close()
+    known = {row[1]: row[0] for row in inserted if row[1] is not None}
+    replayed = [key for key in keys if key is not None and key not in known]
+    known.update(find_idempotent_tasks(c, replayed))
     
-    return {
-        "total": total_tasks,
-        "completed": completed_tasks,
-        "pending": pending_tasks,
-        "failed": failed_tasks
-    }
+    task_ids, position = [], 0
+    for key in keys:
+        if key is None:
+            task_ids.append(inserted[position][0])
+            position += 1
+        else:
+            if position < len(inserted) and inserted[position][1] == key:
+                position += 1
+            task_ids.append(known[key])
+    return task_ids
 
-# ==================== ROUTES DASHBOARD ====================
+def find_idempotent_tasks(c, keys):
+    """IDs des tâches déjà créées avec ces clés d'idempotence ({clé: id})"""
+    keys = list(dict.fromkeys(keys))
+    found = {}
+    for start in range(0, len(keys), 500):
+        chunk = keys[start:start + 500]
+        c.execute(
+            f"""SELECT idempotency_key, id FROM tasks
+                WHERE idempotency_key IN ({', '.join('?' * len(chunk))})""",
+            chunk
+        )
+        found.update((row[0], row[1]) for row in c.fetchall())
+    return found
 
-@app.route("/")
-def dashboard():
-    """Dashboard principal"""
+def parse_task_payload(data):
+    """Normaliser la description JSON d'une tâche
+    
+    Renvoie (name, type, command, priority, queue, req_cpu_cores,
+    req_memory_mb, req_platform, estimated_seconds, max_retries,
+    retry_backoff, cache_key, idempotency_key) dans l'ordre des paramètres
+    de INSERT_TASK_SQL.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Tâche invalide: objet JSON attendu")
+    
+    name = data.get("name", f"Task-{datetime.now().strftime('%H%M%S')}")
+    task_type = data.get("type", "shell")
+    command = data.get("command", "")
+    
+    # Si command est un dict, le convertir en JSON
+    if isinstance(command, dict):
+        command = json.dumps(command)
+    
     try:
-        # Statistiques
-        worker_stats = get_worker_stats()
-        task_stats = get_task_stats()
+        priority = int(data.get("priority", 0))
+    except (TypeError, ValueError):
+        raise ValueError("priority doit être un entier")
+    
+    queue = data.get("queue") or DEFAULT_QUEUE
+    if not isinstance(queue, str) or len(queue) > 64:
+        raise ValueError("queue doit être une chaîne de 64 caractères au plus")
+    
+    # Besoins en ressources: {"cpu_cores": 2, "memory_mb": 1024, "platform": "linux"}
+    requirements = data.get("requirements") or {}
+    if not isinstance(requirements, dict):
+        raise ValueError("requirements doit être un objet JSON")
+    try:
+        cpu_cores = max(1, int(requirements.get("cpu_cores", 1)))
+        memory_mb = max(0, int(requirements.get("memory_mb", 0)))
+    except (TypeError, ValueError):
+        raise ValueError("requirements.cpu_cores et memory_mb doivent être des entiers")
+    
+    # Contrainte de plateforme: sous-chaîne de la plateforme du worker
+    # (ex: "linux", "android", "aarch64")
+    target = requirements.get("platform")
+    if target is not None and not isinstance(target, str):
+        raise ValueError("requirements.platform doit être une chaîne")
+    target = target.lower() if target else None
+    
+    estimated_seconds = data.get("estimated_seconds")
+    if estimated_seconds is not None:
+        try:
+            estimated_seconds = max(0.0, float(estimated_seconds))
+        except (TypeError, ValueError):
+            raise ValueError("estimated_seconds doit être un nombre")
+    
+    # Réessais: {"max_retries": 3, "retry_backoff": 10} (secondes, doublées
+    # à chaque échec)
+    try:
+        max_retries = data.get("max_retries")
+        max_retries = DEFAULT_MAX_RETRIES if max_retries is None else max(0, int(max_retries))
+        retry_backoff = data.get("retry_backoff")
+        if retry_backoff is not None:
+            retry_backoff = max(0.0, float(retry_backoff))
+    except (TypeError, ValueError):
+        raise ValueError("max_retries doit être un entier et retry_backoff un nombre")
+    
+    # Mémoïsation (opt-in): la tâche doit être déterministe
+    key = result_cache_key(task_type, command, data.get("env")) if data.get("cacheable") else None
+    
+    return (name, task_type, command, priority, queue,
+            cpu_cores, memory_mb, target, estimated_seconds,
+            max_retries, retry_backoff, key, parse_idempotency_key(data.get("idempotency_key")))
+
+def iter_ndjson(stream):
+    """Lire un flux NDJSON ligne par ligne (mémoire constante)"""
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            raise ValueError(f"Ligne {line_number}: JSON invalide")
+
+def limit_batch(items):
+    """Refuser les lots dépassant MAX_TASK_BATCH tâches"""
+    for count, item in enumerate(items, start=1):
+        if count > MAX_TASK_BATCH:
+            raise ValueError(f"Lot trop grand (maximum {MAX_TASK_BATCH} tâches)")
+        yield item
+
+JOB_FIELDS = (
+    "id", "name", "created_at", "total", "blocked", "pending", "running",
+    "completed", "failed"
+)
+
+def insert_job_tasks(c, job_id, items, now):
+    """Insérer les tâches d'un job et leurs dépendances (commit à l'appelant)
+    
+    Chaque tâche peut porter une clé ("key") et dépendre ("depends_on") des
+    clés de tâches précédentes du même envoi ou d'IDs de tâches existantes:
+    le graphe reste acyclique par construction. Une tâche dont un parent
+    n'est pas terminé est créée 'blocked' et ne devient distribuable qu'à
+    la complétion de tous ses parents (trigger trg_tasks_release_children).
+    
+    Une tâche dont la clé d'idempotence est déjà connue n'est pas recréée:
+    son ID d'origine est renvoyé.
+    
+    Renvoie (IDs des tâches dans l'ordre, {clé: task_id}).
+    """
+    task_ids, keys, created = [], {}, []
+    for item in limit_batch(items):
+        if not isinstance(item, dict):
+            raise ValueError("Tâche invalide: objet JSON attendu")
+        key = item.get("key")
+        if key is not None and (not isinstance(key, str) or key in keys):
+            raise ValueError(f"Clé de tâche invalide ou en double: {key!r}")
         
-        # Calculer le taux de complétion
-        completion_rate = 0
-        if task_stats["total"] > 0:
-            completion_rate = round(task_stats["completed"] / task_stats["total"] * 100, 1)
+        # Sans nom, une tâche prend sa clé (ex: "map-3", "reduce")
+        task = parse_task_payload(dict(item, name=item.get("name") or key) if key else item)
         
-        # Récupérer les workers récents
-        conn = get_db_connection()
-        c = conn.cursor()
+        parents = []
+        for ref in item.get("depends_on") or []:
+            if isinstance(ref, str):
+                if ref not in keys:
+                    raise ValueError(f"Dépendance inconnue: '{ref}' (clé d'une tâche précédente attendue)")
+                parents.append(keys[ref])
+            elif isinstance(ref, int) and not isinstance(ref, bool):
+                parents.append(ref)
+            else:
+                raise ValueError("depends_on doit lister des clés ou des IDs de tâches")
+        parents = list(dict.fromkeys(parents))
         
-        c.execute("""
-            SELECT name, platform, last_seen, tasks_completed
-            FROM workers 
-            WHERE is_active = 1
-            ORDER BY last_seen DESC 
-            LIMIT 10
-        """)
-        recent_workers = [dict(row) for row in c.fetchall()]
+        unmet = 0
+        if parents:
+            c.execute(
+                f"SELECT id, status FROM tasks WHERE id IN ({', '.join('?' * len(parents))})",
+                parents
+            )
+            statuses = {row['id']: row['status'] for row in c.fetchall()}
+            missing = [parent for parent in parents if parent not in statuses]
+            if missing:
+                raise ValueError(f"Tâches parentes introuvables: {missing}")
+            unmet = sum(status != "completed" for status in statuses.values())
         
-        # Récupérer les tâches récentes
-        c.execute("""
-            SELECT id, name, status, created_at, assigned_worker
-            FROM tasks 
-            ORDER BY created_at DESC 
-            LIMIT 10
-        """)
-        recent_tasks = [dict(row) for row in c.fetchall()]
+        c.execute(INSERT_TASK_SQL, task + (now, job_id, unmet))
+        if c.rowcount == 0:
+            # Clé d'idempotence déjà connue: tâche d'origine, déjà reliée
+            task_id = find_idempotent_tasks(c, [task[12]])[task[12]]
+        else:
+            task_id = c.lastrowid
+            created.append(task_id)
+            c.executemany(
+                "INSERT INTO task_dependencies (depends_on, task_id) VALUES (?, ?)",
+                [(parent, task_id) for parent in parents]
+            )
         
-        conn.close()
+        if key is not None:
+            keys[key] = task_id
+        task_ids.append(task_id)
+    
+    if created:
+        resolve_cached_tasks(c, created[0], created[-1], now)
+    
+    return task_ids, keys
+
+def job_summary(row):
+    """Compteurs d'un job, état et progression"""
+    job = {field: row[field] for field in JOB_FIELDS}
+    active = job["pending"] + job["running"]
+    
+    if job["total"] == 0:
+        state = "pending"
+    elif job["completed"] == job["total"]:
+        state = "completed"
+    elif active == 0 and job["failed"]:
+        state = "failed"  # Les tâches restantes attendent un parent en échec
+    elif active == 0:
+        state = "blocked"
+    else:
+        state = "running"
+    
+    job["state"] = state
+    job["progress"] = round(job["completed"] / job["total"], 4) if job["total"] else 0.0
+    return job
+
+def parse_fields(raw, allowed):
+    """Valider une projection ?fields=a,b,c (tous les champs par défaut)"""
+    if not raw:
+        return list(allowed)
+    fields = [field.strip() for field in raw.split(",") if field.strip()]
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ValueError(f"Champs inconnus: {', '.join(unknown)}")
+    return fields
+
+def parse_limit(raw):
+    """Valider la taille de page demandée"""
+    limit = DEFAULT_PAGE_SIZE if raw is None else int(raw)
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+def encode_cursor(*values):
+    """Encoder une position de pagination (opaque pour les clients)"""
+    return base64.urlsafe_b64encode(json.dumps(values).encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor):
+    """Décoder un curseur produit par encode_cursor"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except ValueError:
+        raise ValueError("Curseur invalide")
+    if not isinstance(values, list) or len(values) != 2:
+        raise ValueError("Curseur invalide")
+    return values
+
+def fetch_page(c, table, fields, order_column, where, params, cursor, limit):
+    """Lire une page triée par (order_column, id) décroissants
+    
+    Pagination par clé (keyset): le curseur mémorise la dernière ligne vue,
+    si bien que chaque page coûte O(limit) quelle que soit sa profondeur.
+    """
+    where = list(where)
+    params = list(params)
+    if cursor:
+        where.append(f"({order_column}, id) < (?, ?)")
+        params.extend(decode_cursor(cursor))
+    
+    columns = list(dict.fromkeys(list(fields) + [order_column, "id"]))
+    sql = f"SELECT {', '.join(columns)} FROM {table}"
+    if where:
+        sql += f" WHERE {' AND '.join(where)}"
+    sql += f" ORDER BY {order_column} DESC, id DESC LIMIT ?"
+    
+    c.execute(sql, params + [limit + 1])
+    rows = c.fetchall()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][order_column], rows[-1]["id"])
+    
+    return [{field: row[field] for field in fields} for row in rows], next_cursor
+
+def requeue_expired_leases(c, now=None):
+    """Remettre en attente les tâches dont le bail a expiré"""
+    now = now or datetime.now().isoformat()
+    c.execute(
+        """UPDATE tasks SET 
+            status = 'pending',
+            assigned_worker = NULL,
+            lease_expires_at = NULL,
+            speculative_worker = NULL,
+            speculated_at = NULL
+           WHERE status = 'running' AND lease_expires_at < ?""",
+        (now,)
+    )
+    if c.rowcount:
+        logger.info(f"♻️ {c.rowcount} tâche(s) remise(s) en attente (bail expiré)")
+    return c.rowcount
+
+def plan_dispatch(c, max_tasks, capacity=None, worker_id=None, now=None):
+    """Choisir les prochaines tâches à distribuer (partage équitable pondéré)
+    
+    Chaque file active a un « service » (tâches servies / poids). Chaque
+    place est attribuée à la file active la moins servie, puis son service
+    augmente de 1 / poids: sur la durée, les files reçoivent des parts
+    proportionnelles à leur poids, et une longue série de tâches ne peut
+    plus affamer une file interactive. Dans une file, l'ordre reste
+    priorité décroissante puis FIFO (idx_tasks_queue_dispatch).
+    
+    Avec `capacity` (voir worker_capacity), seules les tâches qui tiennent
+    dans les cœurs, la mémoire et la plateforme restants du worker sont
+    retenues: un gros worker reçoit plusieurs petites tâches (first-fit)
+    jusqu'à saturer sa capacité, un petit n'est jamais servi au-delà. Parmi
+    les premières tâches de la file, la vitesse mesurée du worker choisit
+    (voir match_speed): les longues aux machines rapides, les courtes aux
+    lentes; aucune tâche n'est exclue pour sa durée.
+    
+    Les tâches en réessai dont l'attente n'est pas écoulée sont sautées;
+    `worker_id` n'en reçoit aucune qu'il vient de faire échouer tant qu'un
+    autre worker peut s'en charger.
+    
+    Renvoie (lignes, service mis à jour par file).
+    """
+    cpu_left = capacity["cpu_cores"] if capacity else float("inf")
+    memory_left = capacity["memory_mb"] if capacity else float("inf")
+    platform = capacity["platform"] if capacity else None
+    speed = capacity["speed"] if capacity else 1.0
+    fleet = fleet_runtimes(c) if capacity else {}
+    
+    now = now or datetime.now()
+    retry_due = now.isoformat()
+    avoid_due = (now - timedelta(seconds=RETRY_OTHER_WORKER_SECONDS)).isoformat()
+    last_worker = None if worker_id is None else str(worker_id)
+    
+    c.execute("""
+        SELECT name, weight, pending, service FROM queues
+        WHERE pending > 0 ORDER BY service
+    """)
+    heap = [(row['service'], row['name'], row['weight'], row['pending'])
+            for row in c.fetchall()]
+    heapq.heapify(heap)
+    
+    # La capacité ne fait que diminuer: une tâche écartée ne tiendra pas
+    # plus tard, chaque file reprend donc après sa dernière tête retenue
+    # (les tâches déjà choisies plus loin dans la fenêtre sont sautées)
+    rows, service, positions, chosen = [], {}, {}, set()
+    while heap and len(rows) < max_tasks:
+        served, name, weight, pending = heapq.heappop(heap)
         
-        # Générer l'URL du coordinateur
-        if IS_RAILWAY:
-            coordinator_url = f"https://{request.host}"
-        else:
-            coordinator_url = f"http://{request.host}"
+        priority, created_at, task_id = positions.get(name, QUEUE_START)
+        c.execute(NEXT_FITTING_TASK_SQL, (
+            name, priority, priority, created_at, task_id,
+            cpu_left, memory_left, platform, platform,
+            retry_due, last_worker, avoid_due, SPEED_MATCH_WINDOW + len(chosen)
+        ))
+        candidates = [row for row in c.fetchall() if row['id'] not in chosen]
+        if not candidates:
+            continue  # Plus rien dans cette file ne tient sur ce worker
         
-        return render_template("index.html",
-            active_workers=worker_stats["active_workers"],
-            total_cpu=worker_stats["total_cpu"],
-            total_memory=worker_stats["total_memory"],
-            total_tasks=task_stats["total"],
-            completed_tasks=task_stats["completed"],
-            pending_tasks=task_stats["pending"],
-            failed_tasks=task_stats["failed"],
-            completion_rate=completion_rate,
-            recent_workers=recent_workers,
-            recent_tasks=recent_tasks,
-            coordinator_url=coordinator_url,
-            is_railway=IS_RAILWAY,
-            current_time=datetime.now().strftime("%H:%M:%S")
-        )
+        row = match_speed(candidates[:SPEED_MATCH_WINDOW], speed, fleet, now)
+        rows.append(row)
+        chosen.add(row['id'])
+        if row is candidates[0]:
+            positions[name] = (row['priority'], row['created_at'], row['id'])
+        cpu_left -= row['req_cpu_cores']
+        memory_left -= row['req_memory_mb']
         
-    except Exception as e:
-        logger.error(f"❌ Erreur dashboard: {e}")
-        return render_template("error.html", error=str(e))
+        served += 1.0 / max(weight, 0.001)
+        service[name] = served
+        if pending > 1:
+            heapq.heappush(heap, (served, name, weight, pending - 1))
+    
+    return rows, service
 
-@app.route("/submit", methods=["POST"])
-def submit_task():
-    """Soumettre une nouvelle tâche depuis le dashboard"""
+def fleet_runtimes(c):
+    """EWMA du parc par type de tâche (durée attendue sans estimation déclarée)"""
+    c.execute("SELECT task_type, ewma FROM worker_runtime_stats WHERE worker_id = 0")
+    return {row['task_type']: row['ewma'] for row in c.fetchall()}
+
+def expected_seconds(row, fleet):
+    """Durée attendue d'une tâche: celle déclarée, sinon l'EWMA du parc pour
+    son type (None sans historique)"""
+    if row['estimated_seconds'] is not None:
+        return row['estimated_seconds']
+    return fleet.get(row['type'])
+
+def match_speed(candidates, speed, fleet, now):
+    """Choisir, parmi les premières tâches d'une file (ordre de la file),
+    celle qui convient à la vitesse du worker
+    
+    Un worker rapide prend la plus longue, un lent la plus courte, les
+    autres la première; la tête de file passe avant tout si elle attend
+    depuis SPEED_MATCH_MAX_WAIT_SECONDS (pas de famine).
+    """
+    head = candidates[0]
+    if len(candidates) == 1 or 1 / (1 + SPEED_MATCH_MARGIN) < speed < 1 + SPEED_MATCH_MARGIN:
+        return head
     try:
-        name = request.form.get("name", "Nouvelle tâche")
-        task_type = request.form.get("type", "shell")
-        command = request.form.get("command", "")
-        
-        if not name or not command:
-            flash("❌ Nom et commande sont requis", "danger")
-            return redirect(url_for("dashboard"))
+        if (now - datetime.fromisoformat(head['created_at'])).total_seconds() > SPEED_MATCH_MAX_WAIT_SECONDS:
+            return head
+    except (TypeError, ValueError):
+        pass
+    
+    known = [(expected_seconds(row, fleet), index) for index, row in enumerate(candidates)]
+    known = [(seconds, index) for seconds, index in known if seconds is not None]
+    if not known:
+        return head
+    if speed > 1:
+        _, index = max(known, key=lambda item: (item[0], -item[1]))
+    else:
+        _, index = min(known)
+    return candidates[index]
+
+def worker_capacity(c, worker_id, free_cpu_cores=None, free_memory_mb=None):
+    """Capacité disponible d'un worker pour le dispatch
+    
+    Les valeurs déclarées à l'enregistrement bornent la capacité libre
+    annoncée par le worker au moment du claim (tâches déjà en cours). La
+    vitesse du worker oriente le choix parmi les premières tâches des files.
+    Renvoie None pour un worker inconnu (aucune contrainte).
+    """
+    c.execute("SELECT cpu_cores, memory_mb, platform FROM workers WHERE id = ?", (worker_id,))
+    row = c.fetchone()
+    if row is None:
+        return None
+    
+    cpu_cores = row['cpu_cores'] or 1
+    memory_mb = row['memory_mb'] or 0
+    if free_cpu_cores is not None:
+        cpu_cores = min(cpu_cores, free_cpu_cores)
+    if free_memory_mb is not None:
+        memory_mb = min(memory_mb, free_memory_mb)
+    
+    return {
+        "cpu_cores": cpu_cores,
+        "memory_mb": memory_mb,
+        "platform": (row['platform'] or "").lower(),
+        "speed": worker_speed(c, worker_id)
+    }
+
+def record_runtimes(c, worker_id, runtimes):
+    """Mettre à jour l'EWMA et le p95 des durées d'exécution
+    
+    `runtimes` est une liste de (task_type, secondes, durée déclarée ou
+    None). Chaque mesure met à jour la ligne du worker et celle du parc
+    (worker 0); le p95 est calculé sur les RUNTIME_WINDOW dernières mesures.
+    La durée relative (mesurée / attendue, l'attendue étant celle déclarée
+    ou l'EWMA du parc avant la mesure) est moyennée de même: c'est elle qui
+    donne la vitesse du worker, indépendamment de la longueur des tâches
+    qu'il reçoit.
+    """
+    for task_type, seconds, estimate in runtimes:
+        fleet = fleet_runtimes(c).get(task_type)
+        expected = estimate if estimate else (fleet or seconds)
+        relative = seconds / max(expected, 0.001)
         
-        # Créer l'objet commande
-        command_obj = {"type": task_type, "command": command}
+        for owner in (worker_id, 0):
+            c.execute(
+                """SELECT samples, ewma, recent, relative FROM worker_runtime_stats
+                   WHERE worker_id = ? AND task_type = ?""",
+                (owner, task_type)
+            )
+            row = c.fetchone()
+            if row is None:
+                samples, ewma, recent, ratio = 0, seconds, [], relative
+            else:
+                samples, recent = row['samples'], json.loads(row['recent'])
+                ewma = RUNTIME_EWMA_ALPHA * seconds + (1 - RUNTIME_EWMA_ALPHA) * row['ewma']
+                ratio = relative if row['relative'] is None else (
+                    RUNTIME_EWMA_ALPHA * relative + (1 - RUNTIME_EWMA_ALPHA) * row['relative']
+                )
+            
+            recent = (recent + [round(seconds, 3)])[-RUNTIME_WINDOW:]
+            ordered = sorted(recent)
+            p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+            
+            c.execute(
+                """INSERT INTO worker_runtime_stats
+                       (worker_id, task_type, samples, ewma, p95, recent, relative)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(worker_id, task_type) DO UPDATE SET
+                       samples = excluded.samples,
+                       ewma = excluded.ewma,
+                       p95 = excluded.p95,
+                       recent = excluded.recent,
+                       relative = excluded.relative""",
+                (owner, task_type, samples + 1, ewma, p95, json.dumps(recent), ratio)
+            )
+
+def worker_speed(c, worker_id, task_type=None):
+    """Vitesse relative d'un worker (1.0 = moyenne du parc, 2.0 = deux fois plus rapide)
+    
+    Inverse de la durée relative du worker (mesurée / attendue, voir
+    record_runtimes), moyennée sur les types de tâches selon le nombre de
+    mesures: un worker qui reçoit les tâches longues n'en paraît pas plus
+    lent. 1.0 sans historique.
+    """
+    sql = """SELECT w.samples, w.relative FROM worker_runtime_stats w
+             WHERE w.worker_id = ? AND w.relative IS NOT NULL"""
+    params = [worker_id]
+    if task_type:
+        sql += " AND w.task_type = ?"
+        params.append(task_type)
+    c.execute(sql, params)
+    
+    weighted, samples = 0.0, 0
+    for row in c.fetchall():
+        if row['relative'] > 0:
+            weighted += row['samples'] / row['relative']
+            samples += row['samples']
+    
+    if not samples:
+        return 1.0
+    return max(0.05, min(weighted / samples, 20.0))
+
+def job_peer_median(c, job_id):
+    """Durée médiane des tâches terminées d'un job (None sous STRAGGLER_MIN_PEERS)"""
+    c.execute(JOB_PEER_COUNT_SQL, (job_id,))
+    count = c.fetchone()[0]
+    if count < max(1, STRAGGLER_MIN_PEERS):
+        return None
+    c.execute(JOB_PEER_MEDIAN_SQL, (job_id, count // 2))
+    return c.fetchone()['execution_time']
+
+def pick_straggler(c, worker_id, capacity, now, running=None, speculating=0):
+    """Choisir une tâche traînarde à dupliquer sur un worker inactif
+    
+    Une tâche traîne si elle tourne depuis plus de STRAGGLER_FACTOR fois la
+    durée de ses pairs: la médiane des tâches terminées de son job (au moins
+    STRAGGLER_MIN_PEERS), sinon sa durée attendue (déclarée, ou EWMA du parc
+    pour son type, voir expected_seconds). Seuls les workers au moins aussi
+    rapides que SPECULATION_MIN_SPEED dupliquent, dans la limite de
+    SPECULATION_BUDGET (sans plancher: avec moins de 1/SPECULATION_BUDGET
+    tâches en cours, aucun doublon). `running` et `speculating` (doublons
+    pas encore en base) viennent du moteur en mémoire s'il est actif.
+    Renvoie la ligne de la tâche la plus en retard, ou None.
+    """
+    if SPECULATION_BUDGET <= 0 or capacity is None:
+        return None
+    
+    if running is None:
+        c.execute("SELECT count FROM task_counters WHERE status = 'running'")
+        row = c.fetchone()
+        running = row['count'] if row else 0
+    c.execute("SELECT COUNT(*) FROM tasks WHERE status = 'running' AND speculative_worker IS NOT NULL")
+    if c.fetchone()[0] + speculating + 1 > running * SPECULATION_BUDGET:
+        return None
+    
+    if capacity["speed"] < SPECULATION_MIN_SPEED:
+        return None
+    fleet = fleet_runtimes(c)
+    
+    c.execute(STRAGGLER_CANDIDATES_SQL, (
+        str(worker_id), capacity["cpu_cores"], capacity["memory_mb"],
+        capacity["platform"], capacity["platform"]
+    ))
+    
+    best, best_ratio = None, STRAGGLER_FACTOR
+    peers = {}
+    for row in c.fetchall():
+        elapsed = (now - datetime.fromisoformat(row['started_at'])).total_seconds()
+        if elapsed < STRAGGLER_MIN_SECONDS:
+            continue
+        if row['job_id'] is not None and row['job_id'] not in peers:
+            peers[row['job_id']] = job_peer_median(c, row['job_id'])
+        expected = peers.get(row['job_id'])
+        if expected is None:
+            expected = expected_seconds(row, fleet)
+        if expected is None:
+            continue
+        ratio = elapsed / max(expected, 0.001)
+        if ratio > best_ratio:
+            best, best_ratio = row, ratio
+    
+    return best
+
+def claim_tasks(conn, worker_id, max_tasks, lease_seconds=TASK_LEASE_SECONDS, capacity=None):
+    """Réclamer atomiquement jusqu'à max_tasks tâches pour un worker
+    
+    Les tâches passent de 'pending' à 'running' dans une seule transaction
+    (BEGIN IMMEDIATE), ce qui garantit qu'une tâche n'est remise qu'à un
+    seul worker tant que son bail n'a pas expiré. `capacity` limite les
+    tâches retenues aux ressources libres du worker.
+    
+    Un worker qui ne trouve aucune tâche en attente peut recevoir un doublon
+    spéculatif d'une tâche traînarde (marqué "speculative"): le premier
+    résultat reçu l'emporte, l'autre est ignoré.
+    """
+    now = datetime.now()
+    lease_expires_at = (now + timedelta(seconds=lease_seconds)).isoformat()
+    
+    c = conn.cursor()
+    c.execute("BEGIN IMMEDIATE")
+    try:
+        requeued = requeue_expired_leases(c, now.isoformat())
+        
+        rows, service = plan_dispatch(c, max_tasks, capacity, worker_id, now)
+        c.executemany(
+            "UPDATE queues SET service = ? WHERE name = ?",
+            [(served, name) for name, served in service.items()]
+        )
+        
+        c.executemany(
+            """UPDATE tasks SET 
+                status = 'running',
+                assigned_worker = ?,
+                lease_expires_at = ?,
+                started_at = ?,
+                speculative_worker = NULL,
+                speculated_at = NULL
+               WHERE id = ? AND status = 'pending'""",
+            [(worker_id, lease_expires_at, now.isoformat(), row['id']) for row in rows]
+        )
+        
+        # Oublier la sortie partielle d'une exécution précédente (bail expiré)
+        c.executemany(
+            "DELETE FROM task_output WHERE task_id = ?",
+            [(row['id'],) for row in rows]
+        )
+        
+        # Worker inactif: dupliquer une tâche traînarde
+        speculative = None
+        if not rows:
+            speculative = pick_straggler(c, worker_id, capacity, now)
+        if speculative is not None:
+            c.execute(
+                """UPDATE tasks SET speculative_worker = ?, speculated_at = ?
+                   WHERE id = ? AND status = 'running' AND speculative_worker IS NULL""",
+                (str(worker_id), now.isoformat(), speculative['id'])
+            )
+            c.execute(CLEAR_SPECULATIVE_OUTPUT_SQL, (speculative['id'],))
+            rows = [speculative]
+            speculation_stats.increment("launched")
+            logger.info(f"🏎️ Tâche {speculative['id']} dupliquée sur le worker {worker_id} "
+                        f"(worker {speculative['assigned_worker']} en retard)")
+        
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    
+    if requeued:
+        task_signal.notify()
+    if requeued or rows:
+        status_signal.notify()
+    
+    return [claimed_task(row, lease_expires_at, row is speculative) for row in rows]
+
+def claimed_task(row, lease_expires_at, speculative=False):
+    """Tâche telle que remise au worker (ligne DISPATCH_COLUMNS)"""
+    return {
+        "task_id": row['id'],
+        "name": row['name'],
+        "type": row['type'],
+        "command": row['command'],
+        "created_at": row['created_at'],
+        "priority": row['priority'],
+        "queue": row['queue'],
+        "requirements": {
+            "cpu_cores": row['req_cpu_cores'],
+            "memory_mb": row['req_memory_mb'],
+            "platform": row['req_platform']
+        },
+        "lease_expires_at": lease_expires_at,
+        "speculative": speculative
+    }
+
+TASK_STATUS_FIELDS = (
+    "id", "name", "type", "status", "priority", "queue", "created_at",
+    "completed_at", "execution_time", "assigned_worker", "lease_expires_at",
+    "attempts", "retry_after"
+)
+TERMINAL_STATUSES = ("completed", "failed")
+
+def read_task_statuses(c, task_ids):
+    """Lire le statut de plusieurs tâches (recherche par clé primaire)"""
+    found = {}
+    for start in range(0, len(task_ids), 500):
+        chunk = task_ids[start:start + 500]
+        c.execute(
+            f"""SELECT {', '.join(TASK_STATUS_FIELDS)} FROM tasks
+                WHERE id IN ({', '.join('?' * len(chunk))})""",
+            chunk
+        )
+        for row in c.fetchall():
+            found[row["id"]] = {field: row[field] for field in TASK_STATUS_FIELDS}
+    return [found[task_id] for task_id in task_ids if task_id in found]
+
+def status_etag(tasks):
+    """ETag d'un ensemble de statuts: change dès qu'une tâche évolue"""
+    digest = hashlib.sha1()
+    for task in tasks:
+        digest.update(f"{task['id']}:{task['status']}:{task['assigned_worker']}:"
+                      f"{task['completed_at']};".encode("utf-8"))
+    return digest.hexdigest()[:20]
+
+def poll_task_statuses(task_ids, if_none_match, wait):
+    """Lire les statuts, en attendant (au plus `wait` s) un changement
+    
+    Tant que l'ETag courant figure dans If-None-Match, la requête reste en
+    attente d'un signal de changement de statut: le client n'est réveillé
+    que lorsqu'il y a réellement du nouveau. Renvoie (tâches, etag).
+    """
+    deadline = time.monotonic() + wait
+    while True:
+        version = status_signal.version()
+        
+        conn = get_db_connection()
+        tasks = read_task_statuses(conn.cursor(), task_ids)
+        conn.close()
+        
+        etag = status_etag(tasks)
+        remaining = deadline - time.monotonic()
+        if not if_none_match.contains(etag) or remaining <= 0:
+            return tasks, etag
+        status_signal.wait(version, remaining)
+
+# Un doublon spéculatif diffuse dans son propre emplacement (les lecteurs
+# en direct suivent le worker principal), promu si le doublon gagne
+SPECULATIVE_OUTPUT_PREFIX = "speculative:"
+CLEAR_SPECULATIVE_OUTPUT_SQL = f"""
+    DELETE FROM task_output
+    WHERE task_id = ? AND stream IN ('{SPECULATIVE_OUTPUT_PREFIX}stdout', '{SPECULATIVE_OUTPUT_PREFIX}stderr')
+"""
+
+def output_slot(stream, speculative=False):
+    """Flux de task_output où écrit un worker (principal ou doublon)"""
+    return f"{SPECULATIVE_OUTPUT_PREFIX}{stream}" if speculative else stream
+
+def read_streamed_output(c, task_id, stream):
+    """Reconstituer la sortie diffusée d'une tâche (None si aucune)"""
+    c.execute(
+        "SELECT data FROM task_output WHERE task_id = ? AND stream = ? ORDER BY position",
+        (task_id, stream)
+    )
+    chunks = [row[0] for row in c.fetchall()]
+    return "".join(chunks) if chunks else None
+
+def resolve_cached_tasks(c, first_id, last_id, now=None):
+    """Servir depuis le cache les tâches "cacheable" qui viennent d'être créées
+    
+    Pour chaque nouvelle tâche en attente (sans dépendance) portant une clé:
+    - résultat en cache encore valide: la tâche est terminée sur-le-champ;
+    - tâche identique déjà en attente ou en cours: la nouvelle l'attend
+      ('blocked') et reçoit son résultat à sa complétion;
+    - sinon elle part sur la flotte.
+    Le commit reste à l'appelant; renvoie le nombre de tâches servies par
+    le cache.
+    """
+    now = now or datetime.now().isoformat()
+    fresh = (datetime.fromisoformat(now) - timedelta(seconds=RESULT_CACHE_TTL_SECONDS)).isoformat()
+    
+    c.execute(
+        """SELECT id, cache_key FROM tasks
+           WHERE id BETWEEN ? AND ? AND cache_key IS NOT NULL AND status = 'pending'
+           ORDER BY id""",
+        (first_id, last_id)
+    )
+    hits = 0
+    for task_id, key in c.fetchall():
+        c.execute(
+            """SELECT output_blob, error_blob, execution_time FROM result_cache
+               WHERE key = ? AND created_at > ?""",
+            (key, fresh)
+        )
+        cached = c.fetchone()
+        if cached is not None:
+            c.execute("UPDATE result_cache SET last_used_at = ? WHERE key = ?", (now, key))
+            c.execute(
+                """UPDATE tasks SET status = 'completed', completed_at = ?,
+                       output_blob = ?, error_blob = ?, execution_time = ?
+                   WHERE id = ?""",
+                (now, cached[0], cached[1], cached[2], task_id)
+            )
+            cache_stats.increment("hits")
+            hits += 1
+            continue
+        
+        c.execute(
+            """SELECT id FROM tasks
+               WHERE cache_key = ? AND status IN ('pending', 'running') AND id < ?
+               ORDER BY id LIMIT 1""",
+            (key, task_id)
+        )
+        leader = c.fetchone()
+        if leader is not None:
+            c.execute(
+                "UPDATE tasks SET status = 'blocked', unmet_deps = unmet_deps + 1 WHERE id = ?",
+                (task_id,)
+            )
+            c.execute(
+                "INSERT INTO task_dependencies (depends_on, task_id) VALUES (?, ?)",
+                (leader[0], task_id)
+            )
+            cache_stats.increment("coalesced")
+        else:
+            cache_stats.increment("misses")
+    
+    return hits
+
+def store_cached_result(c, task_id, key, output_blob, error_blob, execution_time, now):
+    """Mettre en cache le résultat réussi d'une tâche et le transmettre aux
+    tâches identiques qui l'attendaient (libérées par le trigger de complétion)"""
+    c.execute(
+        """INSERT INTO result_cache
+               (key, output_blob, error_blob, execution_time, created_at, last_used_at)
+           VALUES (?, ?, ?, ?, ?, ?)
+           ON CONFLICT(key) DO UPDATE SET
+               output_blob = excluded.output_blob,
+               error_blob = excluded.error_blob,
+               execution_time = excluded.execution_time,
+               created_at = excluded.created_at,
+               last_used_at = excluded.last_used_at""",
+        (key, output_blob, error_blob, execution_time, now, now)
+    )
+    c.execute(
+        """UPDATE tasks SET status = 'completed', completed_at = ?,
+               output_blob = ?, error_blob = ?, execution_time = ?
+           WHERE cache_key = ? AND status = 'pending'
+             AND id IN (SELECT task_id FROM task_dependencies WHERE depends_on = ?)""",
+        (now, output_blob, error_blob, execution_time, key, task_id)
+    )
+
+def promote_cache_follower(c, task_id, key):
+    """Après l'échec définitif d'une tâche, confier son travail à la
+    première tâche identique qui l'attendait (les autres attendent celle-ci)"""
+    c.execute(
+        """SELECT t.id FROM task_dependencies d JOIN tasks t ON t.id = d.task_id
+           WHERE d.depends_on = ? AND t.cache_key = ? AND t.status = 'blocked'
+           ORDER BY t.id""",
+        (task_id, key)
+    )
+    followers = [row[0] for row in c.fetchall()]
+    if not followers:
+        return
+    
+    c.execute(
+        f"""DELETE FROM task_dependencies
+            WHERE depends_on = ? AND task_id IN ({', '.join('?' * len(followers))})""",
+        [task_id] + followers
+    )
+    c.execute(
+        "UPDATE tasks SET unmet_deps = unmet_deps - 1, status = 'pending' WHERE id = ?",
+        (followers[0],)
+    )
+    c.executemany(
+        "INSERT INTO task_dependencies (depends_on, task_id) VALUES (?, ?)",
+        [(followers[0], follower) for follower in followers[1:]]
+    )
+
+def evict_result_cache(c, now=None):
+    """Supprimer les entrées expirées, puis les moins récemment utilisées
+    au-delà de RESULT_CACHE_MAX_ENTRIES"""
+    now = now or datetime.now().isoformat()
+    cutoff = (datetime.fromisoformat(now) - timedelta(seconds=RESULT_CACHE_TTL_SECONDS)).isoformat()
+    
+    c.execute("DELETE FROM result_cache WHERE created_at <= ?", (cutoff,))
+    evicted = c.rowcount
+    
+    c.execute("SELECT COUNT(*) FROM result_cache")
+    excess = c.fetchone()[0] - RESULT_CACHE_MAX_ENTRIES
+    if excess > 0:
+        c.execute(
+            """DELETE FROM result_cache WHERE key IN
+               (SELECT key FROM result_cache ORDER BY last_used_at LIMIT ?)""",
+            (excess,)
+        )
+        evicted += c.rowcount
+    
+    if evicted:
+        cache_stats.increment("evictions", evicted)
+
+def retry_delay(backoff, attempts):
+    """Attente avant le réessai numéro attempts + 1 (exponentielle, avec gigue)"""
+    base = RETRY_BACKOFF_SECONDS if backoff is None else backoff
+    delay = min(RETRY_BACKOFF_MAX_SECONDS, base * 2 ** attempts)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+def apply_results(c, worker_id, results, now=None):
+    """Enregistrer des résultats de tâches (le commit reste à l'appelant)
+    
+    `results` est une liste de (task_id, result); renvoie le statut final
+    de chaque tâche. Un échec est remis en attente (statut "retrying")
+    tant que la tâche a des réessais; sinon elle reste 'failed'. L'échec
+    d'un worker qui ne détient plus la tâche (doublon spéculatif, bail
+    repris) est ignoré si elle tourne encore ailleurs.
+    """
+    now = now or datetime.now().isoformat()
+    rows = []
+    retries = []
+    released = []
+    cacheable = []
+    abandoned = []
+    statuses = []
+    successes = 0
+    runtimes = []
+    
+    tasks = {}
+    for start in range(0, len(results), 500):
+        chunk = [task_id for task_id, _ in results[start:start + 500]]
+        c.execute(
+            f"""SELECT id, type, status, assigned_worker, speculative_worker, estimated_seconds,
+                       attempts, max_retries, retry_backoff, cache_key FROM tasks
+                WHERE id IN ({', '.join('?' * len(chunk))})""",
+            chunk
+        )
+        tasks.update((row['id'], row) for row in c.fetchall())
+    
+    for task_id, result in results:
+        task = tasks.get(task_id)
+        
+        # Tâche inexistante (supprimée, ou identifiant erroné): rien à écrire
+        if task is None:
+            statuses.append({"task_id": task_id, "status": "ignored", "reason": "unknown_task"})
+            continue
+        
+        # Premier résultat gagnant: celui d'un doublon (ou d'un bail expiré)
+        # arrivé après coup est ignoré
+        if task['status'] in TERMINAL_STATUSES:
+            statuses.append({"task_id": task_id, "status": "ignored"})
+            speculation_stats.increment("ignored_results")
+            continue
+        
+        success = bool(result.get("success", False))
+        status = "completed" if success else "failed"
+        
+        holder = str(worker_id) == str(task['assigned_worker'])
+        if not success and not holder:
+            released.append((task_id, str(worker_id)))
+            statuses.append({"task_id": task_id, "status": "ignored"})
+            continue
+        speculative = (task['speculative_worker'] is not None
+                       and str(worker_id) == task['speculative_worker'])
+        if success and speculative:
+            speculation_stats.increment("speculative_wins")
+        
+        execution_time = result.get("execution_time")
+        if not isinstance(execution_time, (int, float)) or execution_time < 0:
+            execution_time = None
+        if success and execution_time is not None:
+            runtimes.append((task['type'], float(execution_time), task['estimated_seconds']))
+        
+        # La sortie diffusée pendant l'exécution est complète: elle remplace
+        # la fin de sortie envoyée avec le résultat (celle du gagnant: un
+        # doublon spéculatif vainqueur voit son emplacement promu)
+        streamed = holder or speculative
+        output = read_streamed_output(c, task_id, output_slot("stdout", speculative)) if streamed else None
+        if output is None:
+            output = result.get("stdout", "")
+        error = read_streamed_output(c, task_id, output_slot("stderr", speculative)) if streamed else None
+        if error is None:
+            error = result.get("stderr", "") or result.get("error", "")
+        elif result.get("error"):
+            error = f"{error}\n{result['error']}" if error else result["error"]
+        
+        if not success and task['attempts'] < task['max_retries']:
+            retry_after = datetime.fromisoformat(now) + timedelta(
+                seconds=retry_delay(task['retry_backoff'], task['attempts'])
+            )
+            retries.append((retry_after.isoformat(), str(worker_id), store_blob(c, output),
+                            store_blob(c, error), execution_time, task_id))
+            statuses.append({
+                "task_id": task_id,
+                "status": "retrying",
+                "attempt": task['attempts'] + 1,
+                "retry_after": retry_after.isoformat()
+            })
+            continue
+        
+        if not success and task['max_retries']:
+            logger.warning(f"🪦 Tâche {task_id} en échec après {task['attempts']} réessai(s)")
+        
+        output_blob, error_blob = store_blob(c, output), store_blob(c, error)
+        if task['cache_key']:
+            if success:
+                cacheable.append((task_id, task['cache_key'], output_blob, error_blob, execution_time))
+            else:
+                abandoned.append((task_id, task['cache_key']))
+        
+        rows.append((status, now, output_blob, error_blob, worker_id, execution_time, task_id))
+        statuses.append({"task_id": task_id, "status": status})
+        successes += success
+    
+    # Mettre à jour les tâches
+    c.executemany(
+        """UPDATE tasks SET 
+            status = ?,
+            completed_at = ?,
+            output_blob = ?,
+            error_blob = ?,
+            assigned_worker = ?,
+            execution_time = ?,
+            lease_expires_at = NULL
+           WHERE id = ? AND status NOT IN ('completed', 'failed')""",
+        rows
+    )
+    c.executemany(
+        """UPDATE tasks SET
+            status = 'pending',
+            attempts = attempts + 1,
+            retry_after = ?,
+            last_worker = ?,
+            output_blob = ?,
+            error_blob = ?,
+            execution_time = ?,
+            assigned_worker = NULL,
+            lease_expires_at = NULL,
+            started_at = NULL,
+            speculative_worker = NULL,
+            speculated_at = NULL
+           WHERE id = ? AND status = 'running'""",
+        retries
+    )
+    c.executemany(
+        """UPDATE tasks SET speculative_worker = NULL, speculated_at = NULL
+           WHERE id = ? AND speculative_worker = ?""",
+        released
+    )
+    
+    # Mémoïsation: mettre en cache les succès, servir les doublons en attente
+    for task_id, key, output_blob, error_blob, execution_time in cacheable:
+        store_cached_result(c, task_id, key, output_blob, error_blob, execution_time, now)
+    for task_id, key in abandoned:
+        promote_cache_follower(c, task_id, key)
+    if cacheable:
+        evict_result_cache(c, now)
+    c.executemany(
+        "DELETE FROM task_output WHERE task_id = ?",
+        [(row[-1],) for row in rows + retries]
+    )
+    
+    # Historique des durées (tâches réussies uniquement)
+    if worker_id and runtimes:
+        record_runtimes(c, worker_id, runtimes)
+    
+    # Mettre à jour le compteur du worker
+    if worker_id and successes:
+        c.execute(
+            "UPDATE workers SET tasks_completed = tasks_completed + ?, last_seen = ? WHERE id = ?",
+            (successes, now, worker_id)
+        )
+    
+    return statuses
+
+def parse_result_item(item):
+    """(task_id, résultat) d'un élément du lot /api/tasks/results
+    
+    Lève ValueError si l'élément n'est pas un objet avec un task_id entier
+    et un résultat objet.
+    """
+    if not isinstance(item, dict):
+        raise ValueError("Chaque résultat doit être un objet JSON")
+    task_id = item.get("task_id")
+    if isinstance(task_id, str) and task_id.isdigit():
+        task_id = int(task_id)
+    if not isinstance(task_id, int) or isinstance(task_id, bool):
+        raise ValueError("Chaque résultat doit contenir un task_id entier")
+    result = item.get("result", {})
+    if not isinstance(result, dict):
+        raise ValueError(f"Le résultat de la tâche {task_id} doit être un objet JSON")
+    return task_id, result
+
+def record_results(worker_id, results):
+    """Enregistrer des résultats et les valider en base
+    
+    Avec le moteur en mémoire, ils sont appliqués par son thread d'écriture
+    (après les claims journalisés, en un commit groupé).
+    """
+    if engine is not None:
+        return engine.apply_results(worker_id, results)
+    
+    conn = get_db_connection()
+    statuses = apply_results(conn.cursor(), worker_id, results)
+    conn.commit()
+    conn.close()
+    return statuses
+
+def read_task_output(conn, task_id, stream, position):
+    """Lire la sortie d'une tâche à partir de `position`
+    
+    Renvoie (statut, données); la sortie vient des morceaux diffusés tant que
+    la tâche tourne, puis du magasin de résultats une fois la tâche terminée.
+    """
+    c = conn.cursor()
+    column = "output_blob" if stream == "stdout" else "error_blob"
+    
+    c.execute(f"SELECT status, {column} AS blob FROM tasks WHERE id = ?", (task_id,))
+    row = c.fetchone()
+    if row is None:
+        return None, ""
+    if row["status"] in ("completed", "failed"):
+        text = load_blob(c, row["blob"])
+        return row["status"], text[position:position + MAX_OUTPUT_RESPONSE_CHARS]
+    
+    c.execute(
+        """SELECT position, data FROM task_output
+           WHERE task_id = ? AND stream = ? AND position + length(data) > ?
+           ORDER BY position""",
+        (task_id, stream, position)
+    )
+    
+    data = ""
+    expected = position
+    for chunk in c.fetchall():
+        if chunk["position"] > expected or len(data) >= MAX_OUTPUT_RESPONSE_CHARS:
+            break
+        data += chunk["data"][expected - chunk["position"]:]
+        expected = position + len(data)
+    
+    return row["status"], data[:MAX_OUTPUT_RESPONSE_CHARS]
+
+def get_worker_stats():
+    """Obtenir les statistiques des workers (table de liveness en mémoire)"""
+    active = liveness.active()
+    
+    return {
+        "active_workers": len(active),
+        "total_cpu": sum(entry["cpu_cores"] or 0 for entry in active),
+        "total_memory": sum(entry["memory_mb"] or 0 for entry in active)
+    }
+
+class WorkerLiveness:
+    """Table de liveness des workers, en mémoire
+    
+    Chaque requête d'un worker (enregistrement, claim, résultats,
+    heartbeat) met à jour son entrée sans écrire en base; le reaper
+    recopie périodiquement last_seen dans la table workers.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._workers = {}
+    
+    def seen(self, worker_id, heartbeat=False, cpu_cores=None, memory_mb=None):
+        """Noter une activité du worker (heartbeat=True: il envoie des heartbeats)"""
+        if worker_id is None:
+            return
+        try:
+            worker_id = int(worker_id)
+        except (TypeError, ValueError):
+            return
+        
+        with self._lock:
+            entry = self._workers.setdefault(worker_id, {
+                "worker_id": worker_id, "heartbeat": False,
+                "cpu_cores": None, "memory_mb": None
+            })
+            entry["last_seen"] = time.time()
+            entry["dirty"] = True
+            entry["heartbeat"] = entry["heartbeat"] or heartbeat
+            if cpu_cores is not None:
+                entry["cpu_cores"] = cpu_cores
+            if memory_mb is not None:
+                entry["memory_mb"] = memory_mb
+    
+    def set_capacity(self, worker_id, cpu_cores, memory_mb):
+        """Renseigner la capacité d'une entrée existante (sans toucher last_seen)"""
+        with self._lock:
+            entry = self._workers.get(worker_id)
+            if entry is not None:
+                entry["cpu_cores"] = cpu_cores
+                entry["memory_mb"] = memory_mb
+    
+    def is_alive(self, entry, now=None):
+        window = HEARTBEAT_TIMEOUT_SECONDS if entry["heartbeat"] else ACTIVE_WINDOW_SECONDS
+        return (now or time.time()) - entry["last_seen"] <= window
+    
+    def active(self):
+        """Entrées des workers vivants"""
+        now = time.time()
+        with self._lock:
+            return [dict(entry) for entry in self._workers.values() if self.is_alive(entry, now)]
+    
+    def snapshot(self):
+        """Copie de toutes les entrées (voir flushed une fois recopiées en base)"""
+        with self._lock:
+            return [dict(entry) for entry in self._workers.values()]
+    
+    def flushed(self, entries, now=None):
+        """Après le commit du reaper: marquer les entrées du snapshot comme
+        recopiées et oublier celles hors de leur fenêtre d'activité, sauf si
+        le worker s'est manifesté entre-temps"""
+        with self._lock:
+            for copy in entries:
+                entry = self._workers.get(copy["worker_id"])
+                if entry is None or entry["last_seen"] != copy["last_seen"]:
+                    continue
+                if self.is_alive(entry, now):
+                    entry["dirty"] = False
+                else:
+                    del self._workers[copy["worker_id"]]
+    
+    def forget(self, worker_ids):
+        with self._lock:
+            for worker_id in worker_ids:
+                self._workers.pop(worker_id, None)
+    
+    def clear(self):
+        with self._lock:
+            self._workers.clear()
+    
+    def load(self, conn):
+        """Reprendre les workers récemment actifs après un redémarrage"""
+        since = datetime.now() - timedelta(seconds=ACTIVE_WINDOW_SECONDS)
+        c = conn.cursor()
+        c.execute(
+            """SELECT id, last_seen, cpu_cores, memory_mb FROM workers
+               WHERE is_active = 1 AND last_seen > ?""",
+            (since.isoformat(),)
+        )
+        with self._lock:
+            for row in c.fetchall():
+                try:
+                    last_seen = datetime.fromisoformat(row["last_seen"]).timestamp()
+                except (TypeError, ValueError):
+                    continue
+                self._workers.setdefault(row["id"], {
+                    "worker_id": row["id"], "heartbeat": False, "dirty": False,
+                    "last_seen": last_seen, "cpu_cores": row["cpu_cores"],
+                    "memory_mb": row["memory_mb"]
+                })
+
+liveness = WorkerLiveness()
+
+def reap_workers(conn, now=None):
+    """Une passe du reaper: workers morts, baux, last_seen
+    
+    - les tâches (et doublons spéculatifs) des workers à heartbeat silencieux
+      depuis HEARTBEAT_TIMEOUT_SECONDS sont remises en attente;
+    - les baux des tâches des workers vivants à heartbeat sont prolongés:
+      une tâche longue n'expire plus tant que son worker répond;
+    - last_seen est recopié en base pour les workers actifs depuis la
+      passe précédente, puis les entrées hors de leur fenêtre d'activité
+      sont retirées de la table en mémoire.
+    Renvoie le nombre de tâches remises en attente.
+    """
+    now = now or time.time()
+    entries = liveness.snapshot()
+    
+    dead = [str(e["worker_id"]) for e in entries if e["heartbeat"] and not liveness.is_alive(e, now)]
+    beating = [str(e["worker_id"]) for e in entries if e["heartbeat"] and liveness.is_alive(e, now)]
+    dirty = [e for e in entries if e["dirty"]]
+    unknown = [e["worker_id"] for e in entries if e["cpu_cores"] is None]
+    
+    if not (dead or beating or dirty or unknown):
+        liveness.flushed(entries, now)
+        return 0
+    
+    c = conn.cursor()
+    requeued = 0
+    c.execute("BEGIN IMMEDIATE")
+    try:
+        if dead:
+            marks = ", ".join("?" * len(dead))
+            c.execute(
+                f"""UPDATE tasks SET
+                     status = 'pending',
+                     assigned_worker = NULL,
+                     lease_expires_at = NULL,
+                     speculative_worker = NULL,
+                     speculated_at = NULL
+                    WHERE status = 'running' AND assigned_worker IN ({marks})""",
+                dead
+            )
+            requeued = c.rowcount
+            c.execute(
+                f"""UPDATE tasks SET speculative_worker = NULL, speculated_at = NULL
+                    WHERE status = 'running' AND speculative_worker IN ({marks})""",
+                dead
+            )
+        
+        if beating:
+            lease_expires_at = (datetime.fromtimestamp(now) + timedelta(seconds=TASK_LEASE_SECONDS)).isoformat()
+            c.execute(
+                f"""UPDATE tasks SET lease_expires_at = ?
+                    WHERE status = 'running' AND assigned_worker IN ({', '.join('?' * len(beating))})""",
+                [lease_expires_at] + beating
+            )
+        
+        c.executemany(
+            "UPDATE workers SET last_seen = ?, is_active = 1 WHERE id = ?",
+            [(datetime.fromtimestamp(e["last_seen"]).isoformat(), e["worker_id"]) for e in dirty]
+        )
+        if dead:
+            c.execute(f"UPDATE workers SET is_active = 0 WHERE id IN ({', '.join('?' * len(dead))})", dead)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    liveness.flushed(entries, now)
+    
+    if unknown:
+        c.execute(
+            f"SELECT id, cpu_cores, memory_mb FROM workers WHERE id IN ({', '.join('?' * len(unknown))})",
+            unknown
+        )
+        rows = c.fetchall()
+        for row in rows:
+            liveness.set_capacity(row["id"], row["cpu_cores"] or 0, row["memory_mb"] or 0)
+        # Identifiants inconnus de la table workers: ne plus les interroger
+        liveness.forget(set(unknown) - {row["id"] for row in rows})
+    
+    if dead:
+        logger.warning(f"💀 {len(dead)} worker(s) sans heartbeat: {requeued} tâche(s) remise(s) en attente")
+    if requeued:
+        task_signal.notify()
+        status_signal.notify()
+    
+    return requeued
+
+def reaper_loop():
+    """Thread du reaper (toutes les REAPER_INTERVAL_SECONDS)"""
+    while True:
+        time.sleep(REAPER_INTERVAL_SECONDS)
+        try:
+            conn = db_pool.acquire()
+            try:
+                reap_workers(conn)
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.error(f"❌ Erreur reaper: {e}")
+
+def start_reaper():
+    """Démarrer le reaper (une seule fois par processus)"""
+    if getattr(start_reaper, "thread", None) is None:
+        start_reaper.thread = threading.Thread(target=reaper_loop, name="reaper", daemon=True)
+        start_reaper.thread.start()
+
+# Transitions relevées par les triggers du moteur, avec l'état courant de la
+# tâche (NULL si elle a été supprimée)
+DRAIN_INBOX_SQL = f"""
+    SELECT i.seq, i.task_id, t.status, t.assigned_worker, t.retry_after, t.last_worker,
+           (SELECT weight FROM queues q WHERE q.name = t.queue) AS queue_weight,
+           {DISPATCH_COLUMNS}
+    FROM dispatch_inbox i LEFT JOIN tasks t ON t.id = i.task_id
+    WHERE i.seq > ?
+    ORDER BY i.seq
+"""
+
+class DispatchEngine:
+    """Moteur de dispatch en mémoire (DISPATCH_ENGINE=memory)
+    
+    Les tâches en attente sont rangées dans un tas par file (priorité
+    décroissante puis FIFO), les réessais différés dans un tas par échéance,
+    et les tâches en cours dans un dictionnaire: un claim ne touche plus la
+    base et ne prend qu'un verrou en mémoire. Le partage équitable pondéré,
+    la capacité des workers et l'évitement du worker d'un échec suivent
+    plan_dispatch.
+    
+    Persistance:
+    - les claims (et doublons spéculatifs) sont journalisés en mémoire et
+      écrits en base par lots toutes les ENGINE_FLUSH_INTERVAL_SECONDS par
+      le thread d'écriture: un arrêt brutal perd au plus un intervalle de
+      claims, dont les tâches restent 'pending' en base et seront
+      redistribuées;
+    - les résultats passent par le même journal, dans l'ordre, et la route
+      attend le commit du lot (commit groupé): un résultat acquitté est
+      durable;
+    - toute autre transition (création, dépendances, réessai, bail expiré,
+      reaper, suppression) arrive par dispatch_inbox, alimentée par des
+      triggers: les routes existantes n'ont pas à connaître le moteur.
+    Au démarrage, l'état est reconstruit depuis la table tasks.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._drain_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._started = False
+        self._queues = {}      # file -> {"weight", "service", "heap", "pending"}
+        self._pending = {}     # task_id -> [jeton, ligne, prête]
+        self._delayed = []     # tas (retry_after, task_id, jeton)
+        self._running = {}     # task_id -> worker
+        self._journal = []
+        self._speculating = set()
+        self._fleet = {}       # type -> EWMA du parc (durée attendue, voir expected_seconds)
+        self._tokens = 0
+        self._inbox_seq = 0
+        self._purged_seq = 0
+        self._synced = None
+        self._next_lease_check = 0.0
+        self.stats = Counters("claims", "flushes", "journaled", "drained")
+    
+    # ---- état en mémoire (appelé sous self._lock) ----
+    
+    def _lane(self, name, weight=None):
+        lane = self._queues.get(name)
+        if lane is None:
+            lane = self._queues[name] = {
+                "weight": 1.0 if weight is None else weight,
+                "service": 0.0, "heap": [], "pending": 0
+            }
+        elif weight is not None:
+            lane["weight"] = weight
+        return lane
+    
+    def _push_ready(self, entry):
+        token, row, _ = entry
+        lane = self._lane(row['queue'])
+        if not lane["pending"]:
+            # Une file qui (re)devient active repart du service minimal des
+            # files actives (comme le trigger de la table queues)
+            active = [other["service"] for other in self._queues.values() if other["pending"]]
+            if active:
+                lane["service"] = max(lane["service"], min(active))
+        entry[2] = True
+        lane["pending"] += 1
+        heapq.heappush(lane["heap"], (-row['priority'], row['created_at'], row['id'], token))
+    
+    def _add(self, row, now_iso):
+        self._tokens += 1
+        entry = [self._tokens, row, False]
+        self._pending[row['id']] = entry
+        if row['retry_after'] and row['retry_after'] > now_iso:
+            heapq.heappush(self._delayed, (row['retry_after'], row['id'], self._tokens))
+        else:
+            self._push_ready(entry)
+    
+    def _remove(self, task_id):
+        entry = self._pending.pop(task_id, None)
+        if entry is not None and entry[2]:
+            self._queues[entry[1]['queue']]["pending"] -= 1
+        self._running.pop(task_id, None)
+    
+    def _release_due(self, now_iso):
+        """Passer dans leur file les réessais dont l'attente est écoulée"""
+        while self._delayed and self._delayed[0][0] <= now_iso:
+            _, task_id, token = heapq.heappop(self._delayed)
+            entry = self._pending.get(task_id)
+            if entry is not None and entry[0] == token:
+                self._push_ready(entry)
+    
+    def _apply_inbox(self, row, now_iso):
+        task_id = row['task_id']
+        self._remove(task_id)
+        if row['status'] == 'pending':
+            if row['queue_weight'] is not None:
+                self._lane(row['queue'], row['queue_weight'])
+            self._add(row, now_iso)
+        elif row['status'] == 'running':
+            self._running[task_id] = row['assigned_worker']
+    
+    def _pop_fitting(self, lane, cpu_left, memory_left, platform, speed, now,
+                     last_worker, avoid_due, skipped):
+        """Tâche de la file qui tient dans la capacité restante, choisie par
+        match_speed parmi les SPEED_MATCH_WINDOW premières
+        
+        Les tâches qui ne tiennent pas sont mises de côté (remises dans le tas
+        après le claim); au plus ENGINE_SCAN_LIMIT par file et par claim. Les
+        candidates non retenues retournent aussitôt dans le tas.
+        """
+        heap = lane["heap"]
+        candidates = []
+        while heap and len(candidates) < SPEED_MATCH_WINDOW and len(skipped) < ENGINE_SCAN_LIMIT:
+            item = heapq.heappop(heap)
+            entry = self._pending.get(item[2])
+            if entry is None or entry[0] != item[3]:
+                continue  # Entrée périmée (tâche retirée ou remise en attente)
+            row = entry[1]
+            fits = (
+                row['req_cpu_cores'] <= cpu_left
+                and row['req_memory_mb'] <= memory_left
+                and (row['req_platform'] is None or platform is None
+                     or row['req_platform'] in platform)
+                and not (row['retry_after'] and row['last_worker'] == last_worker
+                         and row['retry_after'] > avoid_due)
+            )
+            if fits:
+                candidates.append((item, row))
+            else:
+                skipped.append((heap, item))
+        if not candidates:
+            return None
+        
+        row = match_speed([row for _, row in candidates], speed, self._fleet, now)
+        for item, other in candidates:
+            if other is not row:
+                heapq.heappush(heap, item)
+        del self._pending[row['id']]
+        lane["pending"] -= 1
+        return row
+    
+    # ---- démarrage, synchronisation ----
+    
+    def start(self):
+        """Reconstruire l'état depuis la base et lancer le thread d'écriture
+        
+        Appelé au premier usage: le processus parent du reloader Flask ne
+        démarre jamais de moteur concurrent.
+        """
+        if self._started:
+            return
+        with self._start_lock:
+            if self._started:
+                return
+            conn = db_pool.acquire()
+            try:
+                self.load(conn)
+            finally:
+                conn.close()
+            threading.Thread(target=self.writer_loop, name="dispatch-writer", daemon=True).start()
+            atexit.register(self.flush)
+            self._started = True
+    
+    def load(self, conn):
+        """Charger les tâches en attente et en cours (la boîte de réception
+        est vidée dans la même transaction)"""
+        now_iso = datetime.now().isoformat()
+        c = conn.cursor()
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            c.execute("DELETE FROM dispatch_inbox")
+            c.execute("SELECT name, weight, service FROM queues")
+            queues = c.fetchall()
+            c.execute(
+                f"""SELECT {DISPATCH_COLUMNS}, status, assigned_worker, retry_after, last_worker
+                    FROM tasks WHERE status IN ('pending', 'running')"""
+            )
+            rows = c.fetchall()
+            fleet = fleet_runtimes(c)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        
+        with self._lock:
+            self._fleet = fleet
+            for row in queues:
+                self._lane(row['name'], row['weight'])["service"] = row['service']
+            for row in rows:
+                if row['status'] == 'pending':
+                    self._add(row, now_iso)
+                else:
+                    self._running[row['id']] = row['assigned_worker']
+        
+        logger.info(f"🧠 Moteur de dispatch en mémoire: {len(self._pending)} tâche(s) en attente, "
+                    f"{len(self._running)} en cours")
+    
+    def drain(self, c, version=None):
+        """Appliquer les transitions de dispatch_inbox à l'état en mémoire"""
+        with self._drain_lock:
+            c.execute(DRAIN_INBOX_SQL, (self._inbox_seq,))
+            rows = c.fetchall()
+            if rows:
+                now_iso = datetime.now().isoformat()
+                with self._lock:
+                    for row in rows:
+                        self._apply_inbox(row, now_iso)
+                    self._inbox_seq = rows[-1]['seq']
+                self.stats.increment("drained", len(rows))
+            if version is not None:
+                self._synced = version
+        return len(rows)
+    
+    def sync(self):
+        """Relire la boîte de réception si de nouvelles tâches ont été signalées"""
+        version = task_signal.version()
+        if version == self._synced:
+            return
+        conn = db_pool.acquire()
+        try:
+            self.drain(conn.cursor(), version)
+        finally:
+            conn.close()
+    
+    # ---- dispatch ----
+    
+    def claim(self, worker_id, max_tasks, lease_seconds=TASK_LEASE_SECONDS, capacity=None):
+        """Équivalent en mémoire de claim_tasks (mêmes tâches renvoyées)"""
+        self.start()
+        self.sync()
+        
+        cpu_left = capacity["cpu_cores"] if capacity else float("inf")
+        memory_left = capacity["memory_mb"] if capacity else float("inf")
+        platform = capacity["platform"] if capacity else None
+        speed = capacity["speed"] if capacity else 1.0
+        
+        now = datetime.now()
+        now_iso = now.isoformat()
+        lease_expires_at = (now + timedelta(seconds=lease_seconds)).isoformat()
+        avoid_due = (now - timedelta(seconds=RETRY_OTHER_WORKER_SECONDS)).isoformat()
+        last_worker = None if worker_id is None else str(worker_id)
+        
+        with self._lock:
+            self._release_due(now_iso)
+            
+            active = [(lane["service"], name) for name, lane in self._queues.items() if lane["pending"]]
+            heapq.heapify(active)
+            
+            rows, service, skipped = [], {}, []
+            while active and len(rows) < max_tasks:
+                served, name = heapq.heappop(active)
+                lane = self._queues[name]
+                row = self._pop_fitting(lane, cpu_left, memory_left, platform, speed, now,
+                                        last_worker, avoid_due, skipped)
+                if row is None:
+                    continue  # Plus rien dans cette file ne tient sur ce worker
+                
+                rows.append(row)
+                cpu_left -= row['req_cpu_cores']
+                memory_left -= row['req_memory_mb']
+                
+                lane["service"] = served + 1.0 / max(lane["weight"], 0.001)
+                service[name] = lane["service"]
+                if lane["pending"]:
+                    heapq.heappush(active, (lane["service"], name))
+            
+            for heap, item in skipped:
+                heapq.heappush(heap, item)
+            
+            for row in rows:
+                self._running[row['id']] = last_worker
+            if rows:
+                self._journal.append(("claim", worker_id, lease_expires_at, now_iso,
+                                      [row['id'] for row in rows], service))
+        
+        # Worker inactif: dupliquer une tâche traînarde (lecture en base)
+        speculative = None
+        if not rows:
+            speculative = self.speculate(worker_id, capacity, now)
+            rows = [speculative] if speculative is not None else []
+        
+        self.stats.increment("claims", len(rows))
+        return [claimed_task(row, lease_expires_at, row is speculative) for row in rows]
+    
+    def speculate(self, worker_id, capacity, now):
+        if SPECULATION_BUDGET <= 0 or capacity is None or not self._running:
+            return None
+        with self._lock:
+            running, speculating = len(self._running), len(self._speculating)
+        if speculating + 1 > running * SPECULATION_BUDGET:
+            return None
+        conn = db_pool.acquire()
+        try:
+            row = pick_straggler(conn.cursor(), worker_id, capacity, now, running, speculating)
+        finally:
+            conn.close()
+        
+        with self._lock:
+            if row is None or row['id'] in self._speculating:
+                return None
+            self._speculating.add(row['id'])
+            self._journal.append(("speculate", str(worker_id), now.isoformat(), row['id']))
+        
+        speculation_stats.increment("launched")
+        logger.info(f"🏎️ Tâche {row['id']} dupliquée sur le worker {worker_id} "
+                    f"(worker {row['assigned_worker']} en retard)")
+        return row
+    
+    def holds(self, task_id, worker_id):
+        """La tâche est-elle en cours sur ce worker (claim peut-être pas encore écrit)"""
+        with self._lock:
+            return task_id in self._running and self._running[task_id] == str(worker_id)
+    
+    def speculates(self, task_id):
+        """La tâche a-t-elle un doublon pas encore écrit en base"""
+        with self._lock:
+            return task_id in self._speculating
+    
+    def set_weight(self, name, weight):
+        with self._lock:
+            self._lane(name, weight)
+    
+    def preview(self, limit):
+        """Aperçu des `limit` prochaines tâches d'un claim sans contrainte de
+        capacité (équivalent en mémoire de plan_dispatch, sans rien réserver):
+        les claims pas encore écrits en base n'y figurent plus"""
+        self.start()
+        self.sync()
+        
+        with self._lock:
+            self._release_due(datetime.now().isoformat())
+            
+            # Tête de chaque file active (entrées périmées écartées)
+            heads = {}
+            for name, lane in self._queues.items():
+                if lane["pending"]:
+                    items = heapq.nsmallest(limit, (
+                        item for item in lane["heap"]
+                        if item[2] in self._pending and self._pending[item[2]][0] == item[3]
+                    ))
+                    heads[name] = [self._pending[item[2]][1] for item in items]
+            
+            active = [(self._queues[name]["service"], name) for name in heads if heads[name]]
+            heapq.heapify(active)
+            rows = []
+            while active and len(rows) < limit:
+                served, name = heapq.heappop(active)
+                rows.append(heads[name].pop(0))
+                if heads[name]:
+                    weight = max(self._queues[name]["weight"], 0.001)
+                    heapq.heappush(active, (served + 1.0 / weight, name))
+            return rows
+    
+    # ---- écriture différée ----
+    
+    def submit(self, kind, *args, timeout=30):
+        """Journaliser une opération et attendre son commit (commit groupé)"""
+        self.start()
+        future = Future()
+        with self._lock:
+            self._journal.append((kind,) + args + (future,))
+        self._wake.set()
+        return future.result(timeout)
+    
+    def apply_results(self, worker_id, results):
+        """apply_results dans le prochain lot du thread d'écriture"""
+        return self.submit("results", worker_id, results)
+    
+    def commit(self):
+        """Attendre que tout ce qui est journalisé soit écrit en base"""
+        return self.submit("barrier")
+    
+    def writer_loop(self):
+        """Thread d'écriture: un lot toutes les ENGINE_FLUSH_INTERVAL_SECONDS,
+        ou dès qu'une route attend un commit"""
+        while True:
+            self._wake.wait(ENGINE_FLUSH_INTERVAL_SECONDS)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"❌ Erreur écriture du moteur de dispatch: {e}")
+                time.sleep(ENGINE_FLUSH_INTERVAL_SECONDS)
+    
+    def flush(self):
+        """Écrire le journal en une transaction, puis relire la boîte de réception"""
+        with self._flush_lock:
+            with self._lock:
+                ops, self._journal = self._journal, []
+            
+            lease_check = time.monotonic() >= self._next_lease_check
+            requeued = 0
+            
+            conn = db_pool.acquire()
+            try:
+                c = conn.cursor()
+                if ops or lease_check or self._inbox_seq > self._purged_seq:
+                    done, requeued = self.write(conn, c, ops, lease_check)
+                    for future, value in done:
+                        if isinstance(value, Exception):
+                            future.set_exception(value)
+                        else:
+                            future.set_result(value)
+                
+                self.drain(c)
+            finally:
+                conn.close()
+        
+        if requeued:
+            task_signal.notify()
+        if requeued or any(op[0] in ("claim", "speculate") for op in ops):
+            status_signal.notify()
+    
+    def write(self, conn, c, ops, lease_check):
+        """Appliquer un lot d'opérations; renvoie (futures à résoudre, tâches requeue)"""
+        now = datetime.now().isoformat()
+        purge_seq = self._inbox_seq
+        done = []
+        
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            requeued = requeue_expired_leases(c, now) if lease_check else 0
+            
+            for op in ops:
+                if op[0] == "claim":
+                    _, worker_id, lease_expires_at, started_at, task_ids, service = op
+                    c.executemany(
+                        """UPDATE tasks SET 
+                            status = 'running',
+                            assigned_worker = ?,
+                            lease_expires_at = ?,
+                            started_at = ?,
+                            speculative_worker = NULL,
+                            speculated_at = NULL
+                           WHERE id = ? AND status = 'pending'""",
+                        [(worker_id, lease_expires_at, started_at, task_id) for task_id in task_ids]
+                    )
+                    c.executemany("DELETE FROM task_output WHERE task_id = ?",
+                                  [(task_id,) for task_id in task_ids])
+                    c.executemany("UPDATE queues SET service = ? WHERE name = ?",
+                                  [(served, name) for name, served in service.items()])
+                elif op[0] == "speculate":
+                    c.execute(
+                        """UPDATE tasks SET speculative_worker = ?, speculated_at = ?
+                           WHERE id = ? AND status = 'running' AND speculative_worker IS NULL""",
+                        op[1:]
+                    )
+                    c.execute(CLEAR_SPECULATIVE_OUTPUT_SQL, (op[3],))
+                elif op[0] == "results":
+                    # Un résultat invalide n'annule pas le reste du lot
+                    c.execute("SAVEPOINT engine_results")
+                    try:
+                        done.append((op[-1], apply_results(c, op[1], op[2], now)))
+                        c.execute("RELEASE engine_results")
+                    except Exception as e:
+                        c.execute("ROLLBACK TO engine_results")
+                        c.execute("RELEASE engine_results")
+                        done.append((op[-1], e))
+                else:
+                    done.append((op[-1], None))
+            
+            c.execute("DELETE FROM dispatch_inbox WHERE seq <= ?", (purge_seq,))
+            fleet = fleet_runtimes(c) if any(op[0] == "results" for op in ops) else None
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            # Les claims restent journalisés pour le lot suivant; les routes
+            # qui attendaient un commit reçoivent l'erreur
+            with self._lock:
+                self._journal[:0] = [op for op in ops if op[0] in ("claim", "speculate")]
+            for op in ops:
+                if op[0] not in ("claim", "speculate"):
+                    op[-1].set_exception(e)
+            raise
+        
+        self._purged_seq = purge_seq
+        if lease_check:
+            self._next_lease_check = time.monotonic() + ENGINE_LEASE_CHECK_SECONDS
+        with self._lock:
+            self._speculating.difference_update(op[3] for op in ops if op[0] == "speculate")
+            if fleet is not None:
+                self._fleet = fleet
+        self.stats.increment("flushes")
+        self.stats.increment("journaled", len(ops))
+        return done, requeued
+    
+    def snapshot(self):
+        """État du moteur pour /api/stats"""
+        self.start()
+        with self._lock:
+            state = {
+                "mode": "memory",
+                "pending": sum(lane["pending"] for lane in self._queues.values()),
+                "delayed": len(self._pending) - sum(lane["pending"] for lane in self._queues.values()),
+                "running": len(self._running),
+                "journal": len(self._journal)
+            }
+        return dict(state, **self.stats.snapshot())
+
+engine = DispatchEngine() if DISPATCH_ENGINE == "memory" else None
+
+def plan_job(c, task_type, count, deadline=None, estimated_seconds=None):
+    """Estimer la durée d'un job et le nombre de workers nécessaires
+    
+    Le débit de chaque worker actif est cpu_cores / durée attendue sur ce
+    worker (EWMA du parc ajustée par sa vitesse mesurée pour ce type). Les
+    workers sont retenus du plus rapide au plus lent jusqu'à tenir
+    l'échéance; le p95 du parc borne la dernière vague de tâches.
+    """
+    c.execute(
+        "SELECT ewma, p95 FROM worker_runtime_stats WHERE worker_id = 0 AND task_type = ?",
+        (task_type,)
+    )
+    fleet = c.fetchone()
+    if estimated_seconds is None and fleet is None:
+        raise ValueError(f"Aucun historique pour le type '{task_type}': fournir estimated_seconds")
+    
+    per_task = estimated_seconds if estimated_seconds is not None else fleet['ewma']
+    tail = max(per_task, fleet['p95'] if fleet else per_task)
+    
+    active_ids = [entry["worker_id"] for entry in liveness.active()]
+    c.execute(
+        f"SELECT id, name, cpu_cores FROM workers WHERE id IN ({', '.join('?' * len(active_ids))})",
+        active_ids
+    )
+    workers = []
+    for row in c.fetchall():
+        speed = worker_speed(c, row['id'], task_type)
+        workers.append({
+            "worker_id": row['id'],
+            "name": row['name'],
+            "speed": round(speed, 2),
+            "tasks_per_second": (row['cpu_cores'] or 1) * speed / max(per_task, 0.001)
+        })
+    workers.sort(key=lambda worker: worker["tasks_per_second"], reverse=True)
+    
+    selected, throughput, duration = [], 0.0, None
+    for worker in workers:
+        selected.append(worker)
+        throughput += worker["tasks_per_second"]
+        duration = count / throughput + tail / worker["speed"]
+        if deadline is not None and duration <= deadline:
+            break
+    
+    return {
+        "task_type": task_type,
+        "count": count,
+        "estimated_seconds_per_task": round(per_task, 3),
+        "deadline": deadline,
+        "active_workers": len(workers),
+        "workers_needed": len(selected) if duration is not None else None,
+        "estimated_duration": round(duration, 1) if duration is not None else None,
+        "feasible": duration is not None and (deadline is None or duration <= deadline),
+        "workers": [
+            dict(worker, tasks_per_second=round(worker["tasks_per_second"], 3))
+            for worker in selected
+        ]
+    }
+
+def get_task_stats():
+    """Obtenir les statistiques des tâches (compteurs maintenus par triggers)"""
+    conn = get_db_connection()
+    c = conn.cursor()
+    
+    c.execute("SELECT status, count FROM task_counters")
+    counters = {row["status"]: row["count"] for row in c.fetchall()}
+    
+    conn.close()
+    
+    return {
+        "total": sum(counters.values()),
+        "completed": counters.get("completed", 0),
+        "pending": counters.get("pending", 0),
+        "running": counters.get("running", 0),
+        "blocked": counters.get("blocked", 0),
+        "failed": counters.get("failed", 0)
+    }
+
+# ==================== ROUTES DASHBOARD ====================
+
+@app.route("/")
+def dashboard():
+    """Dashboard principal"""
+    try:
+        # Statistiques
+        worker_stats = get_worker_stats()
+        task_stats = get_task_stats()
+        
+        # Calculer le taux de complétion
+        completion_rate = 0
+        if task_stats["total"] > 0:
+            completion_rate = round(task_stats["completed"] / task_stats["total"] * 100, 1)
+        
+        # Récupérer les workers récents
+        conn = get_db_connection()
+        c = conn.cursor()
+        
+        c.execute("""
+            SELECT name, platform, last_seen, tasks_completed
+            FROM workers 
+            WHERE is_active = 1
+            ORDER BY last_seen DESC 
+            LIMIT 10
+        """)
+        recent_workers = [dict(row) for row in c.fetchall()]
+        
+        # Récupérer les tâches récentes
+        c.execute("""
+            SELECT id, name, status, created_at, assigned_worker
+            FROM tasks 
+            ORDER BY created_at DESC 
+            LIMIT 10
+        """)
+        recent_tasks = [dict(row) for row in c.fetchall()]
+        
+        conn.close()
+        
+        # Générer l'URL du coordinateur
+        if IS_RAILWAY:
+            coordinator_url = f"https://{request.host}"
+        else:
+            coordinator_url = f"http://{request.host}"
+        
+        return render_template("index.html",
+            active_workers=worker_stats["active_workers"],
+            total_cpu=worker_stats["total_cpu"],
+            total_memory=worker_stats["total_memory"],
+            total_tasks=task_stats["total"],
+            completed_tasks=task_stats["completed"],
+            pending_tasks=task_stats["pending"],
+            failed_tasks=task_stats["failed"],
+            completion_rate=completion_rate,
+            recent_workers=recent_workers,
+            recent_tasks=recent_tasks,
+            coordinator_url=coordinator_url,
+            is_railway=IS_RAILWAY,
+            current_time=datetime.now().strftime("%H:%M:%S")
+        )
+        
+    except Exception as e:
+        logger.error(f"❌ Erreur dashboard: {e}")
+        return render_template("error.html", error=str(e))
+
+@app.route("/submit", methods=["POST"])
+def submit_task():
+    """Soumettre une nouvelle tâche depuis le dashboard"""
+    try:
+        name = request.form.get("name", "Nouvelle tâche")
+        task_type = request.form.get("type", "shell")
+        command = request.form.get("command", "")
+        
+        if not name or not command:
+            flash("❌ Nom et commande sont requis", "danger")
+            return redirect(url_for("dashboard"))
+        
+        # Créer l'objet commande
+        command_obj = {"type": task_type, "command": command}
+        
+        conn = get_db_connection()
+        c = conn.cursor()
+        
+        c.execute(
+            """INSERT INTO tasks (name, type, command, status) 
+               VALUES (?, ?, ?, 'pending')""",
+            (name, task_type, json.dumps(command_obj))
+        )
+        
+        conn.commit()
+        conn.close()
+        task_signal.notify()
+        
+        logger.info(f"✅ Tâche soumise: {name}")
+        flash("✅ Tâche soumise avec succès !", "success")
+        
+    except Exception as e:
+        logger.error(f"❌ Erreur soumission tâche: {e}")
+        flash(f"❌ Erreur: {str(e)}", "danger")
+    
+    return redirect(url_for("dashboard"))
+
+# ==================== ROUTES API ====================
+
+@app.route("/api/health")
+def api_health():
+    """Endpoint de santé de l'API"""
+    return jsonify({
+        "service": "BI-COMPUTE Hackathon Demo",
+        "status": "healthy",
+        "version": "2.0.0",
+        "timestamp": datetime.now().isoformat(),
+        "environment": "railway" if IS_RAILWAY else "development",
+        "database": "connected",
+        "url": f"https://{request.host}" if IS_RAILWAY else f"http://{request.host}",
+        "endpoints": {
+            "workers": "/api/workers",
+            "tasks": "/api/tasks",
+            "tasks_batch": "/api/tasks/batch",
+            "claim": "/api/tasks/claim",
+            "heartbeat": "/api/workers/<id>/heartbeat",
+            "results": "/api/tasks/results",
+            "status": "/api/tasks/status",
+            "export": "/api/tasks/export",
+            "resubmit": "/api/tasks/resubmit",
+            "jobs": "/api/jobs",
+            "queues": "/api/queues",
+            "estimate": "/api/estimate",
+            "stats": "/api/stats",
+            "demo": "/api/demo"
+        }
+    })
+
+@app.route("/api/workers/register", methods=["POST"])
+def api_register_worker():
+    """Enregistrer un nouveau worker"""
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "Données JSON requises"}), 400
+        
+        name = data.get("name", f"Worker-{datetime.now().strftime('%H%M%S')}")
+        cpu_cores = data.get("cpu_cores", 1)
+        memory_mb = data.get("memory_mb", 1024)
+        platform = data.get("platform", "unknown")
+        
+        now = datetime.now().isoformat()
+        
+        conn = get_db_connection()
+        c = conn.cursor()
+        
+        # Vérifier si le worker existe déjà
+        c.execute(
+            "SELECT id FROM workers WHERE name = ? AND is_active = 1",
+            (name,)
+        )
+        existing = c.fetchone()
+        
+        if existing:
+            # Mettre à jour le worker existant
+            worker_id = existing['id']
+            c.execute(
+                """UPDATE workers SET 
+                    cpu_cores = ?, 
+                    memory_mb = ?, 
+                    platform = ?, 
+                    last_seen = ?,
+                    is_active = 1
+                   WHERE id = ?""",
+                (cpu_cores, memory_mb, platform, now, worker_id)
+            )
+            action = "updated"
+        else:
+            # Créer un nouveau worker
+            c.execute(
+                """INSERT INTO workers 
+                   (name, cpu_cores, memory_mb, platform, last_seen, is_active)
+                   VALUES (?, ?, ?, ?, ?, 1)""",
+                (name, cpu_cores, memory_mb, platform, now)
+            )
+            worker_id = c.lastrowid
+            action = "registered"
+        
+        conn.commit()
+        conn.close()
+        
+        liveness.seen(worker_id, cpu_cores=cpu_cores, memory_mb=memory_mb)
+        
+        logger.info(f"👷 Worker {action}: {name} (ID: {worker_id})")
+        
+        return jsonify({
+            "worker_id": worker_id,
+            "name": name,
+            "action": action,
+            "message": f"Worker {action} successfully",
+            "heartbeat_interval": HEARTBEAT_INTERVAL_SECONDS
+        })
+        
+    except Exception as e:
+        logger.error(f"❌ Erreur registration worker: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/workers/<int:worker_id>/heartbeat", methods=["POST"])
+def api_worker_heartbeat(worker_id):
+    """Heartbeat d'un worker (mémoire uniquement, aucune écriture en base)
+    
+    Un worker qui envoie des heartbeats garde ses baux tant qu'il répond;
+    après HEARTBEAT_TIMEOUT_SECONDS de silence, le reaper remet ses tâches
+    en attente.
+    """
+    try:
+        liveness.seen(worker_id, heartbeat=True)
+        return jsonify({
+            "worker_id": worker_id,
+            "interval": HEARTBEAT_INTERVAL_SECONDS,
+            "timeout": HEARTBEAT_TIMEOUT_SECONDS
+        })
+        
+    except Exception as e:
+        logger.error(f"❌ Erreur heartbeat worker: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/tasks", methods=["POST"])
+def api_create_task():
+    """Créer une nouvelle tâche via API"""
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "Données JSON requises"}), 400
+        
+        # Clé d'idempotence: dans le corps ou l'en-tête Idempotency-Key
+        if data.get("idempotency_key") is None and request.headers.get("Idempotency-Key"):
+            data = dict(data, idempotency_key=request.headers["Idempotency-Key"])
+        
+        task = parse_task_payload(data)
+        name, task_type, command, priority, queue = task[:5]
+        cache_key, idempotency_key = task[11:13]
+        
+        conn = get_db_connection()
+        c = conn.cursor()
+        
+        now = datetime.now().isoformat()
+        c.execute(INSERT_TASK_SQL, task + (now, None, 0))
+        
+        # Soumission rejouée: renvoyer la tâche d'origine, sans nouvel envoi
+        replayed = c.rowcount == 0
+        if replayed:
+            task_id = find_idempotent_tasks(c, [idempotency_key])[idempotency_key]
+            cached = 0
+        else:
+            task_id = c.lastrowid
+            cached = resolve_cached_tasks(c, task_id, task_id, now) if cache_key else 0
+        c.execute("SELECT status FROM tasks WHERE id = ?", (task_id,))
+        status = c.fetchone()["status"]
+        conn.commit()
+        conn.close()
+        
+        if replayed:
+            logger.info(f"🔂 Soumission rejouée: tâche {task_id} (clé {idempotency_key})")
+            return jsonify({
+                "task_id": task_id,
+                "name": name,
+                "type": task_type,
+                "priority": priority,
+                "queue": queue,
+                "status": status,
+                "replayed": True,
+                "message": "Task already submitted"
+            }), 200
+        
+        task_signal.notify()
+        if cached:
+            status_signal.notify()
+        
+        logger.info(f"📝 Tâche créée: {name} (ID: {task_id})")
+        
+        return jsonify({
+            "task_id": task_id,
+            "name": name,
+            "type": task_type,
+            "priority": priority,
+            "queue": queue,
+            "status": status,
+            "cached": bool(cached),
+            "replayed": False,
+            "message": "Task created successfully"
+        }), 201
+        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"❌ Erreur création tâche: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/tasks/batch", methods=["POST"])
+def api_create_tasks_batch():
+    """Créer des tâches en masse (tableau JSON ou flux NDJSON)
+    
+    Toutes les tâches sont insérées par un seul executemany dans une seule
+    transaction: soit tout le lot est accepté, soit rien. Les tâches dont
+    la clé d'idempotence est déjà connue (lot rejoué en tout ou partie)
+    ne sont pas recréées: task_ids donne alors l'ID d'origine. Le statut
+    de chaque tâche (en attente, servie par le cache, ou quelconque pour
+    une tâche rejouée) se lit via /api/tasks/status.
+    """
+    try:
+        if request.mimetype in NDJSON_MIMETYPES:
+            items = iter_ndjson(request.stream)
+        else:
+            data = request.get_json(silent=True)
+            if isinstance(data, dict):
+                data = data.get("tasks")
+            if not isinstance(data, list):
+                return jsonify({"error": "Tableau JSON ou flux NDJSON de tâches requis"}), 400
+            items = data
+        
+        now = datetime.now().isoformat()
+        keys = []  # Clé d'idempotence de chaque tâche, dans l'ordre du lot
+        
+        def rows():
+            for item in limit_batch(items):
+                task = parse_task_payload(item)
+                keys.append(task[12])
+                yield task + (now, None, 0)
+        
+        conn = get_db_connection()
+        c = conn.cursor()
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            # Les ids AUTOINCREMENT sont contigus sous le verrou d'écriture
+            c.execute("SELECT seq FROM sqlite_sequence WHERE name = 'tasks'")
+            row = c.fetchone()
+            first_id = (row[0] if row else 0) + 1
+            
+            c.executemany(INSERT_TASK_SQL, rows())
+            count = max(c.rowcount, 0)
+            
+            # Une clé en conflit consomme aussi un id: les ids ne sont
+            # contigus que sans clé d'idempotence
+            task_ids = list(range(first_id, first_id + count))
+            if any(key is not None for key in keys):
+                task_ids = match_batch_ids(c, first_id, keys)
+            cached = resolve_cached_tasks(c, first_id, max(task_ids), now) if count else 0
+            conn.commit()
+        except ValueError as e:
+            conn.rollback()
+            conn.close()
+            return jsonify({"error": str(e)}), 400
+        
+        conn.close()
+        task_signal.notify()
+        if cached:
+            status_signal.notify()
+        
+        logger.info(f"📝 {count} tâche(s) créée(s) en lot ({cached} servie(s) par le cache, "
+                    f"{len(task_ids) - count} rejouée(s))")
+        
+        return jsonify({
+            "task_ids": task_ids,
+            "count": count,
+            "cached": cached,
+            "replayed": len(task_ids) - count,
+            "message": "Tasks created successfully"
+        }), 201
+        
+    except Exception as e:
+        logger.error(f"❌ Erreur création tâches en lot: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/tasks/available")
+def api_available_tasks():
+    """Consulter les tâches disponibles (lecture seule, ne réserve rien)
+    
+    Les workers doivent utiliser POST /api/tasks/claim pour obtenir des tâches.
+    Avec le moteur en mémoire, l'aperçu vient de ses files (les claims pas
+    encore écrits en base en sont exclus).
+    """
+    try:
+        conn = get_db_connection()
+        c = conn.cursor()
+        
+        if engine is not None:
+            # Baux expirés: vérifiés par le thread d'écriture du moteur
+            rows = engine.preview(10)
+        else:
+            requeued = requeue_expired_leases(c)
+            conn.commit()
+            if requeued:
+                task_signal.notify()
+                status_signal.notify()
+            
+            # Aperçu dans l'ordre du prochain claim (sans le réserver)
+            rows, _ = plan_dispatch(c, 10)
+        
+        tasks = []
+        for row in rows:
+            tasks.append({
+                "task_id": row['id'],
+                "name": row['name'],
+                "type": row['type'],
+                "command": row['command'],
+                "created_at": row['created_at'],
+                "priority": row['priority'],
+                "queue": row['queue']
+            })
+        
+        conn.close()
+        
+        return jsonify({
+            "available_tasks": tasks,
+            "count": len(tasks)
+        })
+        
+    except Exception as e:
+        logger.error(f"❌ Erreur récupération tâches: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/tasks/claim", methods=["POST"])
+def api_claim_tasks():
+    """Réclamer des tâches pour un worker (avec bail)"""
+    try:
+        data = request.get_json()
+        if not data or not isinstance(data, dict):
+            return jsonify({"error": "Données JSON requises"}), 400
+        
+        worker_id = data.get("worker_id")
+        if worker_id is None:
+            return jsonify({"error": "worker_id requis"}), 400
+        
+        try:
+            max_tasks = max(1, min(int(data.get("max_tasks", 1)), MAX_CLAIM_BATCH))
+            lease_seconds = max(1, int(data.get("lease_seconds", TASK_LEASE_SECONDS)))
+            wait = max(0.0, min(float(data.get("wait", 0)), MAX_LONG_POLL_SECONDS))
+            
+            # Ressources libres annoncées par le worker (optionnel)
+            free_cpu_cores = data.get("free_cpu_cores")
+            free_cpu_cores = None if free_cpu_cores is None else int(free_cpu_cores)
+            free_memory_mb = data.get("free_memory_mb")
+            free_memory_mb = None if free_memory_mb is None else int(free_memory_mb)
+        except (TypeError, ValueError, OverflowError) as e:
+            return jsonify({"error": f"Requête invalide: {e}"}), 400
+        liveness.seen(worker_id)
+        
+        conn = get_db_connection()
+        capacity = worker_capacity(conn.cursor(), worker_id, free_cpu_cores, free_memory_mb)
+        conn.close()
+        
+        # Long-polling: sans tâche disponible, attendre un signal ou le délai
+        deadline = time.monotonic() + wait
+        while True:
+            version = task_signal.version()
+            
+            if engine is not None:
+                tasks = engine.claim(worker_id, max_tasks, lease_seconds, capacity)
+            else:
+                conn = get_db_connection()
+                tasks = claim_tasks(conn, worker_id, max_tasks, lease_seconds, capacity)
+                conn.close()
+            
+            remaining = deadline - time.monotonic()
+            if tasks or remaining <= 0:
+                break
+            task_signal.wait(version, remaining)
+        
+        if tasks:
+            logger.info(f"📥 {len(tasks)} tâche(s) réclamée(s) par le worker {worker_id}")
+        
+        return jsonify({
+            "claimed_tasks": tasks,
+            "count": len(tasks)
+        })
+        
+    except Exception as e:
+        logger.error(f"❌ Erreur réclamation tâches: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/tasks/<int:task_id>")
+def api_task_status(task_id):
+    """Statut d'une tâche (ETag / If-None-Match, long-polling avec `wait`)"""
+    try:
+        wait = max(0.0, min(request.args.get("wait", 0, type=float), MAX_LONG_POLL_SECONDS))
+        
+        tasks, etag = poll_task_statuses([task_id], request.if_none_match, wait)
+        if not tasks:
+            return jsonify({"error": f"Tâche {task_id} non trouvée"}), 404
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+        else:
+            response = jsonify(tasks[0])
+        
+        response.set_etag(etag)
+        return response
+        
+    except Exception as e:
+        logger.error(f"❌ Erreur lecture statut: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/tasks/status", methods=["GET", "POST"])
+def api_tasks_status():
+    """Statut de plusieurs tâches (ETag / If-None-Match, long-polling)
+    
+    GET ?ids=1,2,3&wait=25 ou POST {"ids": [...], "wait": 25} pour les
+    longues listes. La réponse résume les statuts et indique si toutes les
+    tâches sont terminées.
+    """
+    try:
+        if request.method == "POST":
+            data = request.get_json() or {}
+            raw_ids = data.get("ids", [])
+            wait = float(data.get("wait", 0))
+        else:
+            raw_ids = [part for part in request.args.get("ids", "").split(",") if part.strip()]
+            wait = request.args.get("wait", 0, type=float)
+        
+        try:
+            task_ids = list(dict.fromkeys(int(task_id) for task_id in raw_ids))
+        except (TypeError, ValueError):
+            return jsonify({"error": "ids doit être une liste d'entiers"}), 400
+        if not task_ids:
+            return jsonify({"error": "ids requis"}), 400
+        if len(task_ids) > MAX_STATUS_IDS:
+            return jsonify({"error": f"Au plus {MAX_STATUS_IDS} tâches par requête"}), 400
+        
+        wait = max(0.0, min(wait, MAX_LONG_POLL_SECONDS))
+        tasks, etag = poll_task_statuses(task_ids, request.if_none_match, wait)
+        
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+        else:
+            found = {task["id"] for task in tasks}
+            counts = {}
+            for task in tasks:
+                counts[task["status"]] = counts.get(task["status"], 0) + 1
+            
+            response = jsonify({
+                "tasks": tasks,
+                "missing": [task_id for task_id in task_ids if task_id not in found],
+                "counts": counts,
+                "done": all(task["status"] in TERMINAL_STATUSES for task in tasks)
+            })
+        
+        response.set_etag(etag)
+        return response
+        
+    except Exception as e:
+        logger.error(f"❌ Erreur lecture statuts: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/tasks/<int:task_id>/results", methods=["POST"])
+def api_submit_result(task_id):
+    """Soumettre le résultat d'une tâche"""
+    try:
+        data = request.get_json()
+        if not data or not isinstance(data, dict):
+            return jsonify({"error": "Données JSON requises"}), 400
+        
+        worker_id = data.get("worker_id")
+        result = data.get("result", {})
+        if not isinstance(result, dict):
+            return jsonify({"error": "'result' doit être un objet JSON"}), 400
+        liveness.seen(worker_id)
+        
+        outcome = record_results(worker_id, [(task_id, result)])[0]
+        if outcome.get("reason") == "unknown_task":
+            return jsonify({"error": f"Tâche {task_id} non trouvée"}), 404
+        status = outcome["status"]
+        success = status == "completed"
+        
+        output_signal.notify()
+        status_signal.notify()
+        
+        # Une complétion peut libérer des tâches dépendantes; un échec
+        # réessayé remet la tâche en attente
+        if status in ("completed", "retrying"):
+            task_signal.notify()
+        
+        logger.info(f"📤 Résultat soumis pour tâche {task_id} (succès: {success})")
+        
+        return jsonify({
+            "task_id": task_id,
+            "status": status,
+            "message": "Result submitted successfully"
+        })
+        
+    except Exception as e:
+        logger.error(f"❌ Erreur soumission résultat: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/tasks/<int:task_id>/output", methods=["POST"])
+def api_append_output(task_id):
+    """Recevoir un morceau de sortie d'une tâche en cours d'exécution"""
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "Données JSON requises"}), 400
+        
+        worker_id = data.get("worker_id")
+        stream = data.get("stream", "stdout")
+        position = int(data.get("position", 0))
+        chunk = data.get("data", "")
+        
+        if stream not in ("stdout", "stderr") or position < 0:
+            return jsonify({"error": "Flux ou position invalide"}), 400
+        
+        # Au-delà de la taille maximale, la sortie est tronquée
+        chunk = chunk[:max(0, MAX_TASK_OUTPUT_CHARS - position)]
+        truncated = position + len(chunk) >= MAX_TASK_OUTPUT_CHARS
+        
+        conn = get_db_connection()
+        c = conn.cursor()
+        
+        c.execute("SELECT status, assigned_worker, speculative_worker FROM tasks WHERE id = ?", (task_id,))
+        task = c.fetchone()
+        
+        # Claim (ou doublon) du moteur en mémoire pas encore écrit en base:
+        # l'écrire d'abord (il effacerait sinon ce premier morceau de sortie)
+        if engine is not None and task is not None and (
+                task['status'] == 'pending' and engine.holds(task_id, worker_id)
+                or task['status'] == 'running' and task['speculative_worker'] is None
+                and engine.speculates(task_id)):
+            engine.commit()
+            c.execute("SELECT status, assigned_worker, speculative_worker FROM tasks WHERE id = ?", (task_id,))
+            task = c.fetchone()
+        
+        # Tâche déjà terminée (par un doublon spéculatif, par exemple):
+        # le worker peut abandonner son exécution
+        if task is not None and task['status'] in TERMINAL_STATUSES:
+            conn.close()
+            return jsonify({"error": "Tâche déjà terminée", "cancel": True}), 410
+        if task is None or task['status'] != 'running' or str(worker_id) not in (
+                task['assigned_worker'], task['speculative_worker']):
+            conn.close()
+            return jsonify({"error": "Tâche non assignée à ce worker"}), 409
+        
+        if chunk:
+            # INSERT OR IGNORE: un renvoi du même morceau est sans effet
+            speculative = str(worker_id) == task['speculative_worker']
+            c.execute(
+                "INSERT OR IGNORE INTO task_output (task_id, stream, position, data) VALUES (?, ?, ?, ?)",
+                (task_id, output_slot(stream, speculative), position, chunk)
+            )
+            conn.commit()
+            output_signal.notify()
+        
+        conn.close()
+        
+        return jsonify({
+            "task_id": task_id,
+            "accepted": len(chunk),
+            "truncated": truncated
+        })
+        
+    except Exception as e:
+        logger.error(f"❌ Erreur réception sortie: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/tasks/<int:task_id>/output")
+def api_read_output(task_id):
+    """Lire la sortie d'une tâche à partir d'une position (suivi en direct)
+    
+    Avec `wait` > 0, la requête attend de nouvelles données (long-polling).
+    """
+    try:
+        stream = request.args.get("stream", "stdout")
+        position = max(0, request.args.get("position", 0, type=int))
+        wait = max(0.0, min(request.args.get("wait", 0, type=float), MAX_LONG_POLL_SECONDS))
+        
+        if stream not in ("stdout", "stderr"):
+            return jsonify({"error": "Flux invalide"}), 400
+        
+        deadline = time.monotonic() + wait
+        while True:
+            version = output_signal.version()
+            
+            conn = get_db_connection()
+            status, data = read_task_output(conn, task_id, stream, position)
+            conn.close()
+            
+            remaining = deadline - time.monotonic()
+            if status is None:
+                return jsonify({"error": f"Tâche {task_id} non trouvée"}), 404
+            if data or status in ("completed", "failed") or remaining <= 0:
+                break
+            output_signal.wait(version, remaining)
         
+        return jsonify({
+            "task_id": task_id,
+            "status": status,
+            "stream": stream,
+            "position": position,
+            "next_position": position + len(data),
+            "data": data,
+            "complete": status in ("completed", "failed") and not data
+        })
+        
+    except Exception as e:
+        logger.error(f"❌ Erreur lecture sortie: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/tasks/<int:task_id>/result")
+def api_get_result(task_id):
+    """Récupérer la sortie complète d'une tâche terminée (à la demande)"""
+    try:
         conn = get_db_connection()
         c = conn.cursor()
         
         c.execute(
-            """INSERT INTO tasks (name, type, command, status) 
-               VALUES (?, ?, ?, 'pending')""",
-            (name, task_type, json.dumps(command_obj))
+            "SELECT id, status, completed_at, output_blob, error_blob FROM tasks WHERE id = ?",
+            (task_id,)
         )
+        row = c.fetchone()
+        if row is None:
+            conn.close()
+            return jsonify({"error": f"Tâche {task_id} non trouvée"}), 404
         
-        conn.commit()
+        result = {
+            "task_id": row["id"],
+            "status": row["status"],
+            "completed_at": row["completed_at"],
+            "output": load_blob(c, row["output_blob"]),
+            "error": load_blob(c, row["error_blob"])
+        }
         conn.close()
         
-        logger.info(f"✅ Tâche soumise: {name}")
-        flash("✅ Tâche soumise avec succès !", "success")
+        return jsonify(result)
         
     except Exception as e:
-        logger.error(f"❌ Erreur soumission tâche: {e}")
-        flash(f"❌ Erreur: {str(e)}", "danger")
-    
-    return redirect(url_for("dashboard"))
+        logger.error(f"❌ Erreur lecture résultat: {e}")
+        return jsonify({"error": str(e)}), 500
 
-# ==================== ROUTES API ====================
+EXPORT_INCLUDES = ("output", "error")
 
-@app.route("/api/health")
-def api_health():
-    """Endpoint de santé de l'API"""
-    return jsonify({
-        "service": "BI-COMPUTE Hackathon Demo",
-        "status": "healthy",
-        "version": "2.0.0",
-        "timestamp": datetime.now().isoformat(),
-        "environment": "railway" if IS_RAILWAY else "development",
-        "database": "connected",
-        "url": f"https://{request.host}" if IS_RAILWAY else f"http://{request.host}",
-        "endpoints": {
-            "workers": "/api/workers",
-            "tasks": "/api/tasks",
-            "stats": "/api/stats",
-            "demo": "/api/demo"
-        }
-    })
+def iter_export(where, params, include):
+    """Générer l'export NDJSON ligne à ligne depuis un curseur SQLite
+    
+    La connexion est empruntée au pool pour toute la durée du flux (et non
+    via g, libéré dès la fin de la vue). Les lignes sont regroupées en blocs
+    d'environ EXPORT_CHUNK_BYTES: la mémoire reste constante quel que soit
+    le nombre de tâches exportées.
+    """
+    conn = db_pool.acquire()
+    try:
+        rows = conn.cursor()
+        blobs = conn.cursor()
+        
+        sql = f"SELECT {', '.join(TASK_LIST_FIELDS)} FROM tasks"
+        if where:
+            sql += f" WHERE {' AND '.join(where)}"
+        rows.execute(sql + " ORDER BY id ASC", params)
+        
+        buffer, size = [], 0
+        for row in rows:
+            record = {field: row[field] for field in TASK_LIST_FIELDS
+                      if field not in ("output_blob", "error_blob")}
+            if "output" in include:
+                record["output"] = load_blob(blobs, row["output_blob"])
+            if "error" in include:
+                record["error"] = load_blob(blobs, row["error_blob"])
+            
+            line = json.dumps(record, ensure_ascii=False) + "\n"
+            buffer.append(line)
+            size += len(line)
+            if size >= EXPORT_CHUNK_BYTES:
+                yield "".join(buffer)
+                buffer, size = [], 0
+        
+        if buffer:
+            yield "".join(buffer)
+    finally:
+        conn.close()
 
-@app.route("/api/workers/register", methods=["POST"])
-def api_register_worker():
-    """Enregistrer un nouveau worker"""
+@app.route("/api/tasks/export")
+def api_export_tasks():
+    """Exporter les tâches et leurs résultats en NDJSON (flux continu)
+    
+    Paramètres: status, job_id, since / until (bornes sur created_at), name_prefix,
+    after_id (reprise d'un export interrompu), include=output,error.
+    """
+    try:
+        # include= (vide) exporte uniquement les métadonnées
+        raw_include = request.args.get("include")
+        include = [] if raw_include == "" else parse_fields(raw_include, EXPORT_INCLUDES)
+        
+        where, params = [], []
+        if request.args.get("status"):
+            where.append("status = ?")
+            params.append(request.args["status"])
+        if request.args.get("job_id"):
+            where.append("job_id = ?")
+            params.append(int(request.args["job_id"]))
+        if request.args.get("since"):
+            where.append("created_at >= ?")
+            params.append(request.args["since"])
+        if request.args.get("until"):
+            where.append("created_at < ?")
+            params.append(request.args["until"])
+        if request.args.get("name_prefix"):
+            prefix = request.args["name_prefix"]
+            where.append("substr(name, 1, ?) = ?")
+            params.extend([len(prefix), prefix])
+        if request.args.get("after_id"):
+            where.append("id > ?")
+            params.append(int(request.args["after_id"]))
+        
+        return Response(
+            iter_export(where, params, include),
+            mimetype="application/x-ndjson",
+            headers={"Content-Disposition": "attachment; filename=tasks.ndjson"}
+        )
+        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"❌ Erreur export: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/tasks/results", methods=["POST"])
+def api_submit_results_batch():
+    """Soumettre les résultats de plusieurs tâches en une seule transaction"""
     try:
         data = request.get_json()
-        if not data:
+        if not data or not isinstance(data, dict):
             return jsonify({"error": "Données JSON requises"}), 400
         
-        name = data.get("name", f"Worker-{datetime.now().strftime('%H%M%S')}")
-        cpu_cores = data.get("cpu_cores", 1)
-        memory_mb = data.get("memory_mb", 1024)
-        platform = data.get("platform", "unknown")
+        worker_id = data.get("worker_id")
+        liveness.seen(worker_id)
+        items = data.get("results")
+        if not isinstance(items, list):
+            return jsonify({"error": "Liste 'results' requise"}), 400
+        
+        try:
+            results = [parse_result_item(item) for item in items]
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        statuses = record_results(worker_id, results)
+        
+        output_signal.notify()
+        status_signal.notify()
+        if any(item["status"] in ("completed", "retrying") for item in statuses):
+            task_signal.notify()
+        
+        logger.info(f"📤 {len(statuses)} résultat(s) soumis en lot par le worker {worker_id}")
+        
+        return jsonify({
+            "results": statuses,
+            "count": len(statuses),
+            "message": "Results submitted successfully"
+        })
         
+    except Exception as e:
+        logger.error(f"❌ Erreur soumission résultats en lot: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/jobs", methods=["POST"])
+def api_create_job():
+    """Créer un job: un groupe de tâches avec dépendances (DAG)
+    
+    Corps JSON: {"name": ..., "tasks": [{"key": "map-1", ...},
+    {"key": "reduce", "depends_on": ["map-1"], ...}]}. Les tâches sans
+    parent en attente sont distribuables immédiatement; les autres le
+    deviennent dès que leurs parents sont terminés, sans polling client.
+    Avec une clé d'idempotence (corps ou en-tête Idempotency-Key), un
+    envoi rejoué renvoie le job d'origine.
+    """
+    try:
+        data = request.get_json()
+        if not data or not isinstance(data.get("tasks"), list):
+            return jsonify({"error": "Liste 'tasks' requise"}), 400
+        
+        name = data.get("name") or f"Job-{datetime.now().strftime('%H%M%S')}"
         now = datetime.now().isoformat()
         
         conn = get_db_connection()
         c = conn.cursor()
-        
-        # Vérifier si le worker existe déjà
-        c.execute(
-            "SELECT id FROM workers WHERE name = ? AND is_active = 1",
-            (name,)
-        )
-        existing = c.fetchone()
-        
-        if existing:
-            # Mettre à jour le worker existant
-            worker_id = existing['id']
-            c.execute(
-                """UPDATE workers SET 
-                    cpu_cores = ?, 
-                    memory_mb = ?, 
-                    platform = ?, 
-                    last_seen = ?,
-                    is_active = 1
-                   WHERE id = ?""",
-                (cpu_cores, memory_mb, platform, now, worker_id)
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            idempotency_key = parse_idempotency_key(
+                data.get("idempotency_key") or request.headers.get("Idempotency-Key")
             )
-            action = "updated"
-        else:
-            # Créer un nouveau worker
             c.execute(
-                """INSERT INTO workers 
-                   (name, cpu_cores, memory_mb, platform, last_seen, is_active)
-                   VALUES (?, ?, ?, ?, ?, 1)""",
-                (name, cpu_cores, memory_mb, platform, now)
+                """INSERT INTO jobs (name, created_at, idempotency_key) VALUES (?, ?, ?)
+                   ON CONFLICT (idempotency_key) WHERE idempotency_key IS NOT NULL
+                   DO NOTHING""",
+                (name, now, idempotency_key)
             )
-            worker_id = c.lastrowid
-            action = "registered"
+            if c.rowcount == 0:
+                c.execute("SELECT id, name FROM jobs WHERE idempotency_key = ?", (idempotency_key,))
+                job_id, name = c.fetchone()
+                c.execute("SELECT id FROM tasks WHERE job_id = ? ORDER BY id", (job_id,))
+                task_ids = [row[0] for row in c.fetchall()]
+                conn.rollback()
+                conn.close()
+                logger.info(f"🔂 Job rejoué: {job_id} (clé {idempotency_key})")
+                return jsonify({
+                    "job_id": job_id,
+                    "name": name,
+                    "task_ids": task_ids,
+                    "count": len(task_ids),
+                    "replayed": True,
+                    "message": "Job already submitted"
+                }), 200
+            
+            job_id = c.lastrowid
+            task_ids, keys = insert_job_tasks(c, job_id, data["tasks"], now)
+            conn.commit()
+        except ValueError as e:
+            conn.rollback()
+            conn.close()
+            return jsonify({"error": str(e)}), 400
         
-        conn.commit()
         conn.close()
+        task_signal.notify()
+        status_signal.notify()
         
-        logger.info(f"👷 Worker {action}: {name} (ID: {worker_id})")
+        logger.info(f"🧩 Job créé: {name} (ID: {job_id}, {len(task_ids)} tâche(s))")
         
         return jsonify({
-            "worker_id": worker_id,
+            "job_id": job_id,
             "name": name,
-            "action": action,
-            "message": f"Worker {action} successfully"
-        })
+            "task_ids": task_ids,
+            "keys": keys,
+            "count": len(task_ids),
+            "replayed": False,
+            "message": "Job created successfully"
+        }), 201
         
     except Exception as e:
-        logger.error(f"❌ Erreur registration worker: {e}")
+        logger.error(f"❌ Erreur création job: {e}")
         return jsonify({"error": str(e)}), 500
 
-@app.route("/api/tasks", methods=["POST"])
-def api_create_task():
-    """Créer une nouvelle tâche via API"""
+@app.route("/api/jobs/<int:job_id>/tasks", methods=["POST"])
+def api_add_job_tasks(job_id):
+    """Ajouter des tâches (et leurs dépendances) à un job existant"""
     try:
         data = request.get_json()
-        if not data:
-            return jsonify({"error": "Données JSON requises"}), 400
+        if not data or not isinstance(data.get("tasks"), list):
+            return jsonify({"error": "Liste 'tasks' requise"}), 400
         
-        name = data.get("name", f"Task-{datetime.now().strftime('%H%M%S')}")
-        task_type = data.get("type", "shell")
-        command = data.get("command", "")
-        
-        # Si command est un dict, le convertir en JSON
-        if isinstance(command, dict):
-            command = json.dumps(command)
+        now = datetime.now().isoformat()
         
         conn = get_db_connection()
         c = conn.cursor()
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            c.execute("SELECT id FROM jobs WHERE id = ?", (job_id,))
+            if c.fetchone() is None:
+                conn.rollback()
+                conn.close()
+                return jsonify({"error": "Job non trouvé"}), 404
+            task_ids, keys = insert_job_tasks(c, job_id, data["tasks"], now)
+            conn.commit()
+        except ValueError as e:
+            conn.rollback()
+            conn.close()
+            return jsonify({"error": str(e)}), 400
         
-        c.execute(
-            """INSERT INTO tasks (name, type, command, status, created_at)
-               VALUES (?, ?, ?, 'pending', ?)""",
-            (name, task_type, command, datetime.now().isoformat())
-        )
-        
-        task_id = c.lastrowid
-        conn.commit()
         conn.close()
+        task_signal.notify()
+        status_signal.notify()
         
-        logger.info(f"📝 Tâche créée: {name} (ID: {task_id})")
+        logger.info(f"🧩 {len(task_ids)} tâche(s) ajoutée(s) au job {job_id}")
         
         return jsonify({
-            "task_id": task_id,
-            "name": name,
-            "type": task_type,
-            "status": "pending",
-            "message": "Task created successfully"
+            "job_id": job_id,
+            "task_ids": task_ids,
+            "keys": keys,
+            "count": len(task_ids)
         }), 201
         
     except Exception as e:
-        logger.error(f"❌ Erreur création tâche: {e}")
+        logger.error(f"❌ Erreur ajout tâches au job: {e}")
         return jsonify({"error": str(e)}), 500
 
-@app.route("/api/tasks/available")
-def api_available_tasks():
-    """Récupérer les tâches disponibles pour les workers"""
+@app.route("/api/jobs/<int:job_id>")
+def api_job_status(job_id):
+    """Progression d'un job (compteurs maintenus par triggers)"""
     try:
         conn = get_db_connection()
         c = conn.cursor()
+        c.execute(f"SELECT {', '.join(JOB_FIELDS)} FROM jobs WHERE id = ?", (job_id,))
+        row = c.fetchone()
+        conn.close()
         
-        c.execute("""
-            SELECT id, name, type, command, created_at
-            FROM tasks 
-            WHERE status = 'pending'
-            ORDER BY created_at ASC 
-            LIMIT 10
-        """)
+        if row is None:
+            return jsonify({"error": "Job non trouvé"}), 404
         
-        tasks = []
-        for row in c.fetchall():
-            tasks.append({
-                "task_id": row['id'],
-                "name": row['name'],
-                "type": row['type'],
-                "command": row['command'],
-                "created_at": row['created_at']
-            })
+        return jsonify(job_summary(row))
+        
+    except Exception as e:
+        logger.error(f"❌ Erreur statut job: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/jobs")
+def api_list_jobs():
+    """Lister les jobs (pagination par curseur)"""
+    try:
+        limit = parse_limit(request.args.get("limit"))
         
+        conn = get_db_connection()
+        c = conn.cursor()
+        
+        jobs, next_cursor = fetch_page(
+            c, "jobs", JOB_FIELDS, "created_at", [], [],
+            request.args.get("cursor"), limit
+        )
         conn.close()
         
         return jsonify({
-            "available_tasks": tasks,
-            "count": len(tasks)
+            "jobs": [job_summary(job) for job in jobs],
+            "count": len(jobs),
+            "next_cursor": next_cursor
         })
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        logger.error(f"❌ Erreur récupération tâches: {e}")
         return jsonify({"error": str(e)}), 500
 
-@app.route("/api/tasks/<int:task_id>/results", methods=["POST"])
-def api_submit_result(task_id):
-    """Soumettre le résultat d'une tâche"""
+# Remise en attente d'une tâche de la file des lettres mortes (compteurs de
+# réessais remis à zéro)
+RESUBMIT_TASK_SQL = """UPDATE tasks SET
+    status = 'pending',
+    attempts = 0,
+    max_retries = COALESCE(?, max_retries),
+    retry_after = NULL,
+    last_worker = NULL,
+    assigned_worker = NULL,
+    lease_expires_at = NULL,
+    started_at = NULL,
+    completed_at = NULL,
+    output_blob = NULL,
+    error_blob = NULL,
+    execution_time = NULL"""
+
+# Sortie diffusée de la dernière exécution, à oublier avec son résultat
+RESUBMIT_OUTPUT_SQL = "DELETE FROM task_output WHERE task_id IN (SELECT id FROM tasks WHERE {where})"
+
+@app.route("/api/tasks/resubmit", methods=["POST"])
+def api_resubmit_tasks():
+    """Relancer en masse des tâches échouées (file des lettres mortes)
+    
+    Corps JSON: task_ids (liste), ou des filtres queue, name_prefix,
+    since / until (bornes sur created_at); max_retries remplace
+    éventuellement le nombre de réessais. Seules les tâches 'failed' sont
+    concernées. Les échecs se consultent via /api/tasks/all?status=failed.
+    """
     try:
         data = request.get_json()
         if not data:
             return jsonify({"error": "Données JSON requises"}), 400
         
-        worker_id = data.get("worker_id")
-        result = data.get("result", {})
+        max_retries = data.get("max_retries")
+        if max_retries is not None:
+            max_retries = max(0, int(max_retries))
         
-        success = result.get("success", False)
-        output = result.get("stdout", "")
-        error = result.get("stderr", "") or result.get("error", "")
+        conn = get_db_connection()
+        c = conn.cursor()
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            count = 0
+            if "task_ids" in data:
+                task_ids = [int(task_id) for task_id in data["task_ids"]]
+                for start in range(0, len(task_ids), 500):
+                    chunk = task_ids[start:start + 500]
+                    where = f"status = 'failed' AND id IN ({', '.join('?' * len(chunk))})"
+                    c.execute(RESUBMIT_OUTPUT_SQL.format(where=where), chunk)
+                    c.execute(f"{RESUBMIT_TASK_SQL} WHERE {where}", [max_retries] + chunk)
+                    count += c.rowcount
+            else:
+                where, params = ["status = 'failed'"], [max_retries]
+                if data.get("queue"):
+                    where.append("queue = ?")
+                    params.append(data["queue"])
+                if data.get("name_prefix"):
+                    where.append("substr(name, 1, ?) = ?")
+                    params.extend([len(data["name_prefix"]), data["name_prefix"]])
+                if data.get("since"):
+                    where.append("created_at >= ?")
+                    params.append(data["since"])
+                if data.get("until"):
+                    where.append("created_at < ?")
+                    params.append(data["until"])
+                c.execute(RESUBMIT_OUTPUT_SQL.format(where=" AND ".join(where)), params[1:])
+                c.execute(f"{RESUBMIT_TASK_SQL} WHERE {' AND '.join(where)}", params)
+                count = c.rowcount
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
         
-        now = datetime.now().isoformat()
-        status = "completed" if success else "failed"
+        if count:
+            task_signal.notify()
+            status_signal.notify()
         
+        logger.info(f"🔁 {count} tâche(s) échouée(s) relancée(s)")
+        
+        return jsonify({
+            "count": count,
+            "status": "pending",
+            "message": "Tasks resubmitted successfully"
+        })
+        
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Requête invalide: {e}"}), 400
+    except Exception as e:
+        logger.error(f"❌ Erreur relance tâches: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/queues")
+def api_list_queues():
+    """Lister les files d'attente (poids, tâches en attente, service reçu)"""
+    try:
         conn = get_db_connection()
         c = conn.cursor()
         
-        # Mettre à jour la tâche
-        c.execute(
-            """UPDATE tasks SET 
-                status = ?,
-                completed_at = ?,
-                result_output = ?,
-                result_error = ?,
-                assigned_worker = ?
-               WHERE id = ?""",
-            (status, now, output, error, worker_id, task_id)
-        )
+        c.execute("SELECT name, weight, pending, service FROM queues ORDER BY name")
+        queues = [dict(row) for row in c.fetchall()]
+        conn.close()
         
-        # Mettre à jour le compteur du worker
-        if worker_id and success:
-            c.execute(
-                "UPDATE workers SET tasks_completed = tasks_completed + 1, last_seen = ? WHERE id = ?",
-                (now, worker_id)
-            )
+        return jsonify({"queues": queues, "count": len(queues)})
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/queues/<name>", methods=["PUT"])
+def api_set_queue_weight(name):
+    """Définir le poids d'une file (part relative des workers)"""
+    try:
+        data = request.get_json() or {}
+        try:
+            weight = float(data.get("weight"))
+        except (TypeError, ValueError):
+            return jsonify({"error": "weight numérique requis"}), 400
+        if weight <= 0:
+            return jsonify({"error": "weight doit être positif"}), 400
         
+        conn = get_db_connection()
+        c = conn.cursor()
+        c.execute("""
+            INSERT INTO queues (name, weight) VALUES (?, ?)
+            ON CONFLICT(name) DO UPDATE SET weight = excluded.weight
+        """, (name, weight))
         conn.commit()
         conn.close()
+        if engine is not None:
+            engine.set_weight(name, weight)
         
-        logger.info(f"📤 Résultat soumis pour tâche {task_id} (succès: {success})")
+        logger.info(f"⚖️ File {name}: poids {weight}")
         
-        return jsonify({
-            "task_id": task_id,
-            "status": status,
-            "message": "Result submitted successfully"
-        })
+        return jsonify({"name": name, "weight": weight})
         
     except Exception as e:
-        logger.error(f"❌ Erreur soumission résultat: {e}")
+        logger.error(f"❌ Erreur poids file: {e}")
         return jsonify({"error": str(e)}), 500
 
 @app.route("/api/stats")
@@ -579,6 +4225,9 @@ def api_stats():
         if task_stats["total"] > 0:
             completion_rate = round(task_stats["completed"] / task_stats["total"] * 100, 2)
         
+        c.execute("SELECT COUNT(*) FROM result_cache")
+        cache_entries = c.fetchone()[0]
+        
         conn.close()
         
         return jsonify({
@@ -595,6 +4244,12 @@ def api_stats():
                 "total_memory_gb": round(worker_stats["total_memory"] / 1024, 1)
             },
             "tasks": task_stats,
+            "speculation": dict(speculation_stats.snapshot(), budget=SPECULATION_BUDGET),
+            "engine": engine.snapshot() if engine is not None else {"mode": "sqlite"},
+            "cache": dict(
+                cache_stats.snapshot(), entries=cache_entries,
+                ttl_seconds=RESULT_CACHE_TTL_SECONDS, max_entries=RESULT_CACHE_MAX_ENTRIES
+            ),
             "performance": {
                 "completion_rate": completion_rate,
                 "tasks_per_worker": round(task_stats["completed"] / max(worker_stats["active_workers"], 1), 1),
@@ -617,18 +4272,28 @@ def api_reset_demo():
         c.execute("DELETE FROM tasks")
         c.execute("DELETE FROM workers")
         c.execute("DELETE FROM demos")
+        c.execute("DELETE FROM task_output")
+        c.execute("DELETE FROM result_blobs")
+        c.execute("DELETE FROM worker_runtime_stats")
+        c.execute("DELETE FROM jobs")
+        c.execute("DELETE FROM task_dependencies")
+        c.execute("DELETE FROM result_cache")
         
         # Réinitialiser les séquences
         c.execute("DELETE FROM sqlite_sequence WHERE name='tasks'")
         c.execute("DELETE FROM sqlite_sequence WHERE name='workers'")
         c.execute("DELETE FROM sqlite_sequence WHERE name='demos'")
+        c.execute("DELETE FROM sqlite_sequence WHERE name='jobs'")
         
-        # Recréer les données de démo
-        add_demo_data()
+        # Recréer les données de démo (dans la même transaction)
+        add_demo_data(conn)
         
         conn.commit()
         conn.close()
         
+        liveness.clear()
+        task_signal.notify()
+        
         logger.info("🔄 Démo réinitialisée pour les jurys")
         
         return jsonify({
@@ -653,6 +4318,7 @@ def api_start_demo():
         c = conn.cursor()
         
         platforms = ["linux", "windows", "macos", "android", "termux"]
+        demo_workers = []
         
         for i in range(worker_count):
             name = f"Demo-Worker-{i+1}"
@@ -665,10 +4331,14 @@ def api_start_demo():
                    VALUES (?, ?, ?, ?, ?, 1)""",
                 (name, cpu, memory, platform, datetime.now().isoformat())
             )
+            demo_workers.append((c.lastrowid, cpu, memory))
         
         conn.commit()
         conn.close()
         
+        for worker_id, cpu, memory in demo_workers:
+            liveness.seen(worker_id, cpu_cores=cpu, memory_mb=memory)
+        
         logger.info(f"🎬 Démo démarrée avec {worker_count} workers")
         
         return jsonify({
@@ -685,47 +4355,143 @@ def api_start_demo():
 
 @app.route("/api/workers")
 def api_list_workers():
-    """Lister tous les workers"""
+    """Lister les workers (pagination par curseur, filtres, projection)
+    
+    Paramètres: limit, cursor, fields, platform, active (1 = vus récemment),
+    since (last_seen >= since).
+    """
     try:
+        fields = parse_fields(request.args.get("fields"), WORKER_LIST_FIELDS)
+        limit = parse_limit(request.args.get("limit"))
+        
+        where, params = [], []
+        if request.args.get("platform"):
+            where.append("platform = ?")
+            params.append(request.args["platform"])
+        if request.args.get("active") == "1":
+            where.append("is_active = 1 AND last_seen > ?")
+            params.append((datetime.now() - timedelta(minutes=2)).isoformat())
+        if request.args.get("since"):
+            where.append("last_seen >= ?")
+            params.append(request.args["since"])
+        
         conn = get_db_connection()
         c = conn.cursor()
         
-        c.execute("""
-            SELECT * FROM workers 
-            ORDER BY last_seen DESC
-        """)
-        
-        workers = [dict(row) for row in c.fetchall()]
+        workers, next_cursor = fetch_page(
+            c, "workers", fields, "last_seen", where, params,
+            request.args.get("cursor"), limit
+        )
         conn.close()
         
         return jsonify({
             "workers": workers,
-            "count": len(workers)
+            "count": len(workers),
+            "next_cursor": next_cursor
+        })
+        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/workers/<int:worker_id>/stats")
+def api_worker_stats(worker_id):
+    """Historique des durées d'exécution d'un worker, par type de tâche"""
+    try:
+        conn = get_db_connection()
+        c = conn.cursor()
+        
+        c.execute(
+            """SELECT task_type, samples, ewma, p95 FROM worker_runtime_stats
+               WHERE worker_id = ? ORDER BY task_type""",
+            (worker_id,)
+        )
+        runtimes = [dict(row) for row in c.fetchall()]
+        speed = worker_speed(c, worker_id)
+        conn.close()
+        
+        return jsonify({
+            "worker_id": worker_id,
+            "speed": round(speed, 2),
+            "runtimes": runtimes
         })
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route("/api/estimate")
+def api_estimate():
+    """Estimer la durée d'un job et les workers nécessaires pour une échéance
+    
+    Paramètres: type, count, deadline (secondes, optionnel),
+    estimated_seconds (durée d'une tâche si le type n'a pas d'historique).
+    """
+    try:
+        task_type = request.args.get("type", "shell")
+        count = request.args.get("count", type=int)
+        deadline = request.args.get("deadline", type=float)
+        estimated_seconds = request.args.get("estimated_seconds", type=float)
+        if not count or count < 1:
+            return jsonify({"error": "count entier positif requis"}), 400
+        
+        conn = get_db_connection()
+        plan = plan_job(conn.cursor(), task_type, count, deadline, estimated_seconds)
+        conn.close()
+        
+        return jsonify(plan)
+        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"❌ Erreur estimation: {e}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route("/api/tasks/all")
 def api_list_tasks():
-    """Lister toutes les tâches"""
+    """Lister les tâches (pagination par curseur, filtres, projection)
+    
+    Paramètres: limit, cursor, fields, status, worker (assigned_worker),
+    job_id, since / until (bornes sur created_at).
+    """
     try:
+        fields = parse_fields(request.args.get("fields"), TASK_LIST_FIELDS)
+        limit = parse_limit(request.args.get("limit"))
+        
+        where, params = [], []
+        if request.args.get("status"):
+            where.append("status = ?")
+            params.append(request.args["status"])
+        if request.args.get("worker"):
+            where.append("assigned_worker = ?")
+            params.append(request.args["worker"])
+        if request.args.get("job_id"):
+            where.append("job_id = ?")
+            params.append(int(request.args["job_id"]))
+        if request.args.get("since"):
+            where.append("created_at >= ?")
+            params.append(request.args["since"])
+        if request.args.get("until"):
+            where.append("created_at < ?")
+            params.append(request.args["until"])
+        
         conn = get_db_connection()
         c = conn.cursor()
         
-        c.execute("""
-            SELECT * FROM tasks 
-            ORDER BY created_at DESC
-        """)
-        
-        tasks = [dict(row) for row in c.fetchall()]
+        tasks, next_cursor = fetch_page(
+            c, "tasks", fields, "created_at", where, params,
+            request.args.get("cursor"), limit
+        )
         conn.close()
         
         return jsonify({
             "tasks": tasks,
-            "count": len(tasks)
+            "count": len(tasks),
+            "next_cursor": next_cursor
         })
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -759,10 +4525,12 @@ def main():
             
             # Boucle de travail
             while True:
-                # Récupérer les tâches
-                tasks = requests.get(f"{coordinator_url}/api/tasks/available").json()
+                # Réclamer des tâches (long-polling: attend jusqu'à 25s)
+                tasks = requests.post(f"{coordinator_url}/api/tasks/claim",
+                                      json={"worker_id": worker_id, "max_tasks": 1, "wait": 25},
+                                      timeout=40).json()
                 
-                for task in tasks.get("available_tasks", []):
+                for task in tasks.get("claimed_tasks", []):
                     print(f"🔧 Exécution: {task['name']}")
                     
                     # Simuler l'exécution
@@ -778,8 +4546,6 @@ def main():
                     requests.post(f"{coordinator_url}/api/tasks/{task['task_id']}/results",
                                  json={"worker_id": worker_id, "result": result})
                 
-                time.sleep(5)
-                
     except Exception as e:
         print(f"❌ Erreur: {e}")
 
@@ -813,6 +4579,17 @@ def internal_error(error):
 
 # ==================== DÉMARRAGE ====================
 
+def start_background():
+    """Liveness et reaper du serveur: reprendre les workers récents, puis
+    lancer le reaper. Appelée par les points d'entrée (pas à l'import: un
+    script qui importe app ne doit pas remettre de tâches en attente)."""
+    conn = db_pool.acquire()
+    try:
+        liveness.load(conn)
+    finally:
+        conn.close()
+    start_reaper()
+
 if __name__ == "__main__":
     logger.info("=" * 60)
     logger.info("🚀 BI-COMPUTE HACKATHON DEMO")
@@ -821,6 +4598,10 @@ if __name__ == "__main__":
     logger.info(f"💾 Base de données: {DB_FILE}")
     logger.info("=" * 60)
     
+    # Mode debug: le processus parent ne fait que surveiller le rechargement
+    if IS_RAILWAY or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_background()
+    
     app.run(
         host="0.0.0.0",
         port=PORT,
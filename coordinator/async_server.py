@@ -0,0 +1,511 @@
+#!/usr/bin/env python3
+"""
+Serveur asyncio du coordinateur BI-COMPUTE
+BesmaInfo © 2025 - Hackathon LabLab AI
+
+Le serveur de développement Flask (threaded=True) occupe un thread système
+par requête en cours: des milliers de téléphones en long-polling, c'est des
+milliers de threads. Ici, une seule boucle asyncio tient les connexions;
+une requête en attente (claim, statut ou sortie avec `wait`) n'est plus
+qu'une coroutine suspendue sur le signal correspondant.
+
+Les routes restent celles de app.py: chaque requête est confiée à
+l'application Flask (WSGI) dans un pool de threads dédié à la base
+(ASYNC_DB_THREADS), qui seul touche SQLite. Les attentes des routes de
+long-polling sont prises en charge par la boucle: l'application est
+appelée avec wait=0, puis rappelée au signal suivant tant qu'il n'y a rien
+de nouveau et que le délai demandé n'est pas écoulé.
+
+Un nouveau travail ne réveille que ASYNC_CLAIM_WAKE workers en attente;
+chacun qui obtient des tâches passe le relais aux suivants, au lieu de
+réveiller d'un coup toute la flotte inactive.
+
+Usage:
+    python coordinator/async_server.py
+    SERVER_MODE=async python coordinator/railway_app.py
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import asyncio
+import itertools
+from email.utils import formatdate
+from urllib.parse import parse_qsl, urlencode, unquote_to_bytes
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import (
+    app, logger, start_background, task_signal, status_signal, output_signal,
+    MAX_LONG_POLL_SECONDS, PORT
+)
+
+# Threads d'accès à la base (appels à l'application Flask)
+ASYNC_DB_THREADS = int(os.environ.get("ASYNC_DB_THREADS", 16))
+
+# Workers en attente réveillés par un signal « nouvelles tâches »
+ASYNC_CLAIM_WAKE = int(os.environ.get("ASYNC_CLAIM_WAKE", 32))
+
+# Connexion keep-alive fermée après ce délai sans requête
+ASYNC_KEEPALIVE_SECONDS = float(os.environ.get("ASYNC_KEEPALIVE_SECONDS", 75))
+
+# Taille maximale de la ligne de requête et des en-têtes
+ASYNC_MAX_HEADER_BYTES = int(os.environ.get("ASYNC_MAX_HEADER_BYTES", 65536))
+
+# Taille maximale du corps d'une requête (Content-Length ou chunked)
+ASYNC_MAX_BODY_BYTES = int(os.environ.get("ASYNC_MAX_BODY_BYTES", 16 * 1024 * 1024))
+
+REASONS = {
+    100: "Continue", 400: "Bad Request", 408: "Request Timeout",
+    413: "Content Too Large", 431: "Request Header Fields Too Large", 501: "Not Implemented"
+}
+
+class HTTPRequest:
+    """Requête HTTP/1.x lue sur la connexion"""
+
+    def __init__(self, method, target, version, headers, body=b""):
+        self.method = method
+        self.version = version
+        self.headers = headers
+        self.body = body
+        self.path, _, self.query = target.partition("?")
+
+    def header(self, name, default=None):
+        return self.headers.get(name.lower(), default)
+
+    @property
+    def keep_alive(self):
+        connection = (self.header("connection") or "").lower()
+        if self.version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+class HTTPError(Exception):
+    def __init__(self, status):
+        super().__init__(REASONS.get(status, "Error"))
+        self.status = status
+
+async def read_request(reader, writer):
+    """Lire une requête (None si le client a fermé la connexion)"""
+    try:
+        head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), ASYNC_KEEPALIVE_SECONDS)
+    except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+        return None
+    except asyncio.LimitOverrunError:
+        raise HTTPError(431)
+
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, version = lines[0].split(" ")
+    except ValueError:
+        raise HTTPError(400)
+    if not version.startswith("HTTP/1."):
+        raise HTTPError(400)
+
+    headers = {}
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, sep, value = line.partition(":")
+        if not sep:
+            raise HTTPError(400)
+        name, value = name.strip().lower(), value.strip()
+        headers[name] = f"{headers[name]}, {value}" if name in headers else value
+    request = HTTPRequest(method, target, version, headers)
+
+    if (request.header("expect") or "").lower() == "100-continue":
+        writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+
+    if "chunked" in (request.header("transfer-encoding") or "").lower():
+        body = bytearray()
+        while True:
+            size_line = await reader.readuntil(b"\r\n")
+            try:
+                size = int(size_line.split(b";")[0].strip(), 16)
+            except ValueError:
+                raise HTTPError(400)
+            if size < 0:
+                raise HTTPError(400)
+            if size == 0:
+                await reader.readuntil(b"\r\n")  # Fin (trailers ignorés)
+                break
+            if len(body) + size > ASYNC_MAX_BODY_BYTES:
+                raise HTTPError(413)
+            body += await reader.readexactly(size)
+            await reader.readexactly(2)
+        request.body = bytes(body)
+    elif request.header("content-length"):
+        try:
+            length = int(request.header("content-length"))
+        except ValueError:
+            raise HTTPError(400)
+        if length < 0:
+            raise HTTPError(400)
+        if length > ASYNC_MAX_BODY_BYTES:
+            raise HTTPError(413)
+        request.body = await reader.readexactly(length)
+
+    return request
+
+class HTTPResponse:
+    """Réponse de l'application: corps complet, ou itérable à diffuser"""
+
+    def __init__(self, status, headers, body=b"", stream=None):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.stream = stream
+
+    @property
+    def code(self):
+        return int(self.status.split(" ", 1)[0])
+
+    def json(self):
+        try:
+            return json.loads(self.body)
+        except ValueError:
+            return None
+
+def bodiless(method, code):
+    """Réponse sans corps (ni Transfer-Encoding): HEAD, 1xx, 204 et 304"""
+    return method == "HEAD" or code < 200 or code in (204, 304)
+
+def close_stream(result):
+    """Fermer l'itérable WSGI (libère le contexte Flask et ses connexions)"""
+    if hasattr(result, "close"):
+        result.close()
+
+def no_claimed_tasks(response):
+    return response.code == 200 and not (response.json() or {}).get("claimed_tasks")
+
+def status_unchanged(response):
+    return response.code == 304
+
+def no_new_output(response):
+    if response.code != 200:
+        return False
+    data = response.json() or {}
+    return data.get("data") == "" and data.get("status") not in ("completed", "failed")
+
+class AsyncCoordinator:
+    """Serveur HTTP asyncio devant l'application Flask"""
+
+    def __init__(self, wsgi_app, threads=ASYNC_DB_THREADS):
+        self.app = wsgi_app
+        self.executor = ThreadPoolExecutor(threads, thread_name_prefix="bi-db")
+        self.loop = None
+        self.host = "0.0.0.0"
+        self.port = PORT
+        self.connections = 0
+        self.claimers = {}  # Workers en attente de tâches, du plus ancien au plus récent
+        self.sequence = itertools.count()
+        self.events = {}
+
+    # ---- signaux ----
+
+    def listen(self, signal):
+        """Relayer un TaskSignal (émis depuis n'importe quel thread) vers la boucle"""
+        self.events[signal] = asyncio.Event()
+
+        def relay():
+            try:
+                self.loop.call_soon_threadsafe(self.signalled, signal)
+            except RuntimeError:
+                pass  # Boucle arrêtée
+
+        signal.add_listener(relay)
+
+    def signalled(self, signal):
+        if signal is task_signal:
+            self.wake_claimers()
+        else:
+            event, self.events[signal] = self.events[signal], asyncio.Event()
+            event.set()
+
+    def wake_claimers(self, count=ASYNC_CLAIM_WAKE):
+        """Réveiller les `count` workers qui attendent depuis le plus longtemps"""
+        while count and self.claimers:
+            future = self.claimers.pop(next(iter(self.claimers)))
+            if not future.done():
+                future.set_result(None)
+                count -= 1
+
+    async def wait_signal(self, signal, version, timeout):
+        """Attendre un signal postérieur à `version` (au plus `timeout` s)"""
+        if signal.version() != version:
+            return
+        if signal is task_signal:
+            key = next(self.sequence)
+            future = self.claimers[key] = self.loop.create_future()
+            try:
+                await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self.claimers.pop(key, None)
+        else:
+            try:
+                await asyncio.wait_for(self.events[signal].wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    # ---- appel de l'application (pool de threads) ----
+
+    def environ(self, request, body, query):
+        environ = {
+            "REQUEST_METHOD": request.method,
+            "SCRIPT_NAME": "",
+            "PATH_INFO": unquote_to_bytes(request.path).decode("latin-1"),
+            "QUERY_STRING": query,
+            "CONTENT_TYPE": request.header("content-type", ""),
+            "CONTENT_LENGTH": str(len(body)),
+            "SERVER_NAME": self.host,
+            "SERVER_PORT": str(self.port),
+            "SERVER_PROTOCOL": request.version,
+            "REMOTE_ADDR": request.remote_addr,
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": "http",
+            "wsgi.input": io.BytesIO(body),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False
+        }
+        for name, value in request.headers.items():
+            key = "HTTP_" + name.upper().replace("-", "_")
+            # Corps déjà lu (et dé-chunké): seule sa longueur compte
+            if key not in ("HTTP_CONTENT_TYPE", "HTTP_CONTENT_LENGTH", "HTTP_TRANSFER_ENCODING"):
+                environ[key] = value
+        return environ
+
+    def run_app(self, environ):
+        """Exécuter la route (thread du pool); le corps est lu ici sauf s'il
+        est diffusé (pas de Content-Length, ex: export)"""
+        captured = {}
+
+        def start_response(status, headers, exc_info=None):
+            captured["status"], captured["headers"] = status, headers
+            return captured.setdefault("written", []).append
+
+        result = self.app(environ, start_response)
+        headers = captured["headers"]
+        code = int(captured["status"].split(" ", 1)[0])
+        if bodiless(environ["REQUEST_METHOD"], code):
+            close_stream(result)
+            return HTTPResponse(captured["status"], headers)
+        if any(name.lower() == "content-length" for name, _ in headers):
+            try:
+                body = b"".join(captured.get("written", []) + list(result))
+            finally:
+                close_stream(result)
+            return HTTPResponse(captured["status"], headers, body)
+
+        return HTTPResponse(captured["status"], headers, b"".join(captured.get("written", [])),
+                            stream=result)
+
+    async def call(self, request, body=None, query=None):
+        environ = self.environ(
+            request, request.body if body is None else body,
+            request.query if query is None else query
+        )
+        return await self.loop.run_in_executor(self.executor, self.run_app, environ)
+
+    # ---- long-polling ----
+
+    async def long_poll(self, request, signal, idle, body=None, query=None, wait=0.0):
+        """Rappeler la route (avec wait=0) à chaque signal tant que `idle`
+        juge la réponse sans nouveauté, au plus `wait` secondes"""
+        deadline = time.monotonic() + max(0.0, min(wait, MAX_LONG_POLL_SECONDS))
+        while True:
+            version = signal.version()
+            response = await self.call(request, body, query)
+
+            waiting = idle(response)
+            if signal is task_signal and not waiting and response.code == 200:
+                # Il reste peut-être du travail: passer le relais
+                self.wake_claimers()
+
+            remaining = deadline - time.monotonic()
+            if not waiting or remaining <= 0:
+                return response
+            await self.wait_signal(signal, version, remaining)
+
+            # Client parti pendant l'attente: ne plus lui réserver de tâches
+            if request.disconnected():
+                return response
+
+    def without_wait(self, request):
+        """(wait demandé, corps JSON et query string avec wait=0)"""
+        params = parse_qsl(request.query, keep_blank_values=True)
+        wait = dict(params).get("wait", 0)
+        query = urlencode([(key, value) for key, value in params if key != "wait"] + [("wait", "0")])
+        body = None
+
+        if request.method == "POST" and request.body:
+            try:
+                data = json.loads(request.body)
+            except ValueError:
+                data = None
+            if isinstance(data, dict):
+                wait = data.get("wait", wait)
+                body = json.dumps(dict(data, wait=0)).encode("utf-8")
+
+        try:
+            wait = float(wait)
+        except (TypeError, ValueError):
+            wait = 0.0
+        return wait, body, query
+
+    async def dispatch(self, request):
+        """Router les requêtes de long-polling; le reste va tel quel à Flask"""
+        path, method = request.path, request.method
+        parts = path.strip("/").split("/")
+
+        if path == "/api/tasks/claim" and method == "POST":
+            signal, idle = task_signal, no_claimed_tasks
+        elif path == "/api/tasks/status" and method in ("GET", "POST"):
+            signal, idle = status_signal, status_unchanged
+        elif len(parts) == 3 and parts[:2] == ["api", "tasks"] and parts[2].isdigit() and method == "GET":
+            signal, idle = status_signal, status_unchanged
+        elif (len(parts) == 4 and parts[:2] == ["api", "tasks"] and parts[3] == "output"
+                and method == "GET"):
+            signal, idle = output_signal, no_new_output
+        else:
+            return await self.call(request)
+
+        wait, body, query = self.without_wait(request)
+        if wait <= 0:
+            return await self.call(request)
+        return await self.long_poll(request, signal, idle, body, query, wait)
+
+    # ---- connexions ----
+
+    async def send(self, writer, request, response, keep_alive):
+        head = [f"HTTP/1.1 {response.status}"]
+        head += [f"{name}: {value}" for name, value in response.headers
+                 if name.lower() not in ("connection", "transfer-encoding")]
+        head.append(f"Date: {formatdate(usegmt=True)}")
+
+        chunked = response.stream is not None and request.version == "HTTP/1.1"
+        if response.stream is not None and not chunked:
+            keep_alive = False  # HTTP/1.0: fin du corps = fermeture
+        if chunked:
+            head.append("Transfer-Encoding: chunked")
+        elif (response.stream is None and not bodiless(request.method, response.code)
+                and not any(name.lower() == "content-length" for name, _ in response.headers)):
+            head.append(f"Content-Length: {len(response.body)}")
+        head.append("Connection: " + ("keep-alive" if keep_alive else "close"))
+
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+        if not bodiless(request.method, response.code):
+            writer.write(response.body)
+        await writer.drain()
+
+        if response.stream is not None:
+            await self.send_stream(writer, response, chunked)
+        return keep_alive
+
+    async def send_stream(self, writer, response, chunked):
+        """Diffuser un corps itérable, morceau par morceau (lu dans le pool)"""
+        iterator = iter(response.stream)
+        try:
+            while True:
+                chunk = await self.loop.run_in_executor(self.executor, next, iterator, None)
+                if chunk is None:
+                    break
+                if not chunk:
+                    continue
+                if chunked:
+                    writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                else:
+                    writer.write(chunk)
+                await writer.drain()
+            if chunked:
+                writer.write(b"0\r\n\r\n")
+                await writer.drain()
+        finally:
+            await self.loop.run_in_executor(self.executor, close_stream, response.stream)
+
+    async def handle(self, reader, writer):
+        """Servir les requêtes d'une connexion (keep-alive)"""
+        self.connections += 1
+        peer = writer.get_extra_info("peername")
+        remote_addr = peer[0] if isinstance(peer, tuple) else ""
+        try:
+            while True:
+                try:
+                    request = await read_request(reader, writer)
+                except HTTPError as e:
+                    writer.write(
+                        f"HTTP/1.1 {e.status} {e}\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+                        .encode("latin-1")
+                    )
+                    break
+                if request is None:
+                    break
+
+                request.remote_addr = remote_addr
+                request.disconnected = reader.at_eof
+                try:
+                    response = await self.dispatch(request)
+                except Exception as e:
+                    logger.error(f"❌ Erreur serveur asyncio: {e}")
+                    body = json.dumps({"error": "Erreur interne du serveur"}).encode("utf-8")
+                    response = HTTPResponse("500 INTERNAL SERVER ERROR", [
+                        ("Content-Type", "application/json"),
+                        ("Content-Length", str(len(body)))
+                    ], body)
+
+                if not await self.send(writer, request, response, request.keep_alive):
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def serve(self, host="0.0.0.0", port=PORT):
+        self.loop = asyncio.get_running_loop()
+        self.host, self.port = host, port
+        for signal in (task_signal, status_signal, output_signal):
+            self.listen(signal)
+
+        server = await asyncio.start_server(
+            self.handle, host, port, backlog=4096, limit=ASYNC_MAX_HEADER_BYTES
+        )
+        logger.info(f"⚡ Serveur asyncio en écoute sur {host}:{port} "
+                    f"({ASYNC_DB_THREADS} threads base de données)")
+        async with server:
+            await server.serve_forever()
+
+def raise_file_limit():
+    """Relever la limite de descripteurs ouverts (une socket par worker connecté)"""
+    try:
+        import resource
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft != hard:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+        return hard
+    except (ImportError, ValueError, OSError):
+        return None
+
+def serve(port=PORT, host="0.0.0.0"):
+    """Lancer le coordinateur en mode asyncio (bloquant)"""
+    limit = raise_file_limit()
+    if limit is not None:
+        logger.info(f"📂 Descripteurs de fichiers: {limit}")
+    try:
+        asyncio.run(AsyncCoordinator(app).serve(host, port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    logger.info("=" * 60)
+    logger.info("🚀 BI-COMPUTE COORDINATOR (asyncio)")
+    logger.info(f"🔌 Port: {PORT}")
+    logger.info("=" * 60)
+    start_background()
+    serve()
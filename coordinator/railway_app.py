@@ -10,7 +10,10 @@ import sys
 # Ajouter le répertoire courant au chemin
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from app import app
+from app import app, start_background
+
+# "threaded" (serveur Flask, un thread par requête) ou "async" (async_server.py)
+SERVER_MODE = os.environ.get("SERVER_MODE", "threaded").lower()
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
@@ -19,11 +22,20 @@ if __name__ == "__main__":
     print("🚀 BI-COMPUTE HACKATHON DEMO - RAILWAY DEPLOYMENT")
     print(f"🌐 Port: {port}")
     print(f"🔗 URL: https://{os.environ.get('RAILWAY_STATIC_URL', 'localhost:' + str(port))}")
+    print(f"⚙️  Serveur: {SERVER_MODE}")
     print("=" * 60)
     
-    app.run(
-        host="0.0.0.0",
-        port=port,
-        debug=False,
-        threaded=True
-    )
\ No newline at end of file
+    start_background()
+    
+    if SERVER_MODE == "async":
+        # Boucle asyncio: des milliers de workers en long-polling sans un
+        # thread par connexion
+        from async_server import serve
+        serve(port)
+    else:
+        app.run(
+            host="0.0.0.0",
+            port=port,
+            debug=False,
+            threaded=True
+        )
\ No newline at end of file
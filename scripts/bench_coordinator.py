@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la couche base de données du coordinateur
+BesmaInfo © 2025 - Hackathon LabLab AI
+
+Mesure les requêtes/seconde des routes chaudes (register, claim, submit)
+avec plusieurs threads concurrents, en mode "legacy" (une connexion par
+requête, journal rollback, synchronous=FULL), en mode "pool" (pool de
+connexions persistantes, WAL, synchronous=NORMAL), puis en mode "memory"
+(pool + moteur de dispatch en mémoire avec écriture différée).
+
+Usage:
+    python scripts/bench_coordinator.py [--threads 8] [--duration 5]
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import threading
+import subprocess
+
+COORDINATOR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "coordinator")
+
+MODES = {
+    "legacy": {
+        "DB_POOL_SIZE": "0",
+        "DB_JOURNAL_MODE": "DELETE",
+        "DB_SYNCHRONOUS": "FULL"
+    },
+    "pool": {
+        "DB_POOL_SIZE": "16",
+        "DB_JOURNAL_MODE": "WAL",
+        "DB_SYNCHRONOUS": "NORMAL"
+    },
+    "memory": {
+        "DB_POOL_SIZE": "16",
+        "DB_JOURNAL_MODE": "WAL",
+        "DB_SYNCHRONOUS": "NORMAL",
+        "DISPATCH_ENGINE": "memory"
+    }
+}
+
+def run_phase(app, threads, duration, make_request):
+    """Lancer make_request en boucle sur plusieurs threads, renvoyer req/s"""
+    counts = [0] * threads
+    deadline = time.time() + duration
+
+    def loop(index):
+        client = app.test_client()
+        while time.time() < deadline:
+            make_request(client, index, counts[index])
+            counts[index] += 1
+
+    pool = [threading.Thread(target=loop, args=(i,)) for i in range(threads)]
+    start = time.time()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+
+    return round(sum(counts) / (time.time() - start), 1)
+
+def run_child(threads, duration):
+    """Exécuter le benchmark dans le mode configuré par l'environnement"""
+    workdir = tempfile.mkdtemp(prefix="bi-bench-")
+    os.chdir(workdir)
+    sys.path.insert(0, os.path.abspath(COORDINATOR_DIR))
+
+    logging.disable(logging.INFO)
+    import app as coordinator
+
+    # Pré-remplir la file pour que les claims trouvent toujours du travail
+    conn = coordinator.get_db_connection()
+    conn.executemany(
+        "INSERT INTO tasks (name, type, command, status, created_at) VALUES (?, 'shell', ?, 'pending', ?)",
+        [(f"bench-{i}", '{"type": "shell", "command": "true"}', f"{i:08d}") for i in range(20000)]
+    )
+    conn.commit()
+    conn.close()
+
+    claimed = [[] for _ in range(threads)]
+
+    def register(client, index, n):
+        client.post("/api/workers/register", json={"name": f"bench-{index}-{n}"})
+
+    def claim(client, index, n):
+        data = client.post("/api/tasks/claim", json={"worker_id": index + 1, "max_tasks": 1}).get_json()
+        claimed[index].extend(task["task_id"] for task in data.get("claimed_tasks", []))
+
+    def submit(client, index, n):
+        task_id = claimed[index][n % len(claimed[index])] if claimed[index] else 1
+        client.post(f"/api/tasks/{task_id}/results", json={
+            "worker_id": index + 1,
+            "result": {"success": True, "stdout": "ok", "stderr": ""}
+        })
+
+    results = {
+        "register": run_phase(coordinator.app, threads, duration, register),
+        "claim": run_phase(coordinator.app, threads, duration, claim),
+        "submit": run_phase(coordinator.app, threads, duration, submit)
+    }
+    print(json.dumps(results))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DB du coordinateur BI-COMPUTE")
+    parser.add_argument("--threads", type=int, default=8, help="Threads concurrents")
+    parser.add_argument("--duration", type=float, default=5, help="Durée de chaque phase (s)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.threads, args.duration)
+        return
+
+    print("=" * 60)
+    print("📈 BENCHMARK COORDINATEUR (requêtes/seconde)")
+    print(f"   Threads: {args.threads} | Durée par phase: {args.duration}s")
+    print("=" * 60)
+
+    all_results = {}
+    for mode, env in MODES.items():
+        child_env = dict(os.environ, **env)
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child",
+             "--threads", str(args.threads), "--duration", str(args.duration)],
+            env=child_env, capture_output=True, text=True, check=True
+        ).stdout
+        all_results[mode] = json.loads(output.strip().splitlines()[-1])
+
+    print(f"   {'Route':<10} | {'legacy':>10} | {'pool':>10} | {'memory':>10} | {'gain':>6}")
+    print("   " + "-" * 59)
+    for route in ("register", "claim", "submit"):
+        before = all_results["legacy"][route]
+        after = all_results["pool"][route]
+        memory = all_results["memory"][route]
+        gain = memory / before if before else 0
+        print(f"   {route:<10} | {before:>10} | {after:>10} | {memory:>10} | x{gain:>5.2f}")
+
+if __name__ == "__main__":
+    main()
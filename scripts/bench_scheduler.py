@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Simulateur d'ordonnancement du coordinateur
+BesmaInfo © 2025 - Hackathon LabLab AI
+
+Rejoue une charge mixte sur le vrai coordinateur (base temporaire, client de
+test Flask) en « tours » simulés: à chaque tour, chaque worker réclame une
+tâche. Un utilisateur soumet d'emblée un long balayage, pendant que deux
+utilisateurs interactifs soumettent régulièrement de petits jobs.
+
+Deux modes sont comparés:
+  - fifo: toutes les tâches dans la même file (ancien comportement)
+  - fair: une file par utilisateur (partage équitable pondéré)
+
+L'attente d'une tâche est mesurée en tours entre sa soumission et son claim.
+
+Usage:
+    python scripts/bench_scheduler.py [--workers 10] [--sweep 5000]
+"""
+
+import os
+import sys
+import json
+import logging
+import argparse
+import tempfile
+import subprocess
+
+COORDINATOR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "coordinator")
+
+def percentile(values, fraction):
+    """Percentile simple (valeurs triées, sans interpolation)"""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def run_child(mode, workers, sweep, jobs, job_size, job_every):
+    """Simuler la charge dans le mode donné et afficher les attentes en JSON"""
+    os.chdir(tempfile.mkdtemp(prefix="bi-sched-"))
+    sys.path.insert(0, os.path.abspath(COORDINATOR_DIR))
+
+    logging.disable(logging.INFO)
+    import app as coordinator
+
+    client = coordinator.app.test_client()
+    conn = coordinator.get_db_connection()
+    conn.execute("DELETE FROM tasks")
+    conn.commit()
+    conn.close()
+
+    worker_ids = [
+        client.post("/api/workers/register", json={"name": f"sim-{i}"}).get_json()["worker_id"]
+        for i in range(workers)
+    ]
+
+    submitted = {}  # task_id -> (utilisateur, tour de soumission)
+    waits = {}      # utilisateur -> attentes (tours)
+    dispatched = 0
+
+    def submit(user, count, round_number):
+        queue = user if mode == "fair" else None
+        tasks = [{"name": f"{user}-{round_number}-{i}", "command": "true", "queue": queue}
+                 for i in range(count)]
+        task_ids = client.post("/api/tasks/batch", json=tasks).get_json()["task_ids"]
+        for task_id in task_ids:
+            submitted[task_id] = (user, round_number)
+
+    submit("sweep", sweep, 0)
+
+    interactive = ("alice", "bob")
+    total_jobs = 0
+    round_number = 0
+    while dispatched < len(submitted) or total_jobs < jobs:
+        if total_jobs < jobs and round_number % job_every == 0:
+            submit(interactive[total_jobs % 2], job_size, round_number)
+            total_jobs += 1
+
+        for worker_id in worker_ids:
+            claimed = client.post("/api/tasks/claim", json={
+                "worker_id": worker_id, "max_tasks": 1
+            }).get_json()["claimed_tasks"]
+            for task in claimed:
+                user, submitted_round = submitted[task["task_id"]]
+                waits.setdefault(user, []).append(round_number - submitted_round)
+                dispatched += 1
+
+        round_number += 1
+
+    result = {}
+    for user in ("sweep",) + interactive:
+        values = waits.get(user, [])
+        result[user] = {
+            "tasks": len(values),
+            "mean": round(sum(values) / len(values), 1) if values else None,
+            "p95": percentile(values, 0.95),
+            "max": max(values) if values else None
+        }
+    result["rounds"] = round_number
+    print(json.dumps(result))
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulateur d'ordonnancement BI-COMPUTE")
+    parser.add_argument("--workers", type=int, default=10, help="Workers simulés")
+    parser.add_argument("--sweep", type=int, default=5000, help="Tâches du balayage")
+    parser.add_argument("--jobs", type=int, default=20, help="Jobs interactifs")
+    parser.add_argument("--job-size", type=int, default=5, help="Tâches par job interactif")
+    parser.add_argument("--job-every", type=int, default=10, help="Tours entre deux jobs")
+    parser.add_argument("--mode", choices=["fifo", "fair"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    options = ["--workers", str(args.workers), "--sweep", str(args.sweep),
+               "--jobs", str(args.jobs), "--job-size", str(args.job_size),
+               "--job-every", str(args.job_every)]
+
+    if args.mode:
+        run_child(args.mode, args.workers, args.sweep, args.jobs, args.job_size, args.job_every)
+        return
+
+    print("=" * 60)
+    print("⚖️  SIMULATION D'ORDONNANCEMENT (attente en tours)")
+    print(f"   Workers: {args.workers} | Balayage: {args.sweep} tâches | "
+          f"Jobs interactifs: {args.jobs} x {args.job_size}")
+    print("=" * 60)
+
+    for mode in ("fifo", "fair"):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--mode", mode] + options,
+            capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+
+        print(f"\n📋 Mode {mode} ({result['rounds']} tours)")
+        print(f"   {'Utilisateur':<12} | {'tâches':>7} | {'moyenne':>8} | {'p95':>6} | {'max':>6}")
+        print("   " + "-" * 50)
+        for user in ("sweep", "alice", "bob"):
+            stats = result[user]
+            print(f"   {user:<12} | {stats['tasks']:>7} | {stats['mean']!s:>8} | "
+                  f"{stats['p95']!s:>6} | {stats['max']!s:>6}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Audit des plans d'exécution des requêtes chaudes du coordinateur
+BesmaInfo © 2025 - Hackathon LabLab AI
+
+Crée une base temporaire avec le schéma et les migrations du coordinateur,
+la remplit, puis vérifie avec EXPLAIN QUERY PLAN qu'aucune requête de
+HOT_QUERIES ne fait de scan complet ni de tri temporaire.
+Code de sortie non nul en cas de régression (utilisable en CI).
+
+Usage:
+    python scripts/check_query_plans.py [--rows 50000]
+"""
+
+import os
+import sys
+import logging
+import argparse
+import tempfile
+
+COORDINATOR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "coordinator")
+
+def main():
+    parser = argparse.ArgumentParser(description="Audit EXPLAIN QUERY PLAN des requêtes chaudes")
+    parser.add_argument("--rows", type=int, default=50000, help="Nombre de tâches à générer")
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="bi-plans-"))
+    sys.path.insert(0, os.path.abspath(COORDINATOR_DIR))
+
+    logging.disable(logging.INFO)
+    import app as coordinator
+
+    conn = coordinator.get_db_connection()
+    statuses = ["pending", "running", "completed", "failed"]
+    conn.executemany(
+        """INSERT INTO tasks (name, type, command, status, created_at, priority, queue)
+           VALUES (?, 'shell', 'true', ?, ?, ?, ?)""",
+        [(f"task-{i}", statuses[i % 4], f"2025-01-01T{i:08d}", i % 3, f"queue-{i % 50}")
+         for i in range(args.rows)]
+    )
+    # Files inactives (historique): la sélection des files actives doit les ignorer
+    conn.executemany(
+        "INSERT INTO queues (name, pending) VALUES (?, 0)",
+        [(f"idle-{i}",) for i in range(args.rows // 10)]
+    )
+    conn.executemany(
+        "INSERT INTO workers (name, last_seen, is_active) VALUES (?, ?, ?)",
+        [(f"worker-{i}", f"2025-01-01T{i:08d}", i % 2) for i in range(args.rows // 10)]
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+
+    regressions = coordinator.explain_hot_queries(conn)
+    conn.close()
+
+    for name in coordinator.HOT_QUERIES:
+        print(f"{'❌' if name in regressions else '✅'} {name}")
+        for detail in regressions.get(name, []):
+            print(f"     {detail}")
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} requête(s) chaude(s) sans index adapté")
+        sys.exit(1)
+
+    print("\n✅ Tous les plans utilisent un index")
+
+if __name__ == "__main__":
+    main()
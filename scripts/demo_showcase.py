@@ -78,12 +78,16 @@ class DemoShowcase:
                 # Boucle de travail
                 while self.demo_running:
                     try:
-                        # Récupérer les tâches
-                        tasks_resp = requests.get(f"{self.coordinator_url}/api/tasks/available")
+                        # Réclamer des tâches
+                        tasks_resp = requests.post(
+                            f"{self.coordinator_url}/api/tasks/claim",
+                            json={"worker_id": worker_id, "max_tasks": 2},  # Max 2 tâches à la fois
+                            timeout=5
+                        )
                         if tasks_resp.status_code == 200:
-                            tasks = tasks_resp.json().get("available_tasks", [])
+                            tasks = tasks_resp.json().get("claimed_tasks", [])
                             
-                            for task in tasks[:2]:  # Max 2 tâches à la fois
+                            for task in tasks:
                                 # Simuler l'exécution
                                 exec_time = random.uniform(1, 4)
                                 time.sleep(exec_time)
@@ -91,7 +95,7 @@ class DemoShowcase:
                                 # Résultat simulé
                                 result = {
                                     "success": random.random() > 0.1,  # 90% de succès
-                                    "stdout": f"✅ Tâche {task['id']} exécutée par {name} en {exec_time:.1f}s",
+                                    "stdout": f"✅ Tâche {task['task_id']} exécutée par {name} en {exec_time:.1f}s",
                                     "stderr": "",
                                     "execution_time": exec_time
                                 }
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Test de charge: milliers de workers inactifs en long-polling
+BesmaInfo © 2025 - Hackathon LabLab AI
+
+Lance le coordinateur (base temporaire) en mode asyncio ou threaded, puis
+ouvre N connexions keep-alive qui réclament des tâches en long-polling
+(POST /api/tasks/claim avec wait), comme une flotte de téléphones sans
+travail. Une fois la flotte connectée, mesure:
+  - la mémoire résidente (RSS) et le nombre de threads du serveur;
+  - la latence d'une requête ordinaire (/api/health) sous cette charge;
+  - le délai de distribution d'un lot de tâches soumis à la flotte.
+
+Code de sortie non nul si la flotte n'a pas pu être tenue, si les tâches
+n'ont pas été distribuées ou si la RSS dépasse le budget.
+
+Usage:
+    python scripts/load_idle_workers.py [--workers 5000] [--memory-budget-mb 256]
+    python scripts/load_idle_workers.py --server threaded --workers 1000
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+SERVERS = {
+    "async": os.path.join(ROOT_DIR, "coordinator", "async_server.py"),
+    "threaded": os.path.join(ROOT_DIR, "coordinator", "railway_app.py")
+}
+
+def raise_file_limit():
+    """Une socket par worker simulé: relever la limite de descripteurs"""
+    try:
+        import resource
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+        return hard
+    except (ImportError, ValueError, OSError):
+        return None
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def process_status(pid):
+    """(RSS en Mo, nombre de threads) d'après /proc (Linux)"""
+    values = {}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                values[key] = value.split()
+    except OSError:
+        return None, None
+    return round(int(values["VmRSS"][0]) / 1024, 1), int(values["Threads"][0])
+
+def percentile(values, fraction):
+    """Percentile simple (valeurs triées, sans interpolation)"""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+async def request(reader, writer, method, path, payload=None):
+    """Requête HTTP/1.1 keep-alive; renvoie (code, corps JSON)"""
+    body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode("latin-1")
+        + body
+    )
+    await writer.drain()
+
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    code = int(lines[0].split(" ")[1])
+    length = 0
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    data = await reader.readexactly(length) if length else b""
+    return code, json.loads(data) if data else None
+
+class Fleet:
+    """Workers simulés: une connexion et un claim en attente chacun"""
+
+    def __init__(self, port, wait):
+        self.port = port
+        self.wait = wait
+        self.connected = 0
+        self.polling = 0
+        self.errors = 0
+        self.claimed = {}  # task_id -> instant du claim
+
+    async def worker(self, worker_id, ready):
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        except OSError:
+            self.errors += 1
+            ready.set_result(None)
+            return
+        self.connected += 1
+        ready.set_result(None)
+        try:
+            while True:
+                self.polling += 1
+                try:
+                    code, data = await request(reader, writer, "POST", "/api/tasks/claim", {
+                        "worker_id": worker_id, "max_tasks": 1, "wait": self.wait
+                    })
+                finally:
+                    self.polling -= 1
+                if code != 200:
+                    self.errors += 1
+                    await asyncio.sleep(1)
+                    continue
+                for task in data["claimed_tasks"]:
+                    self.claimed[task["task_id"]] = time.monotonic()
+        except (OSError, asyncio.IncompleteReadError):
+            self.errors += 1
+        finally:
+            self.connected -= 1
+            writer.close()
+
+async def run_load(port, pid, args):
+    fleet = Fleet(port, args.wait)
+    workers = []
+
+    print(f"🔌 Connexion de {args.workers} workers (par paquets de {args.ramp})...")
+    start = time.monotonic()
+    loop = asyncio.get_running_loop()
+    for first in range(0, args.workers, args.ramp):
+        batch = []
+        for worker_id in range(first + 1, min(first + args.ramp, args.workers) + 1):
+            ready = loop.create_future()
+            workers.append(asyncio.create_task(fleet.worker(worker_id, ready)))
+            batch.append(ready)
+        await asyncio.gather(*batch)
+    await asyncio.sleep(args.settle)
+    print(f"   {fleet.connected} connectés, {fleet.polling} claims en attente "
+          f"({time.monotonic() - start:.1f}s, {fleet.errors} erreur(s))")
+
+    rss, threads = process_status(pid)
+    result = {"connected": fleet.connected, "polling": fleet.polling, "rss_mb": rss, "threads": threads}
+
+    # Latence d'une requête ordinaire pendant que la flotte attend (un
+    # serveur saturé peut ne jamais répondre: délai maximal args.timeout)
+    result.update(health_p50_ms=None, health_p99_ms=None, tasks_dispatched=0,
+                  dispatch_p50_ms=None, dispatch_max_ms=None, connected_after=fleet.connected)
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection("127.0.0.1", port), args.timeout)
+        latencies = []
+        for _ in range(args.probes):
+            started = time.monotonic()
+            await asyncio.wait_for(request(reader, writer, "GET", "/api/health"), args.timeout)
+            latencies.append((time.monotonic() - started) * 1000)
+        result["health_p50_ms"] = round(percentile(latencies, 0.5), 1)
+        result["health_p99_ms"] = round(percentile(latencies, 0.99), 1)
+
+        # Distribution d'un lot de tâches aux workers inactifs
+        already = set(fleet.claimed)
+        submitted = time.monotonic()
+        code, data = await asyncio.wait_for(request(reader, writer, "POST", "/api/tasks/batch", [
+            {"name": f"load-{i}", "command": "true"} for i in range(args.tasks)
+        ]), args.timeout)
+        task_ids = set(data["task_ids"]) - already
+        writer.close()
+    except (asyncio.TimeoutError, OSError) as e:
+        print(f"❌ Le serveur ne répond plus sous la charge: {e!r}")
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        return result
+
+    deadline = submitted + args.wait
+    while time.monotonic() < deadline and not task_ids <= set(fleet.claimed):
+        await asyncio.sleep(0.01)
+    dispatched = [fleet.claimed[task_id] - submitted for task_id in task_ids if task_id in fleet.claimed]
+    result["tasks_dispatched"] = len(dispatched)
+    result["dispatch_p50_ms"] = round(percentile(dispatched, 0.5) * 1000, 1) if dispatched else None
+    result["dispatch_max_ms"] = round(max(dispatched) * 1000, 1) if dispatched else None
+    result["connected_after"] = fleet.connected
+
+    for task in workers:
+        task.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge: workers inactifs en long-polling")
+    parser.add_argument("--workers", type=int, default=5000, help="Workers simulés (connexions)")
+    parser.add_argument("--server", choices=sorted(SERVERS), default="async", help="Mode du serveur")
+    parser.add_argument("--memory-budget-mb", type=float, default=256, help="RSS maximale du serveur (Mo)")
+    parser.add_argument("--tasks", type=int, default=200, help="Tâches soumises à la flotte inactive")
+    parser.add_argument("--wait", type=float, default=25, help="Durée du long-polling des claims (s)")
+    parser.add_argument("--ramp", type=int, default=250, help="Connexions ouvertes par paquet")
+    parser.add_argument("--settle", type=float, default=3, help="Pause avant les mesures (s)")
+    parser.add_argument("--probes", type=int, default=50, help="Requêtes /api/health mesurées")
+    parser.add_argument("--timeout", type=float, default=30, help="Délai maximal d'une requête de mesure (s)")
+    args = parser.parse_args()
+
+    limit = raise_file_limit()
+    if limit is not None and limit < args.workers + 100:
+        print(f"⚠️ Limite de descripteurs ({limit}) trop basse pour {args.workers} workers")
+
+    port = free_port()
+    workdir = tempfile.mkdtemp(prefix="bi-load-")
+    env = dict(os.environ, PORT=str(port), SERVER_MODE=args.server)
+    log = open(os.path.join(workdir, "server.log"), "w")
+    server = subprocess.Popen([sys.executable, SERVERS[args.server]], cwd=workdir, env=env,
+                              stdout=log, stderr=subprocess.STDOUT)
+
+    print("=" * 60)
+    print(f"📡 TEST DE CHARGE: {args.workers} WORKERS INACTIFS ({args.server})")
+    print("=" * 60)
+
+    try:
+        for _ in range(100):
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/api/health", timeout=1)
+                break
+            except OSError:
+                time.sleep(0.1)
+        else:
+            print(f"❌ Le serveur n'a pas démarré (voir {workdir}/server.log)")
+            sys.exit(1)
+
+        idle_rss, idle_threads = process_status(server.pid)
+        result = asyncio.run(run_load(port, server.pid, args))
+    finally:
+        server.terminate()
+        server.wait()
+        log.close()
+
+    ok = (result["connected"] >= args.workers
+          and result["connected_after"] >= args.workers
+          and result["tasks_dispatched"] >= args.tasks
+          and result["rss_mb"] is not None and result["rss_mb"] <= args.memory_budget_mb)
+
+    print(f"\n📋 Résultats ({args.server})")
+    print(f"   Workers connectés:      {result['connected']} ({result['polling']} claims en attente)")
+    print(f"   RSS serveur:            {idle_rss} Mo au repos -> {result['rss_mb']} Mo "
+          f"(budget {args.memory_budget_mb:g} Mo)")
+    if result["rss_mb"] is not None and result["connected"]:
+        print(f"   Par connexion:          "
+              f"{(result['rss_mb'] - idle_rss) * 1024 / result['connected']:.1f} Ko")
+    print(f"   Threads serveur:        {idle_threads} -> {result['threads']}")
+    print(f"   /api/health sous charge: p50 {result['health_p50_ms']} ms, "
+          f"p99 {result['health_p99_ms']} ms")
+    print(f"   Distribution:           {result['tasks_dispatched']}/{args.tasks} tâches, "
+          f"p50 {result['dispatch_p50_ms']} ms, max {result['dispatch_max_ms']} ms")
+    print(f"\n{'✅ Flotte tenue dans le budget' if ok else '❌ Objectif non atteint'}")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -7,13 +7,17 @@ Version hackathon - BesmaInfo © 2025
 import os
 import sys
 import json
+import codecs
 import time
+import queue
 import platform
 import logging
 import requests
+import threading
 import subprocess
 import tempfile
 import argparse
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures, FIRST_COMPLETED
 from datetime import datetime
 
 # Configuration
@@ -23,23 +27,404 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Modules importés d'avance par les interpréteurs préchauffés
+PYTHON_POOL_PRELOAD = [
+    "math", "random", "time", "json", "hashlib", "statistics",
+    "itertools", "collections", "datetime", "re"
+]
+
+# Boucle exécutée par chaque interpréteur préchauffé (python -c).
+# Protocole: une requête JSON {"code": ..., "max_output": ...} par ligne sur
+# stdin; sur stdout, la sortie de la tâche par morceaux bornés
+# {"stream": ..., "data": ...} (au plus max_output caractères par flux),
+# puis une réponse finale {"exit_code": ...} (avec la vraie fin des flux
+# tronqués). Les fd 0/1 sont ensuite redirigés vers /dev/null pour que le
+# code utilisateur ne puisse pas corrompre le protocole.
+PYTHON_EXECUTOR_SOURCE = r"""
+import sys, os, io, json, time, builtins, threading, traceback, contextlib
+try:
+    import resource
+except ImportError:
+    resource = None
+
+for module in sys.argv[1:]:
+    try:
+        __import__(module)
+    except ImportError:
+        pass
+
+requests_in = os.fdopen(os.dup(0), "r", encoding="utf-8")
+replies_out = os.fdopen(os.dup(1), "w", encoding="utf-8")
+devnull = os.open(os.devnull, os.O_RDWR)
+os.dup2(devnull, 0)
+os.dup2(devnull, 1)
+
+CHUNK_CHARS = 16384
+EMIT_INTERVAL = 1.0
+TAIL_CHARS = 5000
+reply_lock = threading.Lock()
+
+def send(message):
+    with reply_lock:
+        replies_out.write(json.dumps(message) + "\n")
+        replies_out.flush()
+
+class ChunkedOutput(io.TextIOBase):
+    def __init__(self, name, max_chars):
+        self.name = name
+        self.room = max_chars
+        self.buffer = []
+        self.buffered = 0
+        self.tail = ""
+        self.truncated = False
+        self.lock = threading.RLock()
+    
+    def writable(self):
+        return True
+    
+    def write(self, text):
+        if not isinstance(text, str):
+            raise TypeError(f"write() argument must be str, not {type(text).__name__}")
+        with self.lock:
+            if self.closed:
+                return len(text)
+            self.tail = (self.tail + text)[-TAIL_CHARS:]
+            kept = text[:max(0, self.room)]
+            self.room -= len(kept)
+            self.truncated = self.truncated or len(kept) < len(text)
+            if kept:
+                self.buffer.append(kept)
+                self.buffered += len(kept)
+            if self.buffered >= CHUNK_CHARS:
+                self.flush()
+        return len(text)
+    
+    def flush(self):
+        with self.lock:
+            if self.closed:
+                return
+            data = "".join(self.buffer)
+            self.buffer = []
+            self.buffered = 0
+            for start in range(0, len(data), CHUNK_CHARS):
+                send({"stream": self.name, "data": data[start:start + CHUNK_CHARS]})
+
+outputs = []
+
+def flush_periodically():
+    while True:
+        time.sleep(EMIT_INTERVAL)
+        for out in list(outputs):
+            out.flush()
+
+threading.Thread(target=flush_periodically, daemon=True).start()
+
+def peak_memory_kb():
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+for line in requests_in:
+    request = json.loads(line)
+    code = request["code"]
+    stdout = ChunkedOutput("stdout", request["max_output"])
+    stderr = ChunkedOutput("stderr", request["max_output"])
+    outputs[:] = [stdout, stderr]
+    exit_code = 0
+    namespace = {"__name__": "__main__", "__builtins__": builtins}
+    sys.stdin = io.StringIO("")
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        try:
+            exec(compile(code, "<task>", "exec"), namespace)
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                exit_code = e.code or 0
+            else:
+                print(e.code, file=sys.stderr)
+                exit_code = 1
+        except BaseException as e:
+            traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+            exit_code = 1
+    stdout.close()
+    stderr.close()
+    send({
+        "exit_code": exit_code,
+        "tails": {out.name: out.tail for out in (stdout, stderr) if out.truncated},
+        "peak_memory_kb": peak_memory_kb()
+    })
+"""
+
+class WarmPythonExecutor:
+    """Interpréteur Python préchauffé qui exécute le code reçu par un pipe"""
+    
+    def __init__(self, preload):
+        self.process = subprocess.Popen(
+            [sys.executable, "-u", "-c", PYTHON_EXECUTOR_SOURCE, *preload],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8"
+        )
+        self.tasks_run = 0
+        self.peak_memory_kb = 0
+        
+        # Lecture des réponses dans un thread: permet un timeout portable
+        self.replies = queue.Queue()
+        threading.Thread(target=self._read_replies, daemon=True).start()
+    
+    def _read_replies(self):
+        for line in self.process.stdout:
+            self.replies.put(line)
+        self.replies.put(None)
+    
+    def run(self, code, timeout, streams, max_output):
+        """Exécuter du code en passant sa sortie aux `streams` au fil de l'eau
+        
+        Lève subprocess.TimeoutExpired au-delà de timeout. Si la tâche est
+        terminée ailleurs (flux annulé), l'interpréteur est tué et la
+        réponse porte "cancelled".
+        """
+        self.process.stdin.write(json.dumps({"code": code, "max_output": max_output}) + "\n")
+        self.process.stdin.flush()
+        
+        deadline = time.time() + timeout
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                self.kill()
+                raise subprocess.TimeoutExpired("python-pool", timeout)
+            
+            try:
+                line = self.replies.get(timeout=min(remaining, 1.0))
+            except queue.Empty:
+                line = ""
+            if line is None:
+                raise RuntimeError("L'interpréteur préchauffé s'est arrêté")
+            
+            if line:
+                reply = json.loads(line)
+                if "stream" not in reply:
+                    break
+                streams[reply["stream"]].write(reply["data"])
+            
+            for streamer in streams.values():
+                streamer.flush_if_due()
+            if any(streamer.cancelled for streamer in streams.values()):
+                self.kill()
+                return {"exit_code": self.process.returncode, "cancelled": True}
+        
+        # Sortie tronquée: garder la vraie fin pour le résultat
+        for stream, tail in reply["tails"].items():
+            streams[stream].tail = tail
+        self.tasks_run += 1
+        self.peak_memory_kb = reply["peak_memory_kb"]
+        return reply
+    
+    def kill(self):
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+
+class PythonExecutorPool:
+    """Pool d'interpréteurs Python préchauffés pour les tâches 'python'
+    
+    Évite le démarrage d'un interpréteur et l'écriture d'un fichier
+    temporaire par tâche. Chaque interpréteur est recyclé après
+    `max_tasks` tâches, au-delà de `max_memory_mb` de mémoire, après un
+    timeout, une annulation ou s'il s'arrête. La sortie arrive par morceaux
+    (au plus `max_output` caractères par flux).
+    """
+    
+    def __init__(self, size, max_tasks=100, max_memory_mb=256, preload=PYTHON_POOL_PRELOAD,
+                 max_output=1000000):
+        self.max_tasks = max_tasks
+        self.max_memory_kb = max_memory_mb * 1024
+        self.max_output = max_output
+        self.preload = preload
+        self.idle = queue.Queue()
+        for _ in range(size):
+            self.idle.put(WarmPythonExecutor(preload))
+    
+    def run(self, code, timeout, streams):
+        """Exécuter du code dans un interpréteur libre"""
+        executor = self.idle.get()
+        healthy = False
+        try:
+            reply = executor.run(code, timeout, streams, self.max_output)
+            healthy = not reply.get("cancelled")
+            return reply
+        finally:
+            if (healthy and executor.tasks_run < self.max_tasks
+                    and executor.peak_memory_kb < self.max_memory_kb):
+                self.idle.put(executor)
+            else:
+                executor.kill()
+                self.idle.put(WarmPythonExecutor(self.preload))
+    
+    def close(self):
+        """Arrêter tous les interpréteurs inactifs"""
+        while True:
+            try:
+                self.idle.get_nowait().kill()
+            except queue.Empty:
+                break
+
+class OutputStreamer:
+    """Diffuse la sortie d'une tâche au coordinateur pendant l'exécution
+    
+    La sortie est envoyée par morceaux (taille ou délai atteint) à
+    /api/tasks/<id>/output; seule la fin (`tail_chars`) reste en mémoire,
+    pour le résultat final. Au-delà de `max_chars`, ou si la tâche ne nous
+    appartient plus (409), la sortie est ignorée mais un envoi vide reste
+    fait à chaque flush_interval: un 410 (tâche terminée ailleurs) annule
+    alors l'exécution.
+    """
+    
+    def __init__(self, worker, task_id, stream, chunk_chars=16384,
+                 flush_interval=1.0, max_chars=1000000, tail_chars=5000):
+        self.worker = worker
+        self.task_id = task_id
+        self.stream = stream
+        self.chunk_chars = chunk_chars
+        self.flush_interval = flush_interval
+        self.max_chars = max_chars
+        self.tail_chars = tail_chars
+        
+        self.position = 0
+        self.buffer = []
+        self.buffered = 0
+        self.tail = ""
+        self.truncated = False
+        self.cancelled = False
+        self.last_flush = time.time()
+        self.lock = threading.Lock()
+    
+    def write(self, text):
+        """Ajouter de la sortie (envoyée dès qu'un morceau est prêt)"""
+        with self.lock:
+            self.tail = (self.tail + text)[-self.tail_chars:]
+            
+            room = self.max_chars - self.position - self.buffered
+            if self.truncated or room <= 0:
+                self.truncated = True
+                return
+            
+            text = text[:room]
+            self.buffer.append(text)
+            self.buffered += len(text)
+            
+            if self.buffered >= self.chunk_chars:
+                self._flush()
+    
+    def flush_if_due(self):
+        """Envoyer la sortie en attente depuis plus de flush_interval"""
+        with self.lock:
+            if ((self.buffer or self.truncated) and not self.cancelled
+                    and time.time() - self.last_flush >= self.flush_interval):
+                self._flush()
+    
+    def close(self):
+        """Envoyer le reste de la sortie"""
+        with self.lock:
+            self._flush()
+    
+    def _flush(self):
+        self.last_flush = time.time()
+        if self.cancelled or not (self.buffer or self.truncated):
+            return
+        
+        data = "".join(self.buffer)
+        try:
+            response = requests.post(
+                f"{self.worker.coordinator_url}/api/tasks/{self.task_id}/output",
+                json={
+                    "worker_id": self.worker.worker_id,
+                    "stream": self.stream,
+                    "position": self.position,
+                    "data": data
+                },
+                timeout=10
+            )
+            
+            if response.status_code == 200:
+                self.position += len(data)
+                self.buffer = []
+                self.buffered = 0
+                self.truncated = self.truncated or response.json().get("truncated", False)
+            elif response.status_code in (409, 410):
+                # La tâche ne nous appartient plus (bail expiré): ne plus
+                # rien envoyer, mais continuer de sonder. 410: elle est déjà
+                # terminée ailleurs, l'exécution peut être abandonnée
+                self.buffer = []
+                self.buffered = 0
+                self.truncated = True
+                self.cancelled = response.status_code == 410
+                
+        except Exception as e:
+            # Le morceau reste en tampon pour le prochain envoi
+            logger.debug(f"⚠️ Envoi de sortie différé: {e}")
+
+def total_memory_mb():
+    """Mémoire physique de la machine en Mo (8192 si indéterminable)"""
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return 8192
+
+def task_requirements(task):
+    """Besoins (cœurs, mémoire) d'une tâche réclamée"""
+    requirements = task.get("requirements") or {}
+    return requirements.get("cpu_cores") or 1, requirements.get("memory_mb") or 0
+
 class HackathonWorker:
     """Worker simplifié pour le hackathon"""
     
-    def __init__(self, coordinator_url, name=None):
+    def __init__(self, coordinator_url, name=None, batch_size=20, flush_interval=5.0,
+                 poll_wait=25.0, slots=None, python_pool=False,
+                 pool_max_tasks=100, pool_max_memory_mb=256, max_output=1000000,
+                 memory_mb=None, heartbeat_interval=None):
         self.coordinator_url = coordinator_url.rstrip("/")
         self.name = name or f"Hackathon-Worker-{platform.node()[:10]}"
         self.worker_id = None
         self.running = True
         self.task_count = 0
         
+        # Tampon de résultats, envoyé par lot (nombre ou délai atteint)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.pending_results = []
+        self.last_flush = time.time()
+        
+        # Long-polling: le coordinateur garde la requête jusqu'à une tâche
+        self.poll_wait = poll_wait
+        
+        # Emplacements d'exécution concurrents (un par cœur par défaut)
+        self.slots = max(1, slots or os.cpu_count() or 1)
+        
+        # Capacité annoncée au coordinateur: les cœurs sont les emplacements
+        self.memory_mb = memory_mb or total_memory_mb()
+        
+        # Heartbeats (None: intervalle proposé par le coordinateur, 0: désactivés)
+        self.heartbeat_interval = heartbeat_interval
+        
+        # Taille maximale de sortie diffusée par flux (caractères)
+        self.max_output = max_output
+        
+        # Interpréteurs Python préchauffés (optionnel, un par emplacement)
+        self.python_pool = None
+        if python_pool:
+            self.python_pool = PythonExecutorPool(self.slots, pool_max_tasks, pool_max_memory_mb,
+                                                  max_output=max_output)
+        
     def register(self):
         """S'enregistrer auprès du coordinateur"""
         try:
             payload = {
                 "name": self.name,
-                "cpu_cores": os.cpu_count() or 4,
-                "memory_mb": 8192,
+                "cpu_cores": self.slots,
+                "memory_mb": self.memory_mb,
                 "platform": platform.platform()
             }
             
@@ -52,6 +437,8 @@ class HackathonWorker:
             if response.status_code == 200:
                 data = response.json()
                 self.worker_id = data["worker_id"]
+                if self.heartbeat_interval is None:
+                    self.heartbeat_interval = data.get("heartbeat_interval", 0)
                 logger.info(f"✅ Enregistré: {self.name} (ID: {self.worker_id})")
                 return True
                 
@@ -60,29 +447,60 @@ class HackathonWorker:
         
         return False
     
-    def fetch_tasks(self):
-        """Récupérer les tâches disponibles"""
+    def heartbeat_loop(self):
+        """Envoyer un heartbeat à intervalle régulier (thread dédié)
+        
+        Tant que les heartbeats arrivent, le coordinateur prolonge les baux
+        de nos tâches; s'ils cessent, il les remet en attente.
+        """
+        while self.running:
+            try:
+                requests.post(
+                    f"{self.coordinator_url}/api/workers/{self.worker_id}/heartbeat",
+                    timeout=5
+                )
+            except Exception as e:
+                logger.debug(f"💓 Heartbeat non envoyé: {e}")
+            time.sleep(self.heartbeat_interval)
+    
+    def fetch_tasks(self, max_tasks=1, wait=0, free_cpu_cores=None, free_memory_mb=None):
+        """Réclamer des tâches auprès du coordinateur (bail exclusif)
+        
+        Avec `wait` > 0, le coordinateur garde la requête ouverte jusqu'à
+        ce qu'une tâche arrive (long-polling). Les ressources libres bornent
+        les tâches remises. Renvoie None en cas d'erreur.
+        """
         try:
-            response = requests.get(
-                f"{self.coordinator_url}/api/tasks/available",
-                timeout=5
+            response = requests.post(
+                f"{self.coordinator_url}/api/tasks/claim",
+                json={
+                    "worker_id": self.worker_id,
+                    "max_tasks": max_tasks,
+                    "wait": wait,
+                    "free_cpu_cores": free_cpu_cores,
+                    "free_memory_mb": free_memory_mb
+                },
+                timeout=wait + 10
             )
             
             if response.status_code == 200:
                 data = response.json()
-                return data.get("available_tasks", [])
+                return data.get("claimed_tasks", [])
                 
         except Exception as e:
             logger.error(f"⚠️ Erreur récupération tâches: {e}")
         
-        return []
+        return None
     
     def execute_task(self, task):
         """Exécuter une tâche"""
         task_id = task["task_id"]
         task_name = task["name"]
         
-        logger.info(f"🔧 Exécution: {task_name}")
+        if task.get("speculative"):
+            logger.info(f"🏎️ Exécution spéculative (doublon d'une tâche en retard): {task_name}")
+        else:
+            logger.info(f"🔧 Exécution: {task_name}")
         
         try:
             # Parser la commande
@@ -98,19 +516,27 @@ class HackathonWorker:
             
             if task_type == "shell":
                 # Exécuter commande shell
-                process = subprocess.run(
-                    command,
-                    shell=True,
-                    capture_output=True,
-                    text=True,
-                    timeout=30
-                )
+                result = self.run_streaming(task_id, command, shell=True)
+                
+            elif task_type == "python" and self.python_pool:
+                # Exécuter code Python dans un interpréteur préchauffé
+                # (sortie diffusée par morceaux au fil de l'exécution)
+                streams = {
+                    "stdout": OutputStreamer(self, task_id, "stdout", max_chars=self.max_output),
+                    "stderr": OutputStreamer(self, task_id, "stderr", max_chars=self.max_output)
+                }
+                try:
+                    reply = self.python_pool.run(command, 30, streams)
+                finally:
+                    for streamer in streams.values():
+                        streamer.close()
                 
                 result = {
-                    "success": process.returncode == 0,
-                    "stdout": process.stdout[:5000],  # Limiter la taille
-                    "stderr": process.stderr[:5000],
-                    "exit_code": process.returncode
+                    "success": reply["exit_code"] == 0 and not reply.get("cancelled"),
+                    "stdout": streams["stdout"].tail,
+                    "stderr": streams["stderr"].tail,
+                    "exit_code": reply["exit_code"],
+                    "cancelled": reply.get("cancelled", False)
                 }
                 
             elif task_type == "python":
@@ -119,25 +545,16 @@ class HackathonWorker:
                     f.write(command)
                     script_path = f.name
                 
-                process = subprocess.run(
-                    [sys.executable, script_path],
-                    capture_output=True,
-                    text=True,
-                    timeout=30
-                )
-                
-                os.unlink(script_path)
-                
-                result = {
-                    "success": process.returncode == 0,
-                    "stdout": process.stdout[:5000],
-                    "stderr": process.stderr[:5000],
-                    "exit_code": process.returncode
-                }
+                try:
+                    result = self.run_streaming(task_id, [sys.executable, "-u", script_path])
+                finally:
+                    os.unlink(script_path)
             
             result["execution_time"] = round(time.time() - start_time, 2)
             
-            if result["success"]:
+            if result.get("cancelled"):
+                logger.info(f"⏹️ Tâche {task_id} abandonnée (terminée par un autre worker)")
+            elif result["success"]:
                 logger.info(f"✅ Tâche {task_id} terminée en {result['execution_time']}s")
             else:
                 logger.warning(f"⚠️ Tâche {task_id} échouée")
@@ -157,30 +574,128 @@ class HackathonWorker:
                 "execution_time": 0
             }
     
+    def run_streaming(self, task_id, command, shell=False, timeout=30):
+        """Exécuter un processus en diffusant sa sortie au fil de l'eau
+        
+        La mémoire reste bornée: les sorties sont lues par blocs et envoyées
+        au coordinateur, seule leur fin est gardée pour le résultat.
+        """
+        process = subprocess.Popen(
+            command,
+            shell=shell,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        
+        streams = {
+            "stdout": OutputStreamer(self, task_id, "stdout", max_chars=self.max_output),
+            "stderr": OutputStreamer(self, task_id, "stderr", max_chars=self.max_output)
+        }
+        
+        def pump(pipe, streamer):
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+            for block in iter(lambda: pipe.read1(4096), b""):
+                streamer.write(decoder.decode(block))
+            streamer.write(decoder.decode(b"", final=True))
+            pipe.close()
+        
+        readers = [
+            threading.Thread(target=pump, args=(process.stdout, streams["stdout"]), daemon=True),
+            threading.Thread(target=pump, args=(process.stderr, streams["stderr"]), daemon=True)
+        ]
+        for reader in readers:
+            reader.start()
+        
+        deadline = time.time() + timeout
+        try:
+            while True:
+                try:
+                    process.wait(timeout=1.0)
+                    break
+                except subprocess.TimeoutExpired:
+                    if time.time() >= deadline:
+                        process.kill()
+                        process.wait()
+                        raise
+                    for streamer in streams.values():
+                        streamer.flush_if_due()
+                    if any(streamer.cancelled for streamer in streams.values()):
+                        process.kill()
+                        process.wait()
+                        break
+        finally:
+            for reader in readers:
+                reader.join(timeout=5)
+            for streamer in streams.values():
+                streamer.close()
+        
+        return {
+            "success": process.returncode == 0,
+            "stdout": streams["stdout"].tail,
+            "stderr": streams["stderr"].tail,
+            "exit_code": process.returncode,
+            "cancelled": any(streamer.cancelled for streamer in streams.values())
+        }
+    
     def submit_result(self, task_id, result):
-        """Soumettre le résultat"""
+        """Mettre le résultat en tampon et l'envoyer si le lot est prêt"""
+        self.pending_results.append({"task_id": task_id, "result": result})
+        
+        if (len(self.pending_results) >= self.batch_size
+                or time.time() - self.last_flush >= self.flush_interval):
+            return self.flush_results()
+        
+        return True
+    
+    def flush_results(self):
+        """Envoyer tous les résultats en attente en une seule requête"""
+        if not self.pending_results:
+            self.last_flush = time.time()
+            return True
+        
+        batch = self.pending_results
+        
         try:
             payload = {
                 "worker_id": self.worker_id,
-                "result": result
+                "results": batch
             }
             
             response = requests.post(
-                f"{self.coordinator_url}/api/tasks/{task_id}/results",
+                f"{self.coordinator_url}/api/tasks/results",
                 json=payload,
                 timeout=10
             )
             
             if response.status_code == 200:
-                logger.info(f"📤 Résultat soumis pour tâche {task_id}")
-                self.task_count += 1
+                logger.info(f"📤 {len(batch)} résultat(s) soumis")
+                self.task_count += len(batch)
+                self.pending_results = self.pending_results[len(batch):]
+                self.last_flush = time.time()
                 return True
+            
+            logger.error(f"❌ Soumission résultats: HTTP {response.status_code}")
                 
         except Exception as e:
-            logger.error(f"❌ Erreur soumission résultat: {e}")
+            logger.error(f"❌ Erreur soumission résultats: {e}")
         
+        # Les résultats restent en tampon pour la prochaine tentative
         return False
     
+    def collect_results(self, in_flight):
+        """Mettre en tampon les résultats des tâches terminées"""
+        for future in [f for f in in_flight if f.done()]:
+            task = in_flight.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"success": False, "error": str(e), "execution_time": 0}
+            
+            # Résultat d'une exécution abandonnée: le coordinateur l'ignorerait
+            if result.get("cancelled"):
+                continue
+            self.submit_result(task["task_id"], result)
+    
     def run(self):
         """Boucle principale du worker"""
         print("=" * 60)
@@ -193,29 +708,63 @@ class HackathonWorker:
             logger.error("❌ Impossible de démarrer")
             return
         
-        logger.info("⏳ En attente de tâches...")
+        if self.heartbeat_interval:
+            threading.Thread(target=self.heartbeat_loop, name="heartbeat", daemon=True).start()
+        
+        logger.info(f"⏳ En attente de tâches ({self.slots} emplacement(s))...")
+        
+        executor = ThreadPoolExecutor(max_workers=self.slots, thread_name_prefix="slot")
+        in_flight = {}
         
         try:
             while self.running:
-                # Récupérer les tâches
-                tasks = self.fetch_tasks()
+                self.collect_results(in_flight)
                 
-                # Exécuter chaque tâche
-                for task in tasks:
-                    if not self.running:
-                        break
-                    
-                    result = self.execute_task(task)
-                    self.submit_result(task["task_id"], result)
+                # Envoyer les résultats avant d'attendre de nouvelles tâches
+                if self.pending_results and time.time() - self.last_flush >= self.flush_interval:
+                    self.flush_results()
+                
+                # Ressources libres: emplacements, cœurs et mémoire non réservés
+                # par les tâches en cours (selon leurs besoins déclarés)
+                used = [task_requirements(task) for task in in_flight.values()]
+                free_slots = self.slots - len(in_flight)
+                free_cpu = self.slots - sum(cpu for cpu, _ in used)
+                free_memory = self.memory_mb - sum(memory for _, memory in used)
+                
+                # Tout est occupé: attendre qu'une tâche se termine
+                if free_slots <= 0 or free_cpu <= 0:
+                    wait_futures(in_flight, timeout=self.flush_interval, return_when=FIRST_COMPLETED)
+                    continue
+                
+                # Réclamer autant de tâches que d'emplacements libres; attente
+                # courte si des tâches tournent ou si des résultats sont en tampon
+                busy = in_flight or self.pending_results
+                wait = min(self.poll_wait, self.flush_interval) if busy else self.poll_wait
+                tasks = self.fetch_tasks(max_tasks=free_slots, wait=wait,
+                                         free_cpu_cores=free_cpu,
+                                         free_memory_mb=max(free_memory, 0))
+                
+                # Coordinateur injoignable: patienter avant de réessayer
+                if tasks is None:
+                    time.sleep(10)
+                    continue
                 
-                # Pause entre les vérifications
-                time.sleep(10)
+                for task in tasks:
+                    in_flight[executor.submit(self.execute_task, task)] = task
                 
         except KeyboardInterrupt:
             logger.info("\n🛑 Arrêt demandé")
         except Exception as e:
             logger.error(f"❌ Erreur fatale: {e}")
         
+        # Terminer les tâches en cours avant d'envoyer les derniers résultats
+        executor.shutdown(wait=True)
+        self.collect_results(in_flight)
+        self.flush_results()
+        
+        if self.python_pool:
+            self.python_pool.close()
+        
         logger.info(f"👋 Arrêt. Tâches exécutées: {self.task_count}")
 
 def main():
@@ -229,6 +778,64 @@ def main():
         "--name",
         help="Nom du worker"
     )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=20,
+        help="Nombre de résultats envoyés par lot"
+    )
+    parser.add_argument(
+        "--flush-interval",
+        type=float,
+        default=5.0,
+        help="Délai maximal (s) avant l'envoi des résultats en attente"
+    )
+    parser.add_argument(
+        "--poll-wait",
+        type=float,
+        default=25.0,
+        help="Durée maximale (s) d'un long-poll sur le coordinateur"
+    )
+    parser.add_argument(
+        "--slots", "--cpu-cores",
+        dest="slots",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Nombre de tâches exécutées en parallèle, annoncé comme cœurs (défaut: nombre de cœurs)"
+    )
+    parser.add_argument(
+        "--memory-mb",
+        type=int,
+        help="Mémoire (MB) annoncée au coordinateur (défaut: mémoire physique)"
+    )
+    parser.add_argument(
+        "--python-pool",
+        action="store_true",
+        help="Exécuter les tâches python dans des interpréteurs préchauffés"
+    )
+    parser.add_argument(
+        "--pool-max-tasks",
+        type=int,
+        default=100,
+        help="Tâches exécutées par interpréteur préchauffé avant recyclage"
+    )
+    parser.add_argument(
+        "--pool-max-memory-mb",
+        type=int,
+        default=256,
+        help="Mémoire maximale (MB) d'un interpréteur préchauffé avant recyclage"
+    )
+    parser.add_argument(
+        "--max-output",
+        type=int,
+        default=1000000,
+        help="Taille maximale (caractères) de sortie envoyée par flux"
+    )
+    parser.add_argument(
+        "--heartbeat-interval",
+        type=float,
+        help="Intervalle (s) entre deux heartbeats (défaut: celui du coordinateur, 0: désactivés)"
+    )
     parser.add_argument(
         "--debug",
         action="store_true",
@@ -240,7 +847,11 @@ def main():
     if args.debug:
         logging.getLogger().setLevel(logging.DEBUG)
     
-    worker = HackathonWorker(args.coordinator, args.name)
+    worker = HackathonWorker(args.coordinator, args.name, args.batch_size,
+                             args.flush_interval, args.poll_wait, args.slots,
+                             args.python_pool, args.pool_max_tasks, args.pool_max_memory_mb,
+                             args.max_output, memory_mb=args.memory_mb,
+                             heartbeat_interval=args.heartbeat_interval)
     
     try:
         worker.run()
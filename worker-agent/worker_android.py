@@ -124,15 +124,16 @@ class AndroidWorker:
             while True:
                 import requests
                 
-                # Récupérer les tâches
+                # Réclamer une tâche (long-polling: le serveur attend jusqu'à 25s)
                 try:
-                    response = requests.get(
-                        f"{self.coordinator_url}/api/tasks/available",
-                        timeout=10
+                    response = requests.post(
+                        f"{self.coordinator_url}/api/tasks/claim",
+                        json={"worker_id": self.worker_id, "max_tasks": 1, "wait": 25},
+                        timeout=40
                     )
                     
                     if response.status_code == 200:
-                        tasks = response.json().get("available_tasks", [])
+                        tasks = response.json().get("claimed_tasks", [])
                         
                         for task in tasks:
                             print(f"📥 Tâche: {task.get('name')}")
@@ -165,12 +166,15 @@ class AndroidWorker:
                                 )
                                 
                                 print(f"📤 Résultat soumis")
+                    else:
+                        print(f"⚠️ HTTP {response.status_code}")
+                        time.sleep(30)
                 
                 except requests.exceptions.RequestException as e:
                     print(f"⚠️ Erreur réseau: {e}")
-                
-                # Attendre avant la prochaine vérification
-                time.sleep(30)
+                    
+                    # Attendre avant de réessayer
+                    time.sleep(30)
                 
         except KeyboardInterrupt:
             print("\n👋 Arrêt demandé")